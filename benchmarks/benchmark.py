@@ -0,0 +1,281 @@
+"""
+Benchmarks for the converter and the mkdocs plugin on synthetic pipelines.
+
+Generates a repository of Azure Pipelines templates of configurable size and
+measures per-file conversion time, the wall time of the plugin's on_files for
+cold and warm builds, and peak memory. Results are written as JSON so runs of
+different commits can be compared:
+
+    uv run python benchmarks/benchmark.py --files 500 -o before.json
+    uv run python benchmarks/benchmark.py --files 500 --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from mkdocs.config import load_config
+from mkdocs.structure.files import Files
+
+from mkdocs_azure_pipelines.ado_pipe_to_md import (
+    process_pipeline_content,
+    read_pipeline_file,
+)
+from mkdocs_azure_pipelines.plugin import AzurePipelinesPlugin
+
+TAGS = """#:::title-start:::
+# Synthetic pipeline {index}
+#:::title-end:::
+
+#:::about-start:::
+# Generated pipeline used to benchmark mkdocs-azure-pipelines.
+#:::about-end:::
+
+#:::example-start:::
+# stages:
+#   - template: pipeline-{index}.yml
+#:::example-end:::
+
+"""
+
+
+def generate_pipeline(
+    index: int, stages: int, jobs: int, steps: int, parameters: int, tags: bool
+) -> str:
+    """
+    Generate the YAML of a pipeline with the given number of stages, jobs per
+    stage, steps per job and parameters.
+    """
+    lines = [TAGS.format(index=index)] if tags else []
+    lines += ["trigger:", "  branches:", "    include:", "      - main", ""]
+    lines += ["pool:", '  vmImage: "ubuntu-latest"', ""]
+    if parameters:
+        lines.append("parameters:")
+        for p in range(parameters):
+            lines += [
+                f"  - name: parameter_{p} # Parameter number {p}",
+                "    type: string",
+                f'    default: "value {p}"',
+            ]
+        lines.append("")
+    lines.append("stages:")
+    for s in range(stages):
+        lines += [f"  - stage: Stage{s}", "    jobs:"]
+        for j in range(jobs):
+            lines += [
+                f"      - job: Job{s}_{j}",
+                f'        displayName: "Job {j} of stage {s}"',
+                "        steps:",
+            ]
+            for st in range(steps):
+                lines += [
+                    "          - bash: |",
+                    f'              echo "Step {st} of job {j}"',
+                    f"              echo $(parameter_{st % max(parameters, 1)})",
+                    f'            displayName: "Step {st}"',
+                ]
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def generate_repo(root: Path, args: argparse.Namespace) -> list[Path]:
+    """
+    Write a repository of synthetic pipelines, spread over nested folders.
+    """
+    files = []
+    for i in range(args.files):
+        folder = root / "pipelines" / f"group_{i % 10}" / f"sub_{i % 3}"
+        folder.mkdir(parents=True, exist_ok=True)
+        file = folder / f"pipeline-{i}.yml"
+        file.write_text(
+            generate_pipeline(
+                i, args.stages, args.jobs, args.steps, args.parameters, args.tags
+            ),
+            encoding="utf-8",
+        )
+        files.append(file)
+    return files
+
+
+def measure(func: Callable[[], Any], memory: bool) -> dict[str, float]:
+    """
+    Run func once, returning its wall time and, when memory is set, the peak
+    memory traced in this process. Tracing slows the run down, so timings with
+    and without memory tracing should not be compared.
+    """
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    results = {"seconds": time.perf_counter() - start}
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results["peak_memory_mb"] = peak / 1024 / 1024
+    return results
+
+
+def bench_conversion(files: list[Path], repeat: int) -> dict[str, float]:
+    """
+    Measure the time to convert each file on its own.
+    """
+    contents = [(str(file), read_pipeline_file(str(file))) for file in files]
+    timings = []
+    for file_path, content in contents:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            process_pipeline_content(content, file_path)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+    timings.sort()
+    return {
+        "files": len(timings),
+        "mean_ms": statistics.mean(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "max_ms": timings[-1] * 1000,
+        "lines_per_file": sum(c.count("\n") for _, c in contents) / len(contents),
+    }
+
+
+def bench_plugin(root: Path, args: argparse.Namespace) -> dict[str, Any]:
+    """
+    Measure on_files for a cold build, a warm rebuild in the same process (like
+    mkdocs serve) and, when enabled, a build in a new process with a warm cache.
+    """
+    docs_dir = root / "docs"
+    docs_dir.mkdir(exist_ok=True)
+    (docs_dir / "index.md").write_text("# Home\n")
+    plugin_config: dict[str, Any] = {
+        "input_dirs": ["pipelines"],
+        "output_dir": "pipelines",
+        "workers": args.workers,
+        "cache": args.cache,
+        "cache_dir": str(root / ".cache"),
+        "pages_on_disk": args.pages_on_disk,
+    }
+    config_file = root / "mkdocs.yml"
+    config_file.write_text(
+        json.dumps(
+            {
+                "site_name": "Benchmark",
+                "plugins": [{"mkdocs-azure-pipelines": plugin_config}],
+            }
+        )
+    )
+
+    def build(fresh: bool) -> None:
+        # mkdocs keeps plugin instances between config loads, like in serve
+        config = load_config(str(config_file))
+        plugin = config.plugins["mkdocs-azure-pipelines"]
+        assert isinstance(plugin, AzurePipelinesPlugin)
+        if fresh:
+            # Drop the state kept between builds, as in a new mkdocs process
+            plugin.__init__()
+        config.plugins.on_config(config)
+        config.plugins.on_files(Files([]), config=config)
+
+    results: dict[str, Any] = {}
+    results["cold"] = measure(lambda: build(fresh=True), args.memory)
+    results["warm_incremental"] = measure(lambda: build(fresh=False), args.memory)
+    if args.cache:
+        results["warm_cache"] = measure(lambda: build(fresh=True), args.memory)
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """
+    Print the relative change of every timing compared to a baseline run.
+    """
+
+    def flatten(data: dict[str, Any], prefix: str = "") -> dict[str, float]:
+        flat = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                flat.update(flatten(value, f"{prefix}{key}."))
+            elif isinstance(value, float):
+                flat[f"{prefix}{key}"] = value
+        return flat
+
+    current = flatten(results["results"])
+    previous = flatten(baseline["results"])
+    for key, value in current.items():
+        if key in previous and previous[key]:
+            change = (value - previous[key]) / previous[key] * 100
+            print(f"{key:40} {previous[key]:12.3f} -> {value:12.3f} ({change:+.1f}%)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks for the converter and the mkdocs plugin on synthetic "
+        "pipelines."
+    )
+    parser.add_argument("--files", type=int, default=100, help="number of files")
+    parser.add_argument("--stages", type=int, default=3, help="stages per file")
+    parser.add_argument("--jobs", type=int, default=2, help="jobs per stage")
+    parser.add_argument("--steps", type=int, default=5, help="steps per job")
+    parser.add_argument("--parameters", type=int, default=5, help="parameters")
+    parser.add_argument("--no-tags", dest="tags", action="store_false")
+    parser.add_argument("--workers", type=int, default=1, help="plugin workers")
+    parser.add_argument("--cache", action="store_true", help="enable the cache")
+    parser.add_argument(
+        "--pages-on-disk", action="store_true", help="write the pages to disk"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per file")
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="don't trace peak memory, which slows down the plugin runs",
+    )
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON results to compare with")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="mkdocs-azure-pipelines-bench-") as tmp:
+        root = Path(tmp)
+        files = generate_repo(root, args)
+        results = {
+            "conversion": bench_conversion(files, args.repeat),
+            "on_files": bench_plugin(root, args),
+        }
+
+    report = {
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": vars(args),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
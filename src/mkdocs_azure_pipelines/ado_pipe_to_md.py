@@ -1,12 +1,33 @@
+import hashlib
 import re
 from io import StringIO
 from pathlib import Path
+from typing import Any, NamedTuple
 
 from ruamel.yaml import YAML
+from ruamel.yaml.comments import CommentedMap
+
+from .document import (
+    Parameter,
+    PipelineDocument,
+    PipelineMetadata,
+    TagSection,
+    YamlSection,
+    freeze_json,
+    metadata_record,
+    render_markdown,
+    render_section,
+)
+from .timing import NULL_TIMER, PhaseTimer
 
 START_TAG_PATTERN = r"#:::(\w+)-start:::"
 END_TAG_PATTERN = r"#:::(\w+)-end:::"
 
+# All tags start with the marker, the rest of the tag is matched after it.
+TAG_MARKER = "#:::"
+TAG_SUFFIX_PATTERN = re.compile(r"(\w+)-(start|end):::")
+COMMENT_PREFIX_PATTERN = re.compile(r"^(\s*)#\s", flags=re.MULTILINE)
+
 ALLOWED_TAGS = [
     "title",
     "about",
@@ -14,6 +35,57 @@ ALLOWED_TAGS = [
     "example",
 ]
 
+# Top level YAML fields to document, in output order, with their headers.
+# For the code section the first of steps, jobs or stages found is used.
+YAML_SECTIONS = [
+    (["trigger"], "Triggers"),
+    (["resources"], "Resources"),
+    (["pool"], "Pool"),
+    (["variables"], "Variables"),
+    (["parameters"], "Parameters"),
+    (["steps", "jobs", "stages"], "Code"),
+]
+
+
+# Top level keys of which at least one is present in any pipeline or template.
+PIPELINE_KEYS = [
+    "trigger",
+    "resources",
+    "pool",
+    "variables",
+    "parameters",
+    "steps",
+    "jobs",
+    "stages",
+    "extends",
+]
+# A key may follow the byte order mark of a file saved as UTF-8 with BOM.
+PIPELINE_KEY_PATTERN = re.compile(
+    rf"^\ufeff?[\"']?(?:{'|'.join(PIPELINE_KEYS)})[\"']?[ \t]*:", flags=re.MULTILINE
+)
+# Number of characters at the start of a file looked at to classify it.
+SNIFF_SIZE = 64 * 1024
+
+# Top level keys which define what kind of pipeline or template a file is.
+KIND_KEYS = ["steps", "jobs", "stages", "extends"]
+
+# Line breaks as counted by the YAML parser when reporting positions.
+LINE_BREAK_PATTERN = re.compile("\r\n|[\n\r\x85\u2028\u2029]")
+# Lines after a top level block that belong to what follows it: empty lines,
+# comments at the start of the line and document markers.
+TRAILING_LINE_PATTERN = re.compile(r"(?:\n(?:[ \t]*|#.*|---.*|\.\.\..*))+\Z")
+
+
+def is_pipeline_content(content: str, sniff_size: int = SNIFF_SIZE) -> bool:
+    """
+    Cheaply check if content looks like an Azure Pipeline or template, before
+    any YAML parsing. It does if it contains tags, or if one of the pipeline
+    keys is found at the top level within the first sniff_size characters.
+    """
+    if TAG_MARKER in content:
+        return True
+    return PIPELINE_KEY_PATTERN.search(content, 0, sniff_size) is not None
+
 
 def get_yaml_instance() -> YAML:
     """
@@ -33,79 +105,363 @@ def find_tags(pattern: str, text: str) -> list:
     return re.findall(pattern, text)
 
 
+class Tag(NamedTuple):
+    """
+    A start or end tag found in the content, with its offsets in the content.
+    """
+
+    name: str
+    kind: str  # "start" or "end"
+    start: int
+    end: int
+
+
+def scan_tags(content: str) -> list[Tag]:
+    """
+    Find all start and end tags in a single pass over the content.
+    Content without any tag marker is not scanned at all.
+    """
+    tags: list[Tag] = []
+    position = content.find(TAG_MARKER)
+    while position != -1:
+        match = TAG_SUFFIX_PATTERN.match(content, position + len(TAG_MARKER))
+        if match:
+            tags.append(Tag(match.group(1), match.group(2), position, match.end()))
+            position = content.find(TAG_MARKER, match.end())
+        else:
+            position = content.find(TAG_MARKER, position + 1)
+    return tags
+
+
+def validate_tags(tags: list[Tag]) -> list[tuple[int, str]]:
+    """
+    Validate that all tags are allowed and that every start tag is closed by a
+    matching end tag before the next section starts. Sections can't be nested.
+    Returns (offset, message) pairs for each problem found.
+    """
+    errors = []
+    open_tag: Tag | None = None
+    for tag in tags:
+        if tag.name not in ALLOWED_TAGS:
+            errors.append((tag.start, f"Misspelled {tag.kind} tag '{tag.name}'."))
+        elif tag.kind == "start":
+            if open_tag is not None:
+                errors.append(
+                    (
+                        tag.start,
+                        f"Start tag '{tag.name}' found inside section "
+                        f"'{open_tag.name}'.",
+                    )
+                )
+            open_tag = tag
+        elif open_tag is None:
+            errors.append((tag.start, f"End tag '{tag.name}' without a start tag."))
+        elif open_tag.name != tag.name:
+            errors.append(
+                (
+                    tag.start,
+                    f"End tag '{tag.name}' does not match start tag '{open_tag.name}'.",
+                )
+            )
+            open_tag = None
+        else:
+            open_tag = None
+    if open_tag is not None:
+        errors.append(
+            (open_tag.start, f"Start tag '{open_tag.name}' without an end tag.")
+        )
+    return errors
+
+
+def line_number(content: str, offset: int) -> int:
+    """
+    Return the 1-based line number of an offset in the content.
+    """
+    return content.count("\n", 0, offset) + 1
+
+
+def find_sections(content: str, tags: list[Tag]) -> dict[str, str]:
+    """
+    Map each section name to the raw text between its first start tag and the
+    following end tag with the same name.
+    """
+    sections: dict[str, str] = {}
+    body_starts: dict[str, int] = {}
+    for tag in tags:
+        if tag.name in sections:
+            continue
+        if tag.kind == "start":
+            body_starts.setdefault(tag.name, tag.end)
+        elif tag.name in body_starts:
+            sections[tag.name] = content[body_starts[tag.name] : tag.start]
+    return sections
+
+
+def format_section_content(section_text: str, section_name: str) -> str:
+    """
+    Format the raw text of a tagged section.
+    If section_name is "example", wraps the content in a YAML code block.
+    Removes only the initial "# " from each line while preserving additional spaces.
+    """
+    section_text = strip_section_comments(section_text)
+    if section_name == "example":
+        return f"```yaml\n{section_text}\n```"
+    return section_text
+
+
+def strip_section_comments(section_text: str) -> str:
+    """
+    Remove the empty lines around the raw text of a tagged section, and the
+    initial "# " of each line.
+    """
+    section_text = section_text.lstrip("\n").rstrip("\n")
+    # Remove only the first occurrence of "# " from each line.
+    return COMMENT_PREFIX_PATTERN.sub(r"\1", section_text)
+
+
 def extract_section_content(content: str, section_name: str) -> str | None:
     """
     Extract content between start and end tags for a given section.
     If section_name is "example", wraps the content in a YAML code block.
     Removes only the initial "# " from each line while preserving additional spaces.
     """
-    pattern = rf"#:::{section_name}-start:::(.*?)#:::{section_name}-end:::"
-    match = re.search(pattern, content, re.DOTALL)
-    if match:
-        section_text = match.group(1).lstrip("\n").rstrip("\n")
-        # Remove only the first occurrence of "# " from each line.
-        section_text = re.sub(r"^(\s*)#\s", r"\1", section_text, flags=re.MULTILINE)
-        if section_name == "example":
-            return f"```yaml\n{section_text}\n```"
-        return section_text
-    return None
+    section_text = find_sections(content, scan_tags(content)).get(section_name)
+    if section_text is None:
+        return None
+    return format_section_content(section_text, section_name)
 
 
-def extract_yaml_section(content: str, fields: list[str]) -> str | None:
+def load_yaml(content: str, yaml: YAML) -> Any:
     """
-    Extract the first found field from a list of possible fields in the YAML content.
-    Returns the content in a YAML code block.
+    Parse the YAML content into a round-trip document tree.
+    The tree can then be passed to find_yaml_section once per section,
+    so a pipeline file only needs to be parsed a single time.
+    """
+    return yaml.load(content)
+
+
+def dump_yaml_code(data: Any, fields: list[str], yaml: YAML) -> tuple[str, str] | None:
+    """
+    Dump the first found field from a list of possible fields in an already
+    parsed YAML document. Returns the field and its code.
     """
     try:
-        yaml = get_yaml_instance()
-        data = yaml.load(content)
         if not data:
             return None
         for field in fields:
             if field in data:
                 stream = StringIO()
                 yaml.dump({field: data[field]}, stream)
-                return f"```yaml\n{stream.getvalue().strip()}\n```"
+                return field, stream.getvalue().strip()
         return None
     except Exception as e:
         print(f"Error parsing YAML for '{fields}': {e}")
         return None
 
 
+def line_offsets(content: str) -> list[int]:
+    """
+    Return the offset in the content at which each line starts.
+    """
+    return [0, *(match.end() for match in LINE_BREAK_PATTERN.finditer(content))]
+
+
+def slice_yaml_code(
+    content: str, data: Any, fields: list[str], offsets: list[int]
+) -> tuple[str, int, str] | None:
+    """
+    Copy the first found field from a list of possible fields from the source
+    text, using the positions of the top level keys in the parsed document.
+    A block runs from its key up to the next top level key, without the empty
+    lines and comments in front of that key.
+    Returns the field, the 1-based line of its key and its code, or None when
+    the field is missing or its block can't be located, like in flow style
+    documents.
+    """
+    if not isinstance(data, CommentedMap):
+        return None
+    keys = list(data)
+    for field in fields:
+        if field not in data:
+            continue
+        line, column = data.lc.key(field)
+        index = keys.index(field)
+        end_line = len(offsets)
+        if index + 1 < len(keys):
+            end_line = data.lc.key(keys[index + 1])[0]
+        if column != 0 or end_line <= line:
+            return None
+        start = offsets[line]
+        # The byte order mark of a file saved as UTF-8 with BOM is not code
+        if start == 0 and content.startswith("\ufeff"):
+            start = 1
+        end = offsets[end_line] if end_line < len(offsets) else len(content)
+        text = content[start:end]
+        text = LINE_BREAK_PATTERN.sub("\n", text)
+        text = TRAILING_LINE_PATTERN.sub("", text.rstrip("\n"))
+        return field, line + 1, text.rstrip()
+    return None
+
+
+def extract_yaml_section(content: str, fields: list[str]) -> str | None:
+    """
+    Extract the first found field from a list of possible fields in the YAML content.
+    Returns the content in a YAML code block.
+    """
+    try:
+        yaml = get_yaml_instance()
+        data = load_yaml(content, yaml)
+    except Exception as e:
+        print(f"Error parsing YAML for '{fields}': {e}")
+        return None
+    section = find_yaml_section(content, data, fields, "", yaml, line_offsets(content))
+    return None if section is None else render_section(section)
+
+
+def find_yaml_section(
+    content: str,
+    data: Any,
+    fields: list[str],
+    header: str,
+    yaml: YAML,
+    offsets: list[int],
+) -> YamlSection | None:
+    """
+    Find the first found field from a list of possible fields, as a section of
+    the pipeline document. The code is copied from the source when possible
+    and otherwise dumped from the parsed document.
+    """
+    sliced = slice_yaml_code(content, data, fields, offsets)
+    if sliced is not None:
+        field, line, code = sliced
+        return YamlSection(header, field, code, line)
+    if isinstance(data, dict) and data.keys().isdisjoint(fields):
+        return None
+    dumped = dump_yaml_code(data, fields, yaml)
+    if dumped is None:
+        return None
+    field, code = dumped
+    return YamlSection(header, field, code)
+
+
+def plain_value(value: Any) -> Any:
+    """
+    Convert a value of a parsed document to plain JSON serializable types.
+    """
+    if isinstance(value, dict):
+        return {str(key): plain_value(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [plain_value(item) for item in value]
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, int | float):
+        return int(value) if isinstance(value, int) else float(value)
+    return str(value)
+
+
+def parameter_metadata(parameters: Any) -> tuple[Parameter, ...]:
+    """
+    Return the name, type and default of each parameter. Parameters are given
+    either as a list of definitions, or as a mapping of names to defaults.
+    """
+    if isinstance(parameters, dict):
+        return tuple(
+            Parameter(str(name), None, freeze_json(plain_value(default)))
+            for name, default in parameters.items()
+        )
+    if not isinstance(parameters, list):
+        return ()
+    return tuple(
+        Parameter(
+            str(parameter.get("name")),
+            freeze_json(plain_value(parameter.get("type"))),
+            freeze_json(plain_value(parameter.get("default"))),
+        )
+        for parameter in parameters
+        if isinstance(parameter, dict) and "name" in parameter
+    )
+
+
+def pipeline_metadata(content: str, data: Any) -> PipelineMetadata:
+    """
+    Summarize a pipeline from its parsed document, for the metadata index.
+    """
+    if not isinstance(data, dict):
+        data = {}
+    return PipelineMetadata(
+        kind=next((key for key in KIND_KEYS if key in data), None),
+        parameters=parameter_metadata(data.get("parameters")),
+        pool=freeze_json(plain_value(data.get("pool"))),
+        trigger=freeze_json(plain_value(data.get("trigger"))),
+        hash=hashlib.sha256(content.encode()).hexdigest(),
+    )
+
+
+def read_pipeline_file(input_file: str) -> str:
+    """
+    Read the content of a pipeline file as text.
+    """
+    with open(input_file, encoding="utf-8") as f:
+        return f.read()
+
+
 def process_pipeline_file(input_file: str) -> str | None:
     """
     Process a pipeline file to generate Markdown documentation.
     Validates tag usage and extracts various sections and YAML blocks.
     """
-    with open(input_file, encoding="utf-8") as f:
-        content = f.read()
+    return process_pipeline_content(read_pipeline_file(input_file), input_file)
 
-    start_tags = find_tags(START_TAG_PATTERN, content)
-    end_tags = find_tags(END_TAG_PATTERN, content)
 
-    # Validate tags
-    if any(tag not in ALLOWED_TAGS for tag in start_tags):
-        print("Found misspelled start tags.")
-        print("Allowed tags are:", ", ".join(ALLOWED_TAGS))
-        return None
-    if any(tag not in ALLOWED_TAGS for tag in end_tags):
-        print("Found misspelled end tags.")
-        print("Allowed tags are:", ", ".join(ALLOWED_TAGS))
-        return None
-    if len(start_tags) != len(end_tags) or set(start_tags) != set(end_tags):
-        print("Tag mismatch error.")
-        print("Start tags:", start_tags)
-        print("End tags:", end_tags)
+def process_pipeline_content(
+    content: str,
+    input_file: str,
+    timer: PhaseTimer = NULL_TIMER,
+    metadata: dict[str, Any] | None = None,
+) -> str | None:
+    """
+    Generate Markdown documentation from the already read content of a pipeline
+    file. The input_file is only used to derive a title when none is tagged.
+    The time spent per phase is recorded in the timer, when one is given.
+    When a metadata dict is given, it is filled with a summary of the pipeline
+    from the same parse, unless no Markdown is generated.
+    """
+    document = build_document(content, input_file, timer)
+    if document is None:
         return None
+    if metadata is not None:
+        metadata.update(metadata_record(document))
+    return render_markdown(document)
 
-    markdown_content = ""
 
-    # Extract and add title
-    title = extract_section_content(content, "title")
-    if title is not None:
-        markdown_content += f"# {title}\n\n"
+def build_document(
+    content: str, input_file: str, timer: PhaseTimer = NULL_TIMER
+) -> PipelineDocument | None:
+    """
+    Parse the already read content of a pipeline file into a document, which
+    can be rendered to several formats. Returns None if the tags are invalid.
+    """
+    # Scan and validate tags, skipping files without any tags entirely
+    sections: dict[str, str] = {}
+    if TAG_MARKER in content:
+        tags = scan_tags(content)
+        errors = validate_tags(tags)
+        if errors:
+            # Printed like the check command, so that the errors of files
+            # converted in parallel can be told apart
+            print(f"Tag error in {input_file}.")
+            for offset, message in errors:
+                print(f"{input_file}:{line_number(content, offset)}: {message}")
+            print("Allowed tags are:", ", ".join(ALLOWED_TAGS))
+            timer.lap("tags")
+            return None
+        sections = find_sections(content, tags)
+
+    # Use the tagged title, or derive one from the file name
+    if "title" in sections:
+        title = format_section_content(sections["title"], "title")
     else:
-        processed_filename = (
+        title = (
             Path(input_file)
             .stem.capitalize()
             .replace("_", " ")
@@ -113,27 +469,37 @@ def process_pipeline_file(input_file: str) -> str | None:
             .replace(".", " ")
             .strip()
         )
-        markdown_content += f"# {processed_filename}\n\n"
-
-    # Extract and add allowed sections (excluding title)
-    for section_name in ALLOWED_TAGS[1:]:
-        section_content = extract_section_content(content, section_name)
-        if section_content is not None:
-            markdown_content += (
-                f"## {section_name.capitalize()}\n\n{section_content}\n\n"
-            )
 
-    # Extract and add additional YAML fields
-    for fields, header in [
-        (["trigger"], "Triggers"),
-        (["resources"], "Resources"),
-        (["pool"], "Pool"),
-        (["variables"], "Variables"),
-        (["parameters"], "Parameters"),
-        (["steps", "jobs", "stages"], "Code"),
-    ]:
-        result = extract_yaml_section(content, fields)
-        if result is not None:
-            markdown_content += f"## {header}\n\n{result}\n\n"
-
-    return markdown_content
+    # Extract the allowed sections (excluding title)
+    tag_sections = tuple(
+        TagSection(section_name, strip_section_comments(sections[section_name]))
+        for section_name in ALLOWED_TAGS[1:]
+        if section_name in sections
+    )
+    timer.lap("tags")
+
+    # Parse the YAML once and extract additional fields from the parsed tree
+    yaml = get_yaml_instance()
+    try:
+        data = load_yaml(content, yaml)
+    except Exception as e:
+        print(f"Error parsing YAML of {input_file}: {e}")
+        data = None
+    timer.lap("parse")
+    metadata = pipeline_metadata(content, data)
+    if data is None:
+        return PipelineDocument(input_file, title, tag_sections, (), metadata)
+
+    # Copy each section from the source, only dumping the parsed document when
+    # the section can't be located in the source
+    offsets = line_offsets(content)
+    yaml_sections = []
+    for fields, header in YAML_SECTIONS:
+        section = find_yaml_section(content, data, fields, header, yaml, offsets)
+        if section is not None:
+            yaml_sections.append(section)
+    timer.lap("dump")
+
+    return PipelineDocument(
+        input_file, title, tag_sections, tuple(yaml_sections), metadata
+    )
@@ -0,0 +1,186 @@
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, TypeVar
+
+from .ado_pipe_to_md import build_document
+from .document import PipelineDocument, metadata_record, render_markdown
+from .timing import NULL_TIMER, BuildReport, PhaseTimer
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Below this number of files the cost of starting worker processes is larger
+# than what is gained by converting in parallel.
+MIN_PARALLEL_FILES = 16
+
+# Number of files converted at a time while the next files are read ahead,
+# independent of how many files are read ahead. Much larger than
+# MIN_PARALLEL_FILES, so that every batch is worth converting in parallel.
+READ_AHEAD_BATCH_SIZE = 256
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    Return the number of worker processes to use, where 0 means one per CPU.
+    """
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+class WorkerPool:
+    """
+    Pool of worker processes which can be shared by the conversions of a
+    build. The processes are started by the first map with enough items and
+    kept until close, so converting in batches starts them only once. Once
+    started, they are also used for batches with fewer items.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = resolve_workers(workers)
+        self.executor: ProcessPoolExecutor | None = None
+        # Set when the pool failed, everything is then processed serially
+        self.broken = False
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def map(
+        self,
+        function: Callable[[T], R],
+        items: list[T],
+        min_items: int = MIN_PARALLEL_FILES,
+    ) -> list[R]:
+        """
+        Apply a function to the items, in the worker processes when there is
+        more than one worker and there are at least min_items items, or the
+        processes are already started. The function and items must be
+        picklable. The results are returned in the same order as the items.
+        """
+        workers = min(self.workers, len(items))
+        started = self.executor is not None
+        if workers <= 1 or self.broken or (len(items) < min_items and not started):
+            return [function(item) for item in items]
+
+        # Hand out work in chunks to limit the inter process overhead per file,
+        # while keeping the chunks small enough to balance uneven file sizes.
+        chunksize = max(1, len(items) // (workers * 4))
+        log.debug(
+            f"mkdocs-azure-pipelines: Processing {len(items)} files "
+            f"using {workers} worker processes"
+        )
+        try:
+            if self.executor is None:
+                # Forking a process with running threads, like the livereload
+                # server and the read ahead threads, can deadlock the workers
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return list(self.executor.map(function, items, chunksize=chunksize))
+        except (BrokenProcessPool, OSError) as e:
+            log.warning(
+                f"mkdocs-azure-pipelines: Parallel processing failed ({e}), "
+                "processing files serially instead"
+            )
+            self.close()
+            self.broken = True
+            return [function(item) for item in items]
+
+    def close(self) -> None:
+        """
+        Stop the worker processes, if they were started.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def parallel_map(
+    function: Callable[[T], R],
+    items: list[T],
+    workers: int,
+    min_items: int = MIN_PARALLEL_FILES,
+) -> list[R]:
+    """
+    Apply a function to the items, in a pool of worker processes which is
+    only used for these items, like WorkerPool.map.
+    """
+    with WorkerPool(max(1, min(resolve_workers(workers), len(items)))) as pool:
+        return pool.map(function, items, min_items)
+
+
+def _process_item(
+    item: tuple[str, str], timed: bool = False
+) -> tuple[PipelineDocument | None, dict[str, float]]:
+    file_path, content = item
+    timer = PhaseTimer() if timed else NULL_TIMER
+    return build_document(content, file_path, timer), timer.phases
+
+
+def convert_pipeline_documents(
+    items: list[tuple[str, str]],
+    workers: int | WorkerPool = 1,
+    report: BuildReport | None = None,
+) -> list[PipelineDocument | None]:
+    """
+    Parse (file_path, content) pairs to pipeline documents.
+    The parsing is spread over a pool of worker processes when more than one
+    worker is requested and there are enough files to make it worthwhile.
+    Pass a WorkerPool instead of a number of workers to share the worker
+    processes between several calls.
+    The results are returned in the same order as the items.
+    Per-file phase timings are added to the report, when one is given.
+    """
+    results = _convert(items, workers, timed=report is not None)
+    if report is not None:
+        for (file_path, _), (_, phases) in zip(items, results, strict=True):
+            report.add_file(file_path, phases)
+    return [document for document, _ in results]
+
+
+def convert_pipeline_contents(
+    items: list[tuple[str, str]],
+    workers: int | WorkerPool = 1,
+    report: BuildReport | None = None,
+    metadata: dict[str, dict[str, Any]] | None = None,
+    documents: list[PipelineDocument] | None = None,
+) -> list[str | None]:
+    """
+    Convert (file_path, content) pairs to Markdown, like
+    convert_pipeline_documents. The metadata of each converted file is added
+    to the metadata dict, by file path, when one is given. The documents are
+    appended to the documents list, when one is given, so that other parts of
+    the build can use them without parsing the files again.
+    """
+    parsed = convert_pipeline_documents(items, workers, report)
+    results: list[str | None] = []
+    for (file_path, _), document in zip(items, parsed, strict=True):
+        if document is None:
+            results.append(None)
+            continue
+        if metadata is not None:
+            metadata[file_path] = metadata_record(document)
+        if documents is not None:
+            documents.append(document)
+        results.append(render_markdown(document))
+    return results
+
+
+def _convert(
+    items: list[tuple[str, str]], workers: int | WorkerPool, timed: bool
+) -> list[tuple[PipelineDocument | None, dict[str, float]]]:
+    function = partial(_process_item, timed=timed)
+    if isinstance(workers, WorkerPool):
+        return workers.map(function, items)
+    return parallel_map(function, items, workers)
@@ -0,0 +1,192 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any
+
+from .incremental import content_digest
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+# Bump when the cache layout or key composition changes.
+CACHE_FORMAT = "3"
+
+
+def get_converter_version() -> str:
+    """
+    Return the installed version of the plugin, used to invalidate cached output
+    produced by another version of the converter.
+    """
+    try:
+        return version("mkdocs-azure-pipelines")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class TextCache:
+    """
+    Content addressed on-disk cache of generated text, like highlighted HTML.
+
+    Each entry is a file named after its key, with the suffix of the kind of
+    text. The total size of the cache is bounded by evicting the least
+    recently used entries.
+    """
+
+    def __init__(
+        self, cache_dir: str | Path, max_size: int, suffix: str = ".txt"
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> str | None:
+        """
+        Return the cached text for the key, or None on a cache miss.
+        A hit refreshes the entry so it is evicted last.
+        """
+        path = self._entry_path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        """
+        Store the text for the key.
+        """
+        self._write(self._entry_path(key), text)
+
+    def _write(self, path: Path, text: str) -> None:
+        """
+        Write a file atomically, so that a concurrent build never reads a
+        partially written file.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning(f"mkdocs-azure-pipelines: Could not write cache entry: {e}")
+            Path(tmp_path).unlink(missing_ok=True)
+
+    def _remove_entry(self, path: Path) -> None:
+        """
+        Remove an entry, and anything stored with it.
+        """
+        os.remove(path)
+
+    def _entry_size(self, path: Path, size: int) -> int:
+        """
+        Return the size of an entry of the given file size, including anything
+        stored with it.
+        """
+        return size
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache fits max_size,
+        counting everything stored with an entry. Returns the number of removed
+        entries.
+        """
+        if not self.cache_dir.is_dir():
+            return 0
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(self.suffix) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            size = self._entry_size(Path(entry.path), stat.st_size)
+            entries.append((stat.st_mtime, size, entry.path))
+            total_size += size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                self._remove_entry(Path(path))
+            except OSError:
+                continue
+            total_size -= size
+            removed += 1
+        return removed
+
+
+class MarkdownCache(TextCache):
+    """
+    Content addressed on-disk cache of generated Markdown.
+
+    Entries are keyed by a hash of the pipeline file content, its file name
+    (used for the fallback title) and the converter version. The metadata of
+    the pipeline is stored next to its Markdown, and removed with it.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_size: int) -> None:
+        super().__init__(cache_dir, max_size, suffix=".md")
+        self.converter_version = get_converter_version()
+
+    def key(self, input_file: str, content: str) -> str:
+        """
+        Compute the cache key for the content of a pipeline file.
+        """
+        return self.digest_key(input_file, content_digest(content))
+
+    def digest_key(self, input_file: str, digest: str) -> str:
+        """
+        Compute the cache key from the hash of the content of a pipeline file,
+        to find its entry without reading the file.
+        """
+        key = hashlib.sha256()
+        for part in (CACHE_FORMAT, self.converter_version, Path(input_file).name):
+            key.update(part.encode())
+            key.update(b"\0")
+        key.update(digest.encode())
+        return key.hexdigest()
+
+    def _metadata_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get_metadata(self, key: str) -> dict[str, Any] | None:
+        """
+        Return the cached metadata for the key, or None if there is none.
+        """
+        try:
+            return json.loads(self._metadata_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, text: str, metadata: dict[str, Any] | None = None) -> None:
+        """
+        Store Markdown, and optionally metadata, for the key. The metadata is
+        written first, so an entry with Markdown always has its metadata.
+        """
+        if metadata is not None:
+            self._write(self._metadata_path(key), json.dumps(metadata))
+        super().set(key, text)
+
+    def _remove_entry(self, path: Path) -> None:
+        os.remove(path)
+        with contextlib.suppress(OSError):
+            self._metadata_path(path.stem).unlink(missing_ok=True)
+
+    def _entry_size(self, path: Path, size: int) -> int:
+        try:
+            return size + self._metadata_path(path.stem).stat().st_size
+        except OSError:
+            return size
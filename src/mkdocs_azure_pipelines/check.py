@@ -0,0 +1,56 @@
+from ruamel.yaml import YAML
+from ruamel.yaml.error import MarkedYAMLError
+
+from .ado_pipe_to_md import (
+    TAG_MARKER,
+    is_pipeline_content,
+    line_number,
+    read_pipeline_file,
+    scan_tags,
+    validate_tags,
+)
+
+
+def check_content(content: str, check_yaml: bool = False) -> list[tuple[int, str]]:
+    """
+    Find the tag errors in the content of a pipeline file, and its YAML syntax
+    errors when check_yaml is True. Nothing else is parsed or rendered.
+    Returns (1-based line, message) pairs, in the order of the lines.
+    """
+    errors = []
+    if TAG_MARKER in content:
+        errors = [
+            (line_number(content, offset), message)
+            for offset, message in validate_tags(scan_tags(content))
+        ]
+    if check_yaml:
+        try:
+            # The safe loader doesn't keep the comments and the formatting,
+            # which only the conversion needs
+            YAML(typ="safe", pure=True).load(content)
+        except MarkedYAMLError as e:
+            mark = e.problem_mark or e.context_mark
+            line = mark.line + 1 if mark is not None else 1
+            errors.append((line, f"YAML error: {e.problem or e.context}"))
+    return sorted(errors, key=lambda error: error[0])
+
+
+def check_file(
+    file: str, check_yaml: bool = False, skip_non_pipelines: bool = True
+) -> list[str]:
+    """
+    Check a pipeline file, returning a "file:line: message" diagnostic for
+    each error. The file is read here, so that a worker process reads its
+    own files. Files that don't look like Azure Pipelines pass, unless
+    skip_non_pipelines is False.
+    """
+    try:
+        content = read_pipeline_file(file)
+    except (OSError, UnicodeDecodeError) as e:
+        return [f"{file}: Failed to read: {e}"]
+    if skip_non_pipelines and not is_pipeline_content(content):
+        return []
+    return [
+        f"{file}:{line}: {message}"
+        for line, message in check_content(content, check_yaml)
+    ]
@@ -1,26 +1,625 @@
 import argparse
-from collections.abc import Sequence
+import glob
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Collection, Sequence
+from functools import partial
+from pathlib import Path
 
-from .ado_pipe_to_md import process_pipeline_file
+from .ado_pipe_to_md import is_pipeline_content, read_pipeline_file
+from .batch import (
+    MIN_PARALLEL_FILES,
+    READ_AHEAD_BATCH_SIZE,
+    WorkerPool,
+    convert_pipeline_contents,
+    convert_pipeline_documents,
+    parallel_map,
+)
+from .check import check_file
+from .discovery import find_pipeline_files
+from .document import metadata_record, render_json, render_markdown
+from .incremental import IncrementalConverter
+from .index import write_index
+from .prefetch import Prefetcher
 
+# Renderers of the output formats, and the suffix of their files.
+OUTPUT_FORMATS = {"markdown": (render_markdown, ".md"), "json": (render_json, ".json")}
 
-def main(argv: Sequence[str] | None = None) -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("filename", help="input file")
-    parser.add_argument("-o", "--output", help="output file")
-    args = parser.parse_args(argv)
+COMMANDS = ("convert", "watch", "check")
+
+# Checking only the tags of a file takes less than a hundredth of the time to
+# parse its YAML, so it takes many more files to make up for starting the
+# worker processes.
+MIN_PARALLEL_TAG_CHECKS = 2000
+
+
+def is_glob(path: str) -> bool:
+    """
+    Check if the path contains glob wildcards.
+    """
+    return any(char in path for char in "*?[")
+
+
+def glob_root(pattern: str) -> str:
+    """
+    Return the leading part of a glob pattern that contains no wildcards.
+    """
+    parts = []
+    for part in Path(pattern).parts:
+        if is_glob(part):
+            break
+        parts.append(part)
+    return str(Path(*parts)) if parts else "."
+
+
+def collect_inputs(
+    paths: Sequence[str], suffix: str = ".md"
+) -> tuple[list[tuple[str, str]], list[str], set[str]]:
+    """
+    Expand files, directories and glob patterns to the pipeline files to
+    convert. Returns (file, relative output path) pairs, where the output path
+    mirrors the location of the file below the directory or glob it was found
+    with, the paths that didn't match any file, and the files which were
+    named directly instead of found in a directory or with a glob. Named files
+    are mirrored below the deepest directory containing all of them, so files
+    with the same name in different directories keep apart.
+    """
+    inputs = []
+    missing = []
+    named = set()
+    seen = set()
+    named_dirs = [
+        os.path.dirname(os.path.abspath(path))
+        for path in paths
+        if os.path.isfile(path) and not os.path.isdir(path)
+    ]
+    named_root = os.path.commonpath(named_dirs) if named_dirs else "."
+
+    def add(file: str, root: str) -> None:
+        key = os.path.realpath(file)
+        if key in seen:
+            return
+        seen.add(key)
+        relative = Path(os.path.relpath(file, root)).with_suffix(suffix)
+        inputs.append((file, relative.as_posix()))
+
+    for path in paths:
+        if os.path.isdir(path):
+            for file in sorted(find_pipeline_files((path,))):
+                add(file, path)
+        elif os.path.isfile(path):
+            add(path, named_root)
+            named.add(path)
+        elif is_glob(path):
+            matches = sorted(
+                m for m in glob.glob(path, recursive=True) if os.path.isfile(m)
+            )
+            if not matches:
+                missing.append(path)
+            for file in matches:
+                add(file, glob_root(path))
+        else:
+            missing.append(path)
+
+    return inputs, missing, named
+
+
+def find_output_conflicts(
+    inputs: Sequence[tuple[str, str]],
+) -> list[tuple[str, str, str]]:
+    """
+    Find the files whose relative output path is already the output of an
+    earlier file, like files with the same name in two input directories.
+    Returns (file, output path, earlier file) triples.
+    """
+    owners: dict[str, str] = {}
+    conflicts = []
+    for file, relative_output in inputs:
+        owner = owners.setdefault(relative_output, file)
+        if owner != file:
+            conflicts.append((file, relative_output, owner))
+    return conflicts
+
+
+def convert_batch(
+    inputs: list[tuple[str, str]],
+    output_dir: str | None,
+    jobs: int,
+    skip_non_pipelines: bool = True,
+    index: str | None = None,
+    output_format: str = "markdown",
+    read_ahead: int = 0,
+    read_ahead_memory: int = 64,
+    named: Collection[str] = (),
+) -> int:
+    """
+    Convert the files in one process, optionally in parallel, writing the
+    Markdown, or another output format, below output_dir. Files that don't look
+    like Azure Pipelines are skipped without parsing them, unless
+    skip_non_pipelines is False or they are in named, the files given by name
+    instead of found in a directory or with a glob. The metadata of the
+    converted files is written to index, when given. When read_ahead is more
+    than 0, up to that many files are read ahead while a batch of files is
+    converted, using at most read_ahead_memory MiB for the files read ahead.
+    The worker processes are shared by all batches. Prints a summary and
+    returns the exit code.
+    """
+    render, _ = OUTPUT_FORMATS[output_format]
+    processed = skipped = failed = 0
+    read_time = convert_time = write_time = 0.0
+    records = []
+
+    prefetcher = None
+    read = read_pipeline_file
+    batch_size = len(inputs) or 1
+    if read_ahead > 0:
+        prefetcher = Prefetcher(
+            read_pipeline_file, read_ahead, read_ahead_memory * 1024 * 1024
+        )
+        prefetcher.start([file for file, _ in inputs])
+        read = prefetcher.read
+        batch_size = READ_AHEAD_BATCH_SIZE
+
+    pool = WorkerPool(jobs)
+    try:
+        for batch_start in range(0, len(inputs), batch_size):
+            start = time.perf_counter()
+            items = []
+            outputs = []
+            for file, relative_output in inputs[batch_start : batch_start + batch_size]:
+                try:
+                    content = read(file)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Failed to read {file}: {e}")
+                    failed += 1
+                    continue
+                if (
+                    skip_non_pipelines
+                    and file not in named
+                    and not is_pipeline_content(content)
+                ):
+                    print(f"Skipped {file}: not an Azure Pipeline")
+                    skipped += 1
+                    continue
+                items.append((file, content))
+                outputs.append(relative_output)
+            read_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            documents = convert_pipeline_documents(items, pool)
+            convert_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for (file, _), relative_output, document in zip(
+                items, outputs, documents, strict=True
+            ):
+                if document is None:
+                    print(f"Skipped {file}: no output generated")
+                    skipped += 1
+                    continue
+                if output_dir:
+                    output_file = Path(output_dir) / relative_output
+                    try:
+                        output_file.parent.mkdir(parents=True, exist_ok=True)
+                        output_file.write_text(render(document), encoding="utf-8")
+                    except OSError as e:
+                        print(f"Failed to write {output_file}: {e}")
+                        failed += 1
+                        continue
+                processed += 1
+                records.append({**metadata_record(document), "page": relative_output})
+            write_time += time.perf_counter() - start
+    finally:
+        pool.close()
+        if prefetcher is not None:
+            prefetcher.close()
+
+    start = time.perf_counter()
+    if index:
+        try:
+            write_index(index, records)
+        except OSError as e:
+            print(f"Failed to write {index}: {e}")
+            failed += 1
+    write_time += time.perf_counter() - start
+
+    total_time = read_time + convert_time + write_time
+    print(
+        f"Processed {processed} files, skipped {skipped}, failed {failed} "
+        f"in {total_time:.2f}s (read {read_time:.2f}s, "
+        f"convert {convert_time:.2f}s, write {write_time:.2f}s)"
+    )
+    return 1 if failed else 0
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """
+    Write a file atomically, so that other processes reading the output never
+    see a partially written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
     try:
-        md = process_pipeline_file(args.filename)
-    except FileNotFoundError:
-        print(f"File not found: {args.filename}")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+class WatchSession:
+    """
+    Keeps the output directory in sync with the input paths. The Markdown and
+    content hash of every file are kept in memory, so each sync only converts
+    the files which changed since the previous one, and removes the output of
+    files which were removed.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        output_dir: str,
+        jobs: int = 1,
+        skip_non_pipelines: bool = True,
+    ) -> None:
+        self.paths = paths
+        self.output_dir = Path(output_dir)
+        self.jobs = jobs
+        self.skip_non_pipelines = skip_non_pipelines
+        self.incremental = IncrementalConverter()
+        # Input file -> relative output path, of the files with an output and
+        # of the files found by the current sync
+        self.outputs: dict[str, str] = {}
+        self.current_outputs: dict[str, str] = {}
+        # Files given by name, which are converted even if they don't look
+        # like pipelines
+        self.named: set[str] = set()
+        # Input file -> error, of the files which couldn't be read
+        self.read_errors: dict[str, str] = {}
+        # Files left out because their output is the output of another file
+        self.conflicts: set[str] = set()
+
+    def read(self, file: str) -> str:
+        """
+        Read an input file. A file which can't be read, or isn't valid UTF-8,
+        is reported once and gets no output, without failing the whole sync.
+        """
+        try:
+            content = read_pipeline_file(file)
+        except (OSError, UnicodeDecodeError) as e:
+            if self.read_errors.get(file) != str(e):
+                print(f"Failed to read {file}: {e}")
+            self.read_errors[file] = str(e)
+            return ""
+        self.read_errors.pop(file, None)
+        return content
+
+    def convert(self, items: list[tuple[str, str]]) -> list[str | None]:
+        """
+        Convert the changed files and write their Markdown.
+        """
+        pipelines = [
+            (file, content)
+            for file, content in items
+            if file not in self.read_errors
+            and (
+                not self.skip_non_pipelines
+                or file in self.named
+                or is_pipeline_content(content)
+            )
+        ]
+        converted = dict(
+            zip(
+                (file for file, _ in pipelines),
+                convert_pipeline_contents(pipelines, self.jobs),
+                strict=True,
+            )
+        )
+        results = []
+        for file, _ in items:
+            md = converted.get(file)
+            output = self.current_outputs[file]
+            if md is None:
+                self.remove_output(file)
+            else:
+                try:
+                    write_atomic(self.output_dir / output, md)
+                    self.outputs[file] = output
+                except OSError as e:
+                    print(f"Failed to write {self.output_dir / output}: {e}")
+                    md = None
+            results.append(md)
+        return results
+
+    def remove_output(self, file: str) -> None:
+        output = self.outputs.pop(file, None)
+        # The output may have been taken over by a file it conflicted with
+        if output is not None and output not in self.outputs.values():
+            (self.output_dir / output).unlink(missing_ok=True)
+
+    def sync(self) -> tuple[int, int]:
+        """
+        Convert the changed files and remove the output of removed files.
+        Returns the number of converted and removed files.
+        """
+        inputs, _, self.named = collect_inputs(self.paths)
+        # Files whose output is already the output of another file are left
+        # out, reporting each conflict once
+        conflicts = set()
+        for file, relative_output, other in find_output_conflicts(inputs):
+            if file not in self.conflicts:
+                print(
+                    f"Output {relative_output} of {file} is also the output of "
+                    f"{other}, skipping it"
+                )
+            conflicts.add(file)
+        self.conflicts = conflicts
+        inputs = [(file, output) for file, output in inputs if file not in conflicts]
+        self.current_outputs = dict(inputs)
+        files = [file for file, _ in inputs]
+        self.incremental.convert(files, self.read, self.convert)
+        # Read the files which failed again on every sync, they are not
+        # counted as converted
+        for file in list(self.read_errors):
+            self.incremental.states.pop(file, None)
+            if file not in self.current_outputs:
+                del self.read_errors[file]
+        converted = self.incremental.converted - len(self.read_errors)
+        removed = [file for file in self.outputs if file not in self.current_outputs]
+        for file in removed:
+            self.remove_output(file)
+        self.incremental.prune(files)
+        return converted, len(removed)
+
+    def run(self, interval: float) -> None:
+        """
+        Sync every interval seconds, until interrupted.
+        """
+        while True:
+            start = time.perf_counter()
+            try:
+                converted, removed = self.sync()
+            except (OSError, UnicodeDecodeError) as e:
+                # Like a file removed while syncing, retried on the next sync
+                print(f"Failed to sync: {e}")
+                converted = removed = 0
+            if converted or removed:
+                print(
+                    f"Converted {converted} files, removed {removed} "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            time.sleep(interval)
+
+
+def add_convert_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "filenames",
+        nargs="+",
+        metavar="filename",
+        help="input files, directories or glob patterns",
+    )
+    parser.add_argument("-o", "--output", help="output file, for a single input file")
+    parser.add_argument(
+        "-d",
+        "--output-dir",
+        help="output directory, the input directory structure is mirrored in it",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of parallel worker processes, 0 means one per CPU",
+    )
+    parser.add_argument(
+        "--no-skip",
+        dest="skip_non_pipelines",
+        action="store_false",
+        help="also convert files that don't look like Azure Pipelines",
+    )
+    parser.add_argument(
+        "--index",
+        help="write the metadata of the pipelines to this .json or .jsonl file",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(OUTPUT_FORMATS),
+        default="markdown",
+        help="output format, json includes the sections and metadata",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=0,
+        metavar="FILES",
+        help="read up to this many files ahead while converting, for slow "
+        "network filesystems",
+    )
+    parser.add_argument(
+        "--read-ahead-memory",
+        type=int,
+        default=64,
+        metavar="MIB",
+        help="memory for the files read ahead, in MiB",
+    )
+
+
+def add_watch_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="path",
+        help="input files, directories or glob patterns",
+    )
+    parser.add_argument(
+        "-o",
+        "-d",
+        "--output-dir",
+        required=True,
+        help="output directory, the input directory structure is mirrored in it",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of parallel worker processes, 0 means one per CPU",
+    )
+    parser.add_argument(
+        "--no-skip",
+        dest="skip_non_pipelines",
+        action="store_false",
+        help="also convert files that don't look like Azure Pipelines",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="seconds between checks for changed files",
+    )
+
+
+def add_check_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="path",
+        help="input files, directories or glob patterns",
+    )
+    parser.add_argument(
+        "--yaml",
+        dest="check_yaml",
+        action="store_true",
+        help="also check that the files are valid YAML",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=0,
+        help="number of parallel worker processes, 0 means one per CPU",
+    )
+    parser.add_argument(
+        "--no-skip",
+        dest="skip_non_pipelines",
+        action="store_false",
+        help="also check files that don't look like Azure Pipelines",
+    )
+
+
+def convert_main(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    _, suffix = OUTPUT_FORMATS[args.format]
+    inputs, missing, named = collect_inputs(args.filenames, suffix)
+    for path in missing:
+        print(f"File not found: {path}")
+    if missing:
         return 1
-    # Write the Markdown content to the output file
-    if args.output and md is not None:
-        with open(args.output, "w") as output_file:
-            output_file.write(md)
 
+    if args.output:
+        if args.output_dir or len(inputs) != 1:
+            parser.error("-o/--output can only be used with a single input file")
+        file, _ = inputs[0]
+        inputs = [(file, args.output)]
+        output_dir = "."
+    else:
+        output_dir = args.output_dir
+
+    # Refuse to let one file silently overwrite the output of another
+    conflicts = find_output_conflicts(inputs) if output_dir else []
+    for file, relative_output, other in conflicts:
+        print(f"Output {relative_output} of {file} is also the output of {other}")
+    if conflicts:
+        return 1
+
+    return convert_batch(
+        inputs,
+        output_dir,
+        args.jobs,
+        args.skip_non_pipelines,
+        args.index,
+        args.format,
+        args.read_ahead,
+        args.read_ahead_memory,
+        named,
+    )
+
+
+def watch_main(args: argparse.Namespace) -> int:
+    session = WatchSession(
+        args.paths, args.output_dir, args.jobs, args.skip_non_pipelines
+    )
+    print(f"Watching {', '.join(args.paths)}, press Ctrl+C to stop")
+    try:
+        session.run(args.interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
     return 0
 
 
+def check_main(args: argparse.Namespace) -> int:
+    inputs, missing, _ = collect_inputs(args.paths)
+    for path in missing:
+        print(f"File not found: {path}")
+    files = [file for file, _ in inputs]
+    check = partial(
+        check_file,
+        check_yaml=args.check_yaml,
+        skip_non_pipelines=args.skip_non_pipelines,
+    )
+    min_items = MIN_PARALLEL_FILES if args.check_yaml else MIN_PARALLEL_TAG_CHECKS
+    failed = False
+    for diagnostics in parallel_map(check, files, args.jobs, min_items):
+        for diagnostic in diagnostics:
+            print(diagnostic)
+        failed = failed or bool(diagnostics)
+    return 1 if failed or missing else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Converting is the default command. Files named like a command are
+    # converted with an explicit convert command, or after a "--".
+    if not argv or argv[0] not in (*COMMANDS, "-h", "--help"):
+        argv = ["convert", *argv]
+
+    parser = argparse.ArgumentParser(
+        prog="mkdocs-azure-pipelines",
+        description="Convert Azure Pipelines files to documentation pages.",
+        epilog="Without a command the arguments are converted, like with "
+        "'mkdocs-azure-pipelines convert'.",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    convert_parser = commands.add_parser(
+        "convert",
+        help="convert the pipelines (default)",
+        description="Convert the pipelines to Markdown or JSON.",
+    )
+    add_convert_arguments(convert_parser)
+    watch_parser = commands.add_parser(
+        "watch",
+        help="convert the pipelines, then keep converting changed files",
+        description="Convert the pipelines, then keep converting changed files.",
+    )
+    add_watch_arguments(watch_parser)
+    check_parser = commands.add_parser(
+        "check",
+        help="check the tags of the pipelines, without converting them",
+        description="Check the tags of the pipelines, without converting them. "
+        "Exits with 1 if any error is found.",
+    )
+    add_check_arguments(check_parser)
+    args = parser.parse_args(argv)
+
+    if args.command == "watch":
+        return watch_main(args)
+    if args.command == "check":
+        return check_main(args)
+    return convert_main(args, convert_parser)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
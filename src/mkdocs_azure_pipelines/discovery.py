@@ -0,0 +1,104 @@
+import logging
+import os
+from collections.abc import Sequence
+from fnmatch import fnmatch
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+DEFAULT_INCLUDE = ["*.yml", "*.yaml"]
+DEFAULT_EXCLUDE = [".git", "node_modules"]
+
+
+def matches(name: str, relative_path: str, patterns: Sequence[str]) -> bool:
+    """
+    Check if a file or directory matches any of the glob patterns.
+    Patterns containing a "/" are matched against the path relative to the
+    input directory, other patterns against the name only.
+    """
+    for pattern in patterns:
+        if fnmatch(relative_path if "/" in pattern else name, pattern):
+            return True
+    return False
+
+
+def walk_pipeline_files(
+    input_dirs: Sequence[str],
+    include: Sequence[str] = DEFAULT_INCLUDE,
+    exclude: Sequence[str] = DEFAULT_EXCLUDE,
+) -> tuple[list[str], list[str]]:
+    """
+    Walk the input_dirs, including sub directories, and find the files matching
+    the include patterns. Excluded directories are pruned before descending
+    into them, and symlinked directories are not followed. Returns the files
+    found and the directories walked.
+    """
+    files: list[str] = []
+    directories: list[str] = []
+    for input_dir in input_dirs:
+        log.debug(f"mkdocs-azure-pipelines: Processing directory: {input_dir}")
+        # Stack of (directory, path relative to the input directory)
+        stack = [(input_dir, "")]
+        while stack:
+            directory, relative_dir = stack.pop()
+            directories.append(directory)
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                log.warning(f"mkdocs-azure-pipelines: Cannot list {directory}: {e}")
+                continue
+            for entry in entries:
+                relative_path = f"{relative_dir}{entry.name}"
+                if matches(entry.name, relative_path, exclude):
+                    continue
+                try:
+                    # Like rglob, symlinked directories are not descended
+                    # into, so a symlink cycle can't make the walk recurse
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, f"{relative_path}/"))
+                        continue
+                    is_file = entry.is_file()
+                except OSError as e:
+                    log.warning(
+                        f"mkdocs-azure-pipelines: Cannot stat {entry.path}: {e}"
+                    )
+                    continue
+                if is_file and matches(entry.name, relative_path, include):
+                    files.append(entry.path)
+    return files, directories
+
+
+def find_pipeline_files(
+    input_dirs: Sequence[str],
+    include: Sequence[str] = DEFAULT_INCLUDE,
+    exclude: Sequence[str] = DEFAULT_EXCLUDE,
+) -> list[str]:
+    """
+    Find all pipeline files in the input_dirs, including sub directories,
+    in sorted order.
+    """
+    files, _ = walk_pipeline_files(input_dirs, include, exclude)
+    return sorted(files)
+
+
+def unique_paths(paths: Sequence[str]) -> list[str]:
+    """
+    Remove duplicate paths, also when written differently, and sort them.
+    """
+    unique = {}
+    for path in paths:
+        unique.setdefault(os.path.normcase(os.path.abspath(path)), path)
+    return sorted(unique.values())
+
+
+def get_all_files(
+    input_files: Sequence[str],
+    input_dirs: Sequence[str],
+    include: Sequence[str] = DEFAULT_INCLUDE,
+    exclude: Sequence[str] = DEFAULT_EXCLUDE,
+) -> list:
+    """
+    Get all files to be processed from input_files and input_dirs, without
+    duplicates and in sorted order.
+    """
+    files, _ = walk_pipeline_files(input_dirs, include, exclude)
+    return unique_paths([*input_files, *files])
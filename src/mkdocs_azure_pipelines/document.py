@@ -0,0 +1,190 @@
+import json
+from collections.abc import Iterator, Mapping
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+class FrozenMapping(Mapping[str, Any]):
+    """
+    An immutable, hashable and picklable mapping, for the JSON objects kept in
+    a pipeline document.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Mapping[str, Any]) -> None:
+        self._items = dict(items)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._items[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self._items.items()))
+
+    def __repr__(self) -> str:
+        return f"FrozenMapping({self._items!r})"
+
+
+def freeze_json(value: Any) -> Any:
+    """
+    Return a plain JSON value with its objects as FrozenMapping and its arrays
+    as tuples, so it can't be changed once in a document.
+    """
+    if isinstance(value, Mapping):
+        return FrozenMapping({key: freeze_json(item) for key, item in value.items()})
+    if isinstance(value, list | tuple):
+        return tuple(freeze_json(item) for item in value)
+    return value
+
+
+def thaw_json(value: Any) -> Any:
+    """
+    Return a frozen JSON value as plain dicts and lists, to dump it as JSON.
+    """
+    if isinstance(value, Mapping):
+        return {key: thaw_json(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [thaw_json(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class TagSection:
+    """
+    A tagged section of a pipeline, like about or example, with the comment
+    markers removed from its text.
+    """
+
+    name: str
+    text: str
+
+
+@dataclass(frozen=True, slots=True)
+class YamlSection:
+    """
+    A top level YAML field of a pipeline, with its code as written in the file.
+    The line of the key is None when the code was dumped from the parsed
+    document instead.
+    """
+
+    header: str
+    key: str
+    code: str
+    line: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Parameter:
+    """
+    A parameter of a pipeline. The type and default are frozen JSON values, the
+    type is None when the parameters are given as a mapping of defaults.
+    """
+
+    name: str
+    type: Any = None
+    default: Any = None
+
+
+@dataclass(frozen=True, slots=True)
+class PipelineMetadata:
+    """
+    A summary of a pipeline for the metadata index. The pool and trigger are
+    frozen JSON values, and the hash is the SHA-256 of the file content.
+    """
+
+    kind: str | None = None
+    parameters: tuple[Parameter, ...] = ()
+    pool: Any = None
+    trigger: Any = None
+    hash: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class PipelineDocument:
+    """
+    Everything documented about a pipeline file, from a single parse. The
+    renderers below turn it into Markdown or JSON without reading the file
+    again, and it is cheap to pickle for worker processes.
+    """
+
+    path: str
+    title: str
+    tag_sections: tuple[TagSection, ...] = ()
+    yaml_sections: tuple[YamlSection, ...] = ()
+    metadata: PipelineMetadata = PipelineMetadata()
+
+    def sections(self) -> dict[str, TagSection | YamlSection]:
+        """
+        Return the sections by lowercase name, like "about" or "parameters".
+        """
+        sections: dict[str, TagSection | YamlSection] = {
+            section.name: section for section in self.tag_sections
+        }
+        for section in self.yaml_sections:
+            sections.setdefault(section.header.lower(), section)
+        return sections
+
+
+def render_section(section: TagSection | YamlSection) -> str:
+    """
+    Render the body of a section as Markdown, code is put in a YAML block.
+    """
+    if isinstance(section, YamlSection):
+        return f"```yaml\n{section.code}\n```"
+    if section.name == "example":
+        return f"```yaml\n{section.text}\n```"
+    return section.text
+
+
+def render_markdown(document: PipelineDocument) -> str:
+    """
+    Render the documentation page of a pipeline.
+    """
+    parts = [f"# {document.title}\n\n"]
+    for tag_section in document.tag_sections:
+        parts.append(
+            f"## {tag_section.name.capitalize()}\n\n{render_section(tag_section)}\n\n"
+        )
+    for yaml_section in document.yaml_sections:
+        parts.append(f"## {yaml_section.header}\n\n{render_section(yaml_section)}\n\n")
+    return "".join(parts)
+
+
+def metadata_record(document: PipelineDocument) -> dict[str, Any]:
+    """
+    Return the metadata of a pipeline as a JSON serializable record for the
+    metadata index, including its path and title.
+    """
+    metadata = document.metadata
+    return {
+        "path": document.path,
+        "title": document.title,
+        "kind": metadata.kind,
+        "parameters": [
+            thaw_json(asdict(parameter)) for parameter in metadata.parameters
+        ],
+        "pool": thaw_json(metadata.pool),
+        "trigger": thaw_json(metadata.trigger),
+        "hash": metadata.hash,
+    }
+
+
+def document_to_dict(document: PipelineDocument) -> dict[str, Any]:
+    """
+    Return a pipeline document as nested dicts, with the sections and the
+    metadata under their field names, ready to be dumped as JSON.
+    """
+    return thaw_json(asdict(document))
+
+
+def render_json(document: PipelineDocument) -> str:
+    """
+    Render a pipeline as JSON, for tools that need its sections or metadata.
+    """
+    return json.dumps(document_to_dict(document), indent=2) + "\n"
@@ -0,0 +1,158 @@
+import logging
+import os
+import re
+from collections.abc import Iterator
+
+from .ado_pipe_to_md import build_document, read_pipeline_file
+from .document import PipelineDocument, render_markdown, render_section
+from .graph import normalize_path
+from .incremental import content_digest
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+# Markers in hand-written pages, like <!-- azure-pipeline: a/b.yml#parameters -->
+EMBED_MARKER = "azure-pipeline:"
+EMBED_PATTERN = re.compile(
+    r"<!--[ \t]*azure-pipeline:[ \t]*(?P<path>[^#\s]+?)"
+    r"(?:#(?P<section>[\w-]+))?[ \t]*-->"
+)
+FENCE_PATTERN = re.compile(r"^[ \t]*(```|~~~)")
+
+
+def markdown_lines(markdown: str) -> Iterator[tuple[str, bool]]:
+    """
+    Yield the lines of the Markdown, and whether each is outside of a fenced
+    code block, where a line starting with # is a heading.
+    """
+    fence = None
+    for line in markdown.split("\n"):
+        match = FENCE_PATTERN.match(line)
+        if fence is None and match:
+            fence = match.group(1)
+            yield line, False
+        elif fence is not None:
+            if match and match.group(1) == fence:
+                fence = None
+            yield line, False
+        else:
+            yield line, True
+
+
+def demote_headings(markdown: str) -> str:
+    """
+    Move all headings one level down, so an embedded page fits below the
+    title of the page it is embedded in.
+    """
+    return "\n".join(
+        f"#{line}" if outside_code and line.startswith("#") else line
+        for line, outside_code in markdown_lines(markdown)
+    )
+
+
+class PipelineEmbedder:
+    """
+    Replaces embed markers in hand-written pages with the documentation of
+    pipeline files. Each file is read once per build and converted once per
+    content, however many pages embed it, and not at all when the build
+    already parsed it. Conversions are kept between the builds of mkdocs
+    serve, for the files which are still embedded. Files are known by their
+    normalized path.
+    """
+
+    def __init__(self, root: str = ".") -> None:
+        # Paths in markers are relative to the root, the mkdocs.yml folder
+        self.root = root
+        # (file path, content digest) -> document, None if the tags are invalid
+        self.converted: dict[tuple[str, str], PipelineDocument | None] = {}
+        # File path -> content digest, of the files read by the current build
+        self.digests: dict[str, str] = {}
+        # All files embedded since the start, to watch when serving
+        self.files: set[str] = set()
+
+    def start_build(self) -> None:
+        """
+        Forget the files read by the previous build, and the conversions of
+        the files which changed since.
+        """
+        self.converted = {
+            key: self.converted[key]
+            for key in self.digests.items()
+            if key in self.converted
+        }
+        self.digests = {}
+
+    def resolve(self, path: str) -> str:
+        return normalize_path(os.path.join(self.root, path))
+
+    def add_document(self, document: PipelineDocument) -> None:
+        """
+        Use a document which the build parsed from the current content of its
+        file, so embedding the file neither reads nor parses it again.
+        """
+        file_path = normalize_path(document.path)
+        self.digests[file_path] = document.metadata.hash
+        self.converted[(file_path, document.metadata.hash)] = document
+
+    def convert(self, file_path: str) -> PipelineDocument | None:
+        """
+        Parse a pipeline file, reading it only the first time in a build.
+        """
+        digest = self.digests.get(file_path)
+        if digest is None:
+            content = read_pipeline_file(file_path)
+            digest = content_digest(content)
+            self.digests[file_path] = digest
+            if (file_path, digest) not in self.converted:
+                log.debug(f"mkdocs-azure-pipelines: Converting embed: {file_path}")
+                self.converted[(file_path, digest)] = build_document(content, file_path)
+        return self.converted[(file_path, digest)]
+
+    def render(self, path: str, section: str | None, page: str) -> str | None:
+        """
+        Render a whole pipeline file, or one section of it, as Markdown to
+        embed. Returns None if the file or section can't be embedded.
+        """
+        file_path = self.resolve(path)
+        self.files.add(file_path)
+        try:
+            document = self.convert(file_path)
+        except (OSError, UnicodeDecodeError) as e:
+            log.warning(f"mkdocs-azure-pipelines: {page}: Cannot embed {path}: {e}")
+            return None
+        if document is None:
+            log.warning(
+                f"mkdocs-azure-pipelines: {page}: No content generated for {path}"
+            )
+            return None
+        if section is None:
+            return demote_headings(render_markdown(document).strip())
+        if section.lower() == "title":
+            return document.title
+        sections = document.sections()
+        if section.lower() not in sections:
+            log.warning(
+                f"mkdocs-azure-pipelines: {page}: No section {section} in {path}, "
+                f"available sections are: {', '.join(['title', *sections])}"
+            )
+            return None
+        return render_section(sections[section.lower()])
+
+    def embed(self, markdown: str, page: str) -> str:
+        """
+        Replace the embed markers in the Markdown of a page, except in code
+        blocks. Markers which can't be replaced are left as they are, hidden
+        in the page.
+        """
+        if EMBED_MARKER not in markdown:
+            return markdown
+
+        def replace(match: re.Match) -> str:
+            rendered = self.render(match.group("path"), match.group("section"), page)
+            return match.group(0) if rendered is None else rendered
+
+        return "\n".join(
+            EMBED_PATTERN.sub(replace, line)
+            if outside_code and EMBED_MARKER in line
+            else line
+            for line, outside_code in markdown_lines(markdown)
+        )
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import subprocess
+from pathlib import Path
+from typing import Any
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+# Bump when the layout of the manifest changes.
+MANIFEST_FORMAT = "1"
+MANIFEST_NAME = "manifest.json"
+
+
+def run_git(args: list[str], cwd: str | Path) -> str | None:
+    """
+    Run a git command and return its output, or None if it fails, like when
+    git is not installed or cwd is not in a repository.
+    """
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        log.debug(f"mkdocs-azure-pipelines: git {' '.join(args)} failed: {e}")
+        return None
+    return result.stdout
+
+
+def repository_root(path: str | Path) -> str | None:
+    output = run_git(["rev-parse", "--show-toplevel"], path)
+    return os.path.normpath(output.strip()) if output else None
+
+
+def head_commit(root: str | Path) -> str | None:
+    output = run_git(["rev-parse", "HEAD"], root)
+    return output.strip() if output else None
+
+
+class ChangedFiles:
+    """
+    Paths, relative to the repository root, which changed since a commit.
+    Directories are given with a trailing "/" and contain only changed files.
+    """
+
+    def __init__(self, paths: set[str]) -> None:
+        self.files = {path for path in paths if not path.endswith("/")}
+        self.directories = [path for path in paths if path.endswith("/")]
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.files or any(
+            path.startswith(directory) for directory in self.directories
+        )
+
+
+def changed_files(root: str | Path, commit: str) -> ChangedFiles | None:
+    """
+    Find the files changed between commit and HEAD, and the files changed in
+    the working tree, including untracked and ignored files since git doesn't
+    track changes to them. Returns None if the changes can't be determined,
+    like when the commit is not part of a shallow clone.
+    """
+    diff = run_git(["diff", "--name-only", "--no-renames", "-z", commit, "HEAD"], root)
+    status = run_git(
+        [
+            "status",
+            "--porcelain",
+            "-z",
+            "--untracked-files=all",
+            "--ignored=matching",
+            "--no-renames",
+        ],
+        root,
+    )
+    if diff is None or status is None:
+        return None
+    paths = {path for path in diff.split("\0") if path}
+    # Status entries are "XY path"
+    paths.update(entry[3:] for entry in status.split("\0") if len(entry) > 3)
+    return ChangedFiles(paths)
+
+
+def load_manifest(path: str | Path) -> dict[str, Any] | None:
+    """
+    Load the manifest of a previous build, or None if there is no usable one.
+    """
+    try:
+        manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    return manifest
+
+
+def save_manifest(path: str | Path, manifest: dict[str, Any]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({"format": MANIFEST_FORMAT, **manifest}), encoding="utf-8"
+    )
+    os.replace(tmp_path, path)
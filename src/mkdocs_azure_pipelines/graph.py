@@ -0,0 +1,205 @@
+import json
+import os
+import re
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+# A "template: path" entry, as used under steps, jobs, stages, variables and
+# extends. Commented out lines, like in the example section, are not matched.
+TEMPLATE_PATTERN = re.compile(
+    r"^[ \t]*(?:-[ \t]+)?template[ \t]*:[ \t]*"
+    r"(?P<quote>['\"]?)(?P<reference>[^'\"#\n]+?)(?P=quote)[ \t]*(?:#.*)?$",
+    flags=re.MULTILINE,
+)
+
+
+def normalize_path(path: str) -> str:
+    return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+
+def find_template_references(content: str) -> list[str]:
+    """
+    Find the templates referenced in the content, in order and without
+    duplicates. References built from template expressions are ignored since
+    they can't be resolved without running the pipeline.
+    """
+    references = []
+    for match in TEMPLATE_PATTERN.finditer(content):
+        reference = match.group("reference").strip()
+        if "$(" in reference or "${{" in reference or reference in references:
+            continue
+        references.append(reference)
+    return references
+
+
+def resolve_template_reference(
+    reference: str, including_file: str, repositories: Mapping[str, str], root: str
+) -> str | None:
+    """
+    Resolve a template reference to a local file path.
+
+    References are relative to the including file, or to the repository root
+    when they start with a "/". A "@alias" suffix refers to another repository,
+    which is resolved using the local checkout path of the alias. Returns None
+    for aliases without a local checkout.
+    """
+    path, _, alias = reference.partition("@")
+    if alias and alias != "self":
+        if alias not in repositories:
+            return None
+        base = repositories[alias]
+        path = path.lstrip("/")
+    elif path.startswith("/"):
+        base = repositories.get("self", root)
+        path = path.lstrip("/")
+    else:
+        # @self references are relative to the including file as well
+        base = os.path.dirname(including_file)
+    return normalize_path(os.path.join(base, path))
+
+
+class TemplateGraph:
+    """
+    Graph of which pipeline files include which templates.
+
+    Nodes are normalized file paths. For each file the references as written
+    are kept together with the path they resolve to, if any. The files
+    including each template are indexed as well, and kept up to date by
+    update and prune, so looking up the dependents of a file doesn't scan the
+    whole graph.
+    """
+
+    def __init__(self) -> None:
+        # File -> [(reference as written, resolved path or None)]
+        self.references: dict[str, list[tuple[str, str | None]]] = {}
+        # Resolved template -> files including it
+        self.including: dict[str, set[str]] = {}
+
+    def update(self, file_path: str, references: list[tuple[str, str | None]]) -> None:
+        source = normalize_path(file_path)
+        self.remove(source)
+        self.references[source] = references
+        for _, resolved in references:
+            if resolved is not None:
+                self.including.setdefault(resolved, set()).add(source)
+
+    def remove(self, source: str) -> None:
+        """
+        Remove a file, given by its normalized path, and its references.
+        """
+        for _, resolved in self.references.pop(source, []):
+            if resolved is None:
+                continue
+            sources = self.including.get(resolved)
+            if sources is None:
+                continue
+            sources.discard(source)
+            if not sources:
+                del self.including[resolved]
+
+    def prune(self, file_paths: Iterable[str]) -> None:
+        """
+        Remove the files that are no longer part of the build.
+        """
+        keep = {normalize_path(file_path) for file_path in file_paths}
+        for file_path in list(self.references):
+            if file_path not in keep:
+                self.remove(file_path)
+
+    def dependencies(self, file_path: str) -> list[str]:
+        """
+        Return the resolved templates included by the file.
+        """
+        references = self.references.get(normalize_path(file_path), [])
+        return [resolved for _, resolved in references if resolved is not None]
+
+    def dependents(self, file_path: str) -> list[str]:
+        """
+        Return the files which directly include the file.
+        """
+        return sorted(self.including.get(normalize_path(file_path), ()))
+
+    def affected(self, changed: Iterable[str], previous: "TemplateGraph") -> set[str]:
+        """
+        Return the files whose links change when the changed files changed:
+        the changed files, the files including them, and the templates they
+        include before and after the change.
+        """
+        affected = set()
+        for file_path in changed:
+            affected.add(normalize_path(file_path))
+            affected.update(self.dependents(file_path))
+            affected.update(self.dependencies(file_path))
+            affected.update(previous.dependencies(file_path))
+        return affected
+
+    def copy(self) -> "TemplateGraph":
+        graph = TemplateGraph()
+        graph.references = dict(self.references)
+        graph.including = {
+            target: set(sources) for target, sources in self.including.items()
+        }
+        return graph
+
+    def to_dict(self) -> dict:
+        return {
+            "nodes": sorted(self.references),
+            "edges": [
+                {"source": source, "target": resolved, "reference": reference}
+                for source, references in sorted(self.references.items())
+                for reference, resolved in references
+            ],
+        }
+
+    def to_dot(self) -> str:
+        lines = ["digraph templates {"]
+        for source in sorted(self.references):
+            lines.append(f"  {json.dumps(source)};")
+        for edge in self.to_dict()["edges"]:
+            target = edge["target"] or edge["reference"]
+            label = json.dumps(edge["reference"])
+            lines.append(
+                f"  {json.dumps(edge['source'])} -> {json.dumps(target)} "
+                f"[label={label}];"
+            )
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | Path) -> None:
+        """
+        Export the graph, as Graphviz DOT if the path ends with .dot and
+        otherwise as JSON.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".dot":
+            path.write_text(self.to_dot(), encoding="utf-8")
+        else:
+            path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+
+def render_template_links(
+    file_path: str, graph: TemplateGraph, pages: Mapping[str, tuple[str, str]]
+) -> str:
+    """
+    Render Markdown sections linking a page to the pages of the templates it
+    includes and of the files including it. pages maps normalized pipeline
+    file paths to the (link, title) of their generated page.
+    """
+
+    def item(path: str | None, text: str) -> str:
+        if path is not None and path in pages:
+            link, title = pages[path]
+            return f"- [{title}]({link}) `{text}`"
+        return f"- `{text}`"
+
+    markdown = ""
+    references = graph.references.get(normalize_path(file_path), [])
+    if references:
+        items = [item(resolved, reference) for reference, resolved in references]
+        markdown += "## Templates\n\n" + "\n".join(items) + "\n\n"
+    dependents = graph.dependents(file_path)
+    if dependents:
+        items = [item(dependent, Path(dependent).name) for dependent in dependents]
+        markdown += "## Used by\n\n" + "\n".join(items) + "\n\n"
+    return markdown
@@ -0,0 +1,60 @@
+import os
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+from .embed import demote_headings
+from .split import slugify
+
+
+def group_pages(
+    file_paths: Iterable[str], line_counts: Sequence[int | None], threshold: int
+) -> dict[str, str]:
+    """
+    Find the pages to group, which have at most threshold lines and share
+    their directory with at least one other such page. Returns the directory
+    of each file to group, files which keep their own page are left out.
+    """
+    directories: dict[str, list[str]] = {}
+    for file_path, line_count in zip(file_paths, line_counts, strict=True):
+        if line_count is not None and line_count <= threshold:
+            directory = os.path.dirname(os.path.normpath(file_path))
+            directories.setdefault(directory, []).append(file_path)
+    return {
+        file_path: directory
+        for directory, members in directories.items()
+        if len(members) > 1
+        for file_path in members
+    }
+
+
+def group_anchors(file_paths: Iterable[str]) -> dict[str, str]:
+    """
+    Give each file of a group a unique anchor on the group page.
+    """
+    anchors: dict[str, str] = {}
+    for file_path in file_paths:
+        anchor = slugify(Path(file_path).stem) or "pipeline"
+        while anchor in anchors.values():
+            anchor = f"{anchor}-{len(anchors)}"
+        anchors[file_path] = anchor
+    return anchors
+
+
+def render_group(directory: str, sections: Sequence[tuple[str, str]]) -> str:
+    """
+    Render the page of a group from the (anchor, Markdown) pairs of its files,
+    with a list of links to the files at the top. The title of each file
+    becomes a section, its headings are moved one level down.
+    """
+    title = Path(directory).name or directory
+    links = []
+    bodies = []
+    for anchor, markdown in sections:
+        file_title, _, body = markdown.partition("\n")
+        file_title = file_title.removeprefix("# ")
+        links.append(f"- [{file_title}](#{anchor})")
+        bodies.append(
+            f'<a id="{anchor}"></a>\n\n## {file_title}\n\n'
+            f"{demote_headings(body.strip())}\n\n"
+        )
+    return f"# {title}\n\n" + "\n".join(links) + "\n\n" + "".join(bodies)
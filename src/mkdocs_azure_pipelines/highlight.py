@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import re
+from collections.abc import Sequence
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+
+import markdown
+
+from .cache import TextCache
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+# Extensions which highlight code blocks with Pygments.
+HIGHLIGHT_EXTENSIONS = [
+    "pymdownx.highlight",
+    "pymdownx.superfences",
+    "codehilite",
+    "markdown.extensions.codehilite",
+]
+# Extensions which change the HTML of code blocks, used to render them.
+CODE_EXTENSIONS = [
+    *HIGHLIGHT_EXTENSIONS,
+    "fenced_code",
+    "markdown.extensions.fenced_code",
+    "attr_list",
+    "markdown.extensions.attr_list",
+]
+# Packages whose version changes the highlighted HTML.
+HIGHLIGHT_PACKAGES = ["markdown", "pygments", "pymdown-extensions"]
+
+# The YAML code blocks of generated pages.
+CODE_BLOCK_PATTERN = re.compile(r"^```yaml\n.*?\n```$", flags=re.MULTILINE | re.DOTALL)
+# Separates the code blocks of a page, which are rendered as one document so
+# that numbered line anchors are the same as when the page is rendered.
+BLOCK_SEPARATOR = "<!-- mkdocs-azure-pipelines: code block -->"
+
+
+def package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "none"
+
+
+def setting_name(value: Any) -> str:
+    """
+    Name settings which aren't JSON, like the formatters of custom fences,
+    without their address which changes every run.
+    """
+    name = getattr(value, "__qualname__", type(value).__qualname__)
+    return f"{getattr(value, '__module__', type(value).__module__)}.{name}"
+
+
+class CodeHighlighter:
+    """
+    Replaces the YAML code blocks of generated pages with the HTML of the
+    highlighter configured for mkdocs, so the same CSS classes apply. The HTML
+    of each page is cached by the code and the highlighter settings, so code
+    which didn't change is never highlighted again.
+    """
+
+    def __init__(
+        self,
+        markdown_extensions: Sequence[Any],
+        mdx_configs: dict[str, Any],
+        cache: TextCache,
+    ) -> None:
+        self.extensions = [
+            extension
+            for extension in markdown_extensions
+            if isinstance(extension, str) and extension in CODE_EXTENSIONS
+        ]
+        self.configs = {
+            extension: mdx_configs[extension]
+            for extension in self.extensions
+            if extension in mdx_configs
+        }
+        # Without a highlighter the code blocks are cheap to render as usual
+        self.enabled = any(
+            extension in HIGHLIGHT_EXTENSIONS for extension in self.extensions
+        )
+        self.settings = json.dumps(
+            [
+                [package_version(package) for package in HIGHLIGHT_PACKAGES],
+                self.extensions,
+                self.configs,
+            ],
+            sort_keys=True,
+            default=setting_name,
+        )
+        self.cache = cache
+        self.md: markdown.Markdown | None = None
+
+    def key(self, blocks: list[str]) -> str:
+        key = hashlib.sha256(self.settings.encode())
+        for block in blocks:
+            key.update(b"\0")
+            key.update(block.encode())
+        return key.hexdigest()
+
+    def render(self, blocks: list[str]) -> list[str] | None:
+        """
+        Render the code blocks of a page to HTML, or None if the HTML of the
+        blocks can't be told apart.
+        """
+        if self.md is None:
+            self.md = markdown.Markdown(
+                extensions=self.extensions, extension_configs=self.configs
+            )
+        html = self.md.reset().convert(f"\n\n{BLOCK_SEPARATOR}\n\n".join(blocks))
+        parts = [part.strip() for part in html.split(BLOCK_SEPARATOR)]
+        return parts if len(parts) == len(blocks) else None
+
+    def cached(self, key: str, count: int) -> list[str] | None:
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        try:
+            html = json.loads(cached)
+        except ValueError:
+            return None
+        return html if isinstance(html, list) and len(html) == count else None
+
+    def highlight(self, md_content: str) -> str:
+        """
+        Replace the YAML code blocks of a generated page with highlighted HTML.
+        """
+        if not self.enabled:
+            return md_content
+        blocks = CODE_BLOCK_PATTERN.findall(md_content)
+        if not blocks:
+            return md_content
+
+        key = self.key(blocks)
+        html = self.cached(key, len(blocks))
+        if html is None:
+            html = self.render(blocks)
+            if html is None:
+                log.debug("mkdocs-azure-pipelines: Could not highlight code blocks")
+                return md_content
+            self.cache.set(key, json.dumps(html))
+        parts = iter(html)
+        return CODE_BLOCK_PATTERN.sub(lambda _: next(parts), md_content)
@@ -0,0 +1,176 @@
+import hashlib
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from .discovery import DEFAULT_EXCLUDE, DEFAULT_INCLUDE, walk_pipeline_files
+
+
+@dataclass(slots=True)
+class FileState:
+    """
+    State of a converted pipeline file, kept between builds.
+    """
+
+    mtime_ns: int
+    size: int
+    digest: str
+    markdown: str | None
+
+
+def content_digest(content: str) -> str:
+    """
+    Return a hash of the content of a pipeline file.
+    """
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class FileListing:
+    """
+    Listing of the pipeline files found in a set of input directories.
+
+    The listing is kept between builds and is only refreshed when one of the
+    directories it was built from changes, which is when files or folders are
+    added, removed or renamed in it.
+    """
+
+    def __init__(self) -> None:
+        self.key: tuple | None = None
+        self.files: list[str] = []
+        self.dir_mtimes: dict[str, int] = {}
+
+    def is_stale(self) -> bool:
+        """
+        Check if any directory of the listing was changed since it was built.
+        """
+        for path, mtime_ns in self.dir_mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def get(
+        self,
+        input_dirs: tuple[str, ...],
+        include: tuple[str, ...] = tuple(DEFAULT_INCLUDE),
+        exclude: tuple[str, ...] = tuple(DEFAULT_EXCLUDE),
+    ) -> list[str]:
+        """
+        Return the files in input_dirs, listing the directories again if stale.
+        """
+        key = (input_dirs, include, exclude)
+        if self.key != key or self.is_stale():
+            files, directories = walk_pipeline_files(input_dirs, include, exclude)
+            self.dir_mtimes = {}
+            for directory in directories:
+                try:
+                    self.dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+            self.files = sorted(files)
+            self.key = key
+        return self.files
+
+
+class IncrementalConverter:
+    """
+    Keeps the generated Markdown of every pipeline file between builds so that
+    only files which changed since the previous build are converted again.
+
+    A file is considered unchanged when its mtime and size are the same as in
+    the previous build. If they differ the content is hashed, so touching a file
+    without changing it does not convert it again.
+    """
+
+    def __init__(self) -> None:
+        self.states: dict[str, FileState] = {}
+        self.converted = 0
+        self.reused = 0
+
+    def convert(
+        self,
+        file_paths: list[str],
+        read: Callable[[str], str],
+        convert: Callable[[list[tuple[str, str]]], list[str | None]],
+        batch_size: int | None = None,
+        prefetch: Callable[[list[str]], None] | None = None,
+    ) -> list[str | None]:
+        """
+        Return the Markdown of every file in file_paths, in the same order.
+        Only the files that changed since the previous build are passed, as
+        (file_path, content) pairs, to convert. All changed files are passed in
+        a single call, unless batch_size limits the number of files per call to
+        bound the number of file contents held in memory at once. The files
+        which have to be read are passed to prefetch first, in the order they
+        are read, so they can be read ahead.
+        """
+        results: list[str | None] = [None] * len(file_paths)
+        dirty: list[tuple[int, os.stat_result, str]] = []
+        items: list[tuple[str, str]] = []
+        self.converted = 0
+
+        def flush() -> None:
+            for (i, stat, digest), markdown in zip(dirty, convert(items), strict=True):
+                self.states[file_paths[i]] = FileState(
+                    stat.st_mtime_ns, stat.st_size, digest, markdown
+                )
+                results[i] = markdown
+            self.converted += len(items)
+            dirty.clear()
+            items.clear()
+
+        stale: list[tuple[int, os.stat_result]] = []
+        for i, file_path in enumerate(file_paths):
+            stat = os.stat(file_path)
+            state = self.states.get(file_path)
+            if (
+                state is not None
+                and state.mtime_ns == stat.st_mtime_ns
+                and state.size == stat.st_size
+            ):
+                results[i] = state.markdown
+            else:
+                stale.append((i, stat))
+
+        if prefetch is not None:
+            prefetch([file_paths[i] for i, _ in stale])
+        for i, stat in stale:
+            file_path = file_paths[i]
+            content = read(file_path)
+            digest = content_digest(content)
+            state = self.states.get(file_path)
+            if state is not None and state.digest == digest:
+                state.mtime_ns, state.size = stat.st_mtime_ns, stat.st_size
+                results[i] = state.markdown
+                continue
+
+            dirty.append((i, stat, digest))
+            items.append((file_path, content))
+            if batch_size is not None and len(items) >= batch_size:
+                flush()
+
+        if items:
+            flush()
+        self.reused = len(file_paths) - self.converted
+        return results
+
+    def restore(self, file_path: str, digest: str, markdown: str | None) -> None:
+        """
+        Restore the state of a file known to be unchanged since it was
+        converted to markdown, so it is reused without reading it.
+        """
+        stat = os.stat(file_path)
+        self.states[file_path] = FileState(
+            stat.st_mtime_ns, stat.st_size, digest, markdown
+        )
+
+    def prune(self, file_paths: list[str]) -> None:
+        """
+        Forget the state of files that are no longer part of the build.
+        """
+        keep = set(file_paths)
+        for file_path in list(self.states):
+            if file_path not in keep:
+                del self.states[file_path]
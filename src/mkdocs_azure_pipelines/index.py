@@ -0,0 +1,73 @@
+import json
+import posixpath
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+
+def write_index(path: str | Path, records: Iterable[dict[str, Any]]) -> None:
+    """
+    Write the metadata records of the pipelines, as JSON Lines with one record
+    per line if the path ends with .jsonl and otherwise as a JSON list.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".jsonl":
+        text = "".join(json.dumps(record) + "\n" for record in records)
+    else:
+        text = json.dumps(list(records), indent=2) + "\n"
+    path.write_text(text, encoding="utf-8")
+
+
+def read_index(path: str | Path) -> list[dict[str, Any]]:
+    """
+    Read the metadata records written by write_index.
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return json.loads(text)
+
+
+def pool_name(pool: Any) -> str:
+    """
+    Return a short description of a pool, which is either a name or a mapping
+    with a name or a vmImage.
+    """
+    if isinstance(pool, dict):
+        return str(pool.get("name") or pool.get("vmImage") or "")
+    return "" if pool is None else str(pool)
+
+
+def table_cell(text: str) -> str:
+    return text.replace("|", "\\|").replace("\n", " ")
+
+
+def render_catalog(
+    records: Iterable[dict[str, Any]], page: str, title: str = "Pipelines"
+) -> str:
+    """
+    Render an overview page of the pipelines as a Markdown table. Links to the
+    pages of the pipelines are relative to page, the src_uri of the overview.
+    """
+    lines = [
+        f"# {title}",
+        "",
+        "| Pipeline | Kind | Parameters | Pool |",
+        "| --- | --- | --- | --- |",
+    ]
+    base = posixpath.dirname(page)
+    for record in records:
+        link = posixpath.relpath(record["page"], base or ".")
+        parameters = ", ".join(
+            f"`{parameter['name']}`" for parameter in record["parameters"]
+        )
+        cells = [
+            f"[{table_cell(record['title'])}]({link})",
+            record["kind"] or "",
+            table_cell(parameters),
+            table_cell(pool_name(record["pool"])),
+        ]
+        lines.append(f"| {' | '.join(cells)} |")
+    return "\n".join(lines) + "\n"
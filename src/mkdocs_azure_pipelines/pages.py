@@ -0,0 +1,91 @@
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+# Number of files converted, and held in memory, at a time when the generated
+# pages are written to disk.
+WRITE_BATCH_SIZE = 256
+
+# Subfolders of the directory the pages are written to, one per kind of page.
+# Only these are ever pruned, other files in a given directory are left alone.
+PAGE_FOLDERS = ("converted", "linked", "split", "grouped")
+
+
+class PageStore:
+    """
+    Directory holding the generated Markdown pages, so mkdocs reads each page
+    from disk when rendering it instead of the plugin keeping every page in
+    memory for the whole build.
+
+    Without a directory a temporary one is created, which is removed by clear.
+    Pages are written to the PAGE_FOLDERS subfolders of the directory only.
+    """
+
+    def __init__(self, directory: str | Path | None = None) -> None:
+        self.temporary = directory is None
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="mkdocs-azure-pipelines-")
+        self.directory = Path(directory)
+
+    def path(self, name: str) -> Path:
+        return self.directory / name
+
+    def write(self, name: str, markdown: str) -> str:
+        """
+        Write a page and return its absolute path. Pages are written
+        atomically, so a page being rendered is never partially written.
+        """
+        if Path(name).parts[0] not in PAGE_FOLDERS:
+            raise ValueError(f"Page {name} is not in one of {', '.join(PAGE_FOLDERS)}")
+        path = self.path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(markdown)
+            os.replace(tmp_path, path)
+        except OSError:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return str(path.absolute())
+
+    def read(self, page_path: str) -> str:
+        return Path(page_path).read_text(encoding="utf-8")
+
+    def read_title(self, page_path: str) -> str:
+        """
+        Read the title from the first line of a page, without the whole page.
+        """
+        with open(page_path, encoding="utf-8") as f:
+            return f.readline().rstrip("\n").removeprefix("# ")
+
+    def prune(self, keep: set[str]) -> int:
+        """
+        Remove the pages that are not in keep, a set of absolute paths, from
+        the PAGE_FOLDERS. Returns the number of removed pages.
+        """
+        removed = 0
+        for folder in PAGE_FOLDERS:
+            for root, _, names in os.walk(self.directory / folder):
+                for name in names:
+                    page_path = str(Path(root, name).absolute())
+                    if page_path in keep:
+                        continue
+                    try:
+                        os.remove(page_path)
+                    except OSError:
+                        continue
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """
+        Remove the directory if it was created by the store.
+        """
+        if self.temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            log.debug(f"mkdocs-azure-pipelines: Removed {self.directory}")
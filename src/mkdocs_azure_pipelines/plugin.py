@@ -1,18 +1,58 @@
 import hashlib
 import logging
+import os
 from collections.abc import Callable
-from functools import cache
 from pathlib import Path
+from time import perf_counter
+from typing import Any, Literal
 
 from mkdocs.config import config_options
 from mkdocs.config.base import Config
 from mkdocs.config.defaults import MkDocsConfig
 from mkdocs.exceptions import ConfigurationError
 from mkdocs.livereload import LiveReloadServer
-from mkdocs.plugins import BasePlugin
+from mkdocs.plugins import BasePlugin, CombinedEvent, event_priority
 from mkdocs.structure.files import File, Files
+from mkdocs.structure.nav import Navigation
+from mkdocs.structure.pages import Page
+from mkdocs.utils.templates import TemplateContext
 
-from .ado_pipe_to_md import process_pipeline_file
+from .ado_pipe_to_md import is_pipeline_content, read_pipeline_file
+from .batch import READ_AHEAD_BATCH_SIZE, WorkerPool, convert_pipeline_contents
+from .cache import MarkdownCache, TextCache
+from .discovery import (  # noqa: F401
+    DEFAULT_EXCLUDE,
+    DEFAULT_INCLUDE,
+    get_all_files,
+    unique_paths,
+)
+from .document import PipelineDocument
+from .embed import PipelineEmbedder
+from .git_changes import (
+    MANIFEST_NAME,
+    changed_files,
+    head_commit,
+    load_manifest,
+    repository_root,
+    save_manifest,
+)
+from .graph import (
+    TemplateGraph,
+    find_template_references,
+    normalize_path,
+    render_template_links,
+    resolve_template_reference,
+)
+from .group import group_anchors, group_pages, render_group
+from .highlight import CodeHighlighter
+from .incremental import FileListing, IncrementalConverter
+from .index import render_catalog, write_index
+from .pages import WRITE_BATCH_SIZE, PageStore
+from .prefetch import Prefetcher
+from .search import search_summary
+from .split import split_page
+from .timing import BuildReport
+from .watch import watch_directory
 
 log = logging.getLogger(f"mkdocs.plugins.{__name__}")
 
@@ -25,31 +65,98 @@ class PluginConfig(Config):
         config_options.ListOfItems(config_options.Dir(exists=True))
     )
     output_dir = config_options.Type(str, default="pipelines")
+    include = config_options.ListOfItems(
+        config_options.Type(str), default=DEFAULT_INCLUDE
+    )
+    exclude = config_options.ListOfItems(
+        config_options.Type(str), default=DEFAULT_EXCLUDE
+    )
+    cache = config_options.Type(bool, default=False)
+    cache_dir = config_options.Type(str, default=".cache/mkdocs-azure-pipelines")
+    cache_max_size = config_options.Type(int, default=100)  # In MiB
+    workers = config_options.Type(int, default=1)  # 0 means one per CPU
+    skip_non_pipelines = config_options.Type(bool, default=True)
+    timings = config_options.Type(bool, default=False)
+    timings_report = config_options.Optional(config_options.Type(str))
+    template_graph = config_options.Type(bool, default=False)
+    template_graph_export = config_options.Optional(config_options.Type(str))
+    repositories = config_options.Type(dict, default={})  # Alias -> local path
+    pages_on_disk = config_options.Type(bool, default=False)
+    pages_dir = config_options.Optional(config_options.Type(str))  # Default temp dir
+    index = config_options.Optional(config_options.Type(str))  # .json or .jsonl
+    catalog = config_options.Optional(config_options.Type(str))  # src_uri
+    split_threshold = config_options.Type(int, default=0)  # Lines, 0 disables
+    git_changes = config_options.Type(bool, default=False)
+    highlight_cache = config_options.Type(bool, default=False)
+    search_summary = config_options.Type(bool, default=False)
+    group_by_directory = config_options.Type(bool, default=False)
+    group_threshold = config_options.Type(int, default=100)  # Lines
+    read_ahead = config_options.Type(int, default=0)  # Files, 0 disables
+    read_ahead_memory = config_options.Type(int, default=64)  # In MiB
 
 
-@cache
-def get_all_files(input_files: tuple[str], input_dirs: tuple[str]) -> list:
+def generated_page_path(output_dir: str, file_path: str) -> str:
     """
-    Get all files to be processed from input_files and input_dirs
-    Cache the result to avoid reprocessing the same files multiple times.
-    Convert the input arguments to tuples to make them hashable.
+    Return the src_uri of the page generated for a pipeline file. A short hash
+    of the file path keeps pages of files with the same name apart.
     """
-    files_to_process = []
+    path = Path(file_path)
+    hashed_name = hashlib.sha1(file_path.encode()).hexdigest()[:10]  # Short hash
+    return f"{output_dir}/{path.stem}-{hashed_name}.md"
 
-    # Add files from input_files
-    for file in input_files:
-        files_to_process.append(file)
 
-    # Add files from input_dirs (looking for *.yml files)
-    for dir in input_dirs:
-        log.debug(f"mkdocs-azure-pipelines: Processing directory: {dir}")
-        for file in Path(dir).rglob("*.yml"):
-            files_to_process.append(str(file))
-
-    return files_to_process
+def is_subpath(path: str, directory: str) -> bool:
+    """
+    Check if path is inside directory, but not the directory itself.
+    """
+    path, directory = os.path.abspath(path), os.path.abspath(directory)
+    return path != directory and path.startswith(directory.rstrip(os.sep) + os.sep)
 
 
 class AzurePipelinesPlugin(BasePlugin[PluginConfig]):
+    def __init__(self) -> None:
+        self.cache: MarkdownCache | None = None
+        # When pages are written to disk, the Markdown values kept below are
+        # the paths of the pages instead of their content
+        self.pages: PageStore | None = None
+        # Kept between builds when running mkdocs serve
+        self.listing = FileListing()
+        self.incremental = IncrementalConverter()
+        # Only set while converting the files of a build
+        self.pool: WorkerPool | None = None
+        # Only set while converting with read_ahead enabled
+        self.prefetcher: Prefetcher | None = None
+        self.non_pipeline_files: set[str] = set()
+        # Normalized paths of the input_files, which are never skipped
+        self.input_files: set[str] = set()
+        # Pipeline file -> metadata, from the build which converted the file
+        self.metadata: dict[str, dict[str, Any]] = {}
+        # Only set when timings are enabled, for one build at a time
+        self.report: BuildReport | None = None
+        # Generated src_uri -> pipeline file, for the pages of the current build
+        self.generated_pages: dict[str, str] = {}
+        self.render_starts: dict[str, float] = {}
+        # Template references between files, and the pages linked using them
+        self.graph = TemplateGraph()
+        self.changed_files: set[str] = set()
+        self.linked_pages: dict[str, str] = {}
+        # Pipeline file -> (src_uri, anchor) of the group page it is shown on
+        self.groups: dict[str, tuple[str, str]] = {}
+        self.group_pages: set[str] = set()
+        self.root = "."
+        self.repositories: dict[str, str] = {}
+        # Root of the git repository, when git_changes is enabled
+        self.git_root: str | None = None
+        # Pipelines embedded in hand-written pages, and the files watched for
+        # them when serving
+        self.embedder = PipelineEmbedder()
+        self.server: LiveReloadServer | None = None
+        self.watched_embeds: set[str] = set()
+        # Only set when highlight_cache is enabled
+        self.highlighter: CodeHighlighter | None = None
+        # Full HTML of the pages whose summary is being indexed for search
+        self.page_contents: dict[str, str] = {}
+
     def on_config(self, config: MkDocsConfig) -> MkDocsConfig | None:
         if not self.config.input_files and not self.config.input_dirs:
             raise ConfigurationError(
@@ -57,63 +164,880 @@ class AzurePipelinesPlugin(BasePlugin[PluginConfig]):
                 "At least one input_files or input_dirs must be specified."
             )
 
+        for option in ("git_changes", "highlight_cache"):
+            if self.config[option] and not self.config.cache:
+                raise ConfigurationError(
+                    f"mkdocs-azure-pipelines: {option} requires cache to be enabled."
+                )
+
+        if self.config.cache:
+            # A relative cache dir is relative to the mkdocs.yml file
+            cache_dir = Path(self.config.cache_dir)
+            if not cache_dir.is_absolute() and config.config_file_path:
+                cache_dir = Path(config.config_file_path).parent / cache_dir
+            self.cache = MarkdownCache(
+                cache_dir, max_size=self.config.cache_max_size * 1024 * 1024
+            )
+        else:
+            self.cache = None
+
+        if self.config.highlight_cache:
+            assert self.cache is not None
+            self.highlighter = CodeHighlighter(
+                config.markdown_extensions,
+                config.mdx_configs,
+                TextCache(
+                    self.cache.cache_dir / "highlight",
+                    max_size=self.cache.max_size,
+                    suffix=".json",
+                ),
+            )
+            if not self.highlighter.enabled:
+                log.info(
+                    "mkdocs-azure-pipelines: No code highlighting extension "
+                    "configured, code blocks are not highlighted by the plugin"
+                )
+        else:
+            self.highlighter = None
+
+        self.report = BuildReport() if self.config.timings else None
+        self.configure_pages(config)
+
+        if self.config.git_changes:
+            self.git_root = repository_root(self.config_path(".", config))
+
+        # Template paths starting with a / and repository checkouts are
+        # relative to the mkdocs.yml file
+        self.root = self.config_path(".", config)
+        self.repositories = {
+            alias: self.config_path(path, config)
+            for alias, path in self.config.repositories.items()
+        }
+        self.embedder.root = self.root
+
         return config
 
-    def on_files(self, files: Files, /, *, config: MkDocsConfig) -> Files:
-        log.debug(f"mkdocs-azure-pipelines: Output dir: {self.config.output_dir}")
+    def config_path(self, path: str, config: MkDocsConfig) -> str:
+        """
+        Resolve a path from the plugin config relative to the mkdocs.yml file.
+        """
+        if not os.path.isabs(path) and config.config_file_path:
+            path = os.path.join(os.path.dirname(config.config_file_path), path)
+        return os.path.normpath(path)
+
+    def configure_pages(self, config: MkDocsConfig) -> None:
+        """
+        Set up the directory for the generated pages when they are written to
+        disk. The state of previous builds refers to the pages of the previous
+        directory, so it is dropped when the directory changes.
+        """
+        pages_dir = None
+        if self.config.pages_on_disk and self.config.pages_dir:
+            pages_dir = Path(self.config_path(self.config.pages_dir, config))
+        if self.pages is None:
+            if not self.config.pages_on_disk:
+                return
+        elif self.config.pages_on_disk and (
+            self.pages.directory == pages_dir
+            or (self.pages.temporary and pages_dir is None)
+        ):
+            return
+        else:
+            self.pages.clear()
+
+        self.pages = PageStore(pages_dir) if self.config.pages_on_disk else None
+        if self.pages is not None:
+            log.debug(f"mkdocs-azure-pipelines: Pages dir: {self.pages.directory}")
+        self.incremental = IncrementalConverter()
+        self.linked_pages = {}
+
+    def get_files(self) -> list[str]:
+        """
+        Get all files to be processed, only listing the input_dirs again when
+        files were added or removed since the previous build.
+        """
+        start = perf_counter()
+        dir_files = self.listing.get(
+            tuple(self.config.input_dirs or ()),
+            tuple(self.config.include),
+            tuple(self.config.exclude),
+        )
+        all_files = unique_paths([*(self.config.input_files or ()), *dir_files])
+        self.input_files = {
+            os.path.normcase(os.path.abspath(input_file))
+            for input_file in self.config.input_files or ()
+        }
+        # Convert skipped files again once they are listed in input_files
+        for file_path in self.non_pipeline_files:
+            if self.is_input_file(file_path):
+                self.incremental.states.pop(file_path, None)
+        if self.report is not None:
+            self.report.add("discovery", perf_counter() - start)
+        return all_files
+
+    def read_file(self, file_path: str) -> str:
+        """
+        Read a pipeline file, recording the time spent when timings are enabled.
+        When reading ahead, only the time spent waiting for the file is spent
+        reading.
+        """
+        read = read_pipeline_file if self.prefetcher is None else self.prefetcher.read
+        if self.report is None:
+            return read(file_path)
+        start = perf_counter()
+        content = read(file_path)
+        self.report.add("read", perf_counter() - start, file_path)
+        return content
+
+    def manifest_options(self) -> dict[str, Any]:
+        """
+        Options which change the Markdown generated for a file.
+        """
+        return {"skip_non_pipelines": self.config.skip_non_pipelines}
+
+    def git_path(self, file_path: str) -> str | None:
+        """
+        Return the path of a file relative to the git repository root.
+        """
+        assert self.git_root is not None
+        relative_path = os.path.relpath(os.path.abspath(file_path), self.git_root)
+        if relative_path.startswith(os.pardir):
+            return None
+        return Path(relative_path).as_posix()
+
+    def restore_unchanged_files(self, file_paths: list[str]) -> None:
+        """
+        Restore the files which didn't change according to git since the
+        previous build from the cache, without reading them. Only the first
+        build of a process is restored, later builds are incremental anyway.
+        """
+        assert self.cache is not None
+        if self.git_root is None:
+            log.info("mkdocs-azure-pipelines: No git repository, rebuilding all files")
+            return
+        manifest = load_manifest(self.cache.cache_dir / MANIFEST_NAME)
+        if (
+            manifest is None
+            or manifest.get("version") != self.cache.converter_version
+            or manifest.get("options") != self.manifest_options()
+        ):
+            log.info("mkdocs-azure-pipelines: No usable manifest, rebuilding all files")
+            return
+        changes = changed_files(self.git_root, manifest["commit"])
+        if changes is None:
+            log.info(
+                f"mkdocs-azure-pipelines: Cannot diff with {manifest['commit']}, "
+                "rebuilding all files"
+            )
+            return
 
-        def unique_filename(file_path: str) -> str:
-            path = Path(file_path)
-            hashed_name = hashlib.sha1(file_path.encode()).hexdigest()[
-                :10
-            ]  # Short hash
-            return f"{path.stem}-{hashed_name}{path.suffix}"
-
-        def process_and_add_file(file_path: str) -> None:
-            log.debug(f"mkdocs-azure-pipelines: Processing file: {file_path}")
-            md_content = process_pipeline_file(file_path)
-            md_file_path = (
-                f"{self.config.output_dir}/{unique_filename(file_path)}".replace(
-                    ".yml", ".md"
+        restored = 0
+        for file_path in file_paths:
+            git_path = self.git_path(file_path)
+            entry = manifest["files"].get(git_path)
+            if git_path is None or git_path in changes or entry is None:
+                continue
+            if self.config.template_graph and "templates" not in entry:
+                continue
+            if not entry["pipeline"] and self.is_input_file(file_path):
+                continue
+            md_content = None
+            if entry["pipeline"]:
+                key = self.cache.digest_key(file_path, entry["digest"])
+                md_content = self.cache.get(key)
+                metadata = self.cache.get_metadata(key)
+                if md_content is None or metadata is None:
+                    continue
+                self.metadata[file_path] = {**metadata, "path": file_path}
+                if self.pages is not None:
+                    page_path = generated_page_path(self.config.output_dir, file_path)
+                    md_content = self.pages.write(f"converted/{page_path}", md_content)
+            else:
+                self.non_pipeline_files.add(file_path)
+            if self.config.template_graph:
+                self.graph.update(
+                    file_path,
+                    [
+                        (
+                            reference,
+                            resolve_template_reference(
+                                reference, file_path, self.repositories, self.root
+                            ),
+                        )
+                        for reference in entry["templates"]
+                    ],
                 )
+            self.incremental.restore(file_path, entry["digest"], md_content)
+            restored += 1
+        log.info(
+            f"mkdocs-azure-pipelines: Restored {restored} files unchanged since "
+            f"{manifest['commit'][:10]} from the cache"
+        )
+
+    def save_manifest(self, file_paths: list[str]) -> None:
+        """
+        Record the commit and the state of the files of this build, for the
+        next build to find the files changed since.
+        """
+        assert self.cache is not None
+        if self.git_root is None:
+            return
+        commit = head_commit(self.git_root)
+        # Files with uncommitted changes may be reverted without git noticing
+        changes = changed_files(self.git_root, commit) if commit else None
+        if commit is None or changes is None:
+            return
+        files = {}
+        for file_path in file_paths:
+            git_path = self.git_path(file_path)
+            state = self.incremental.states.get(file_path)
+            if git_path is None or git_path in changes or state is None:
+                continue
+            entry: dict[str, Any] = {
+                "digest": state.digest,
+                "pipeline": file_path not in self.non_pipeline_files,
+            }
+            if self.config.template_graph:
+                references = self.graph.references.get(normalize_path(file_path), [])
+                entry["templates"] = [reference for reference, _ in references]
+            files[git_path] = entry
+        save_manifest(
+            self.cache.cache_dir / MANIFEST_NAME,
+            {
+                "commit": commit,
+                "version": self.cache.converter_version,
+                "options": self.manifest_options(),
+                "files": files,
+            },
+        )
+
+    def convert_files(self, file_paths: list[str]) -> list[str | None]:
+        """
+        Convert pipeline files to Markdown, reusing the Markdown from the
+        previous build for files that are unchanged. The worker processes are
+        shared by all batches of the build.
+        """
+        self.pool = WorkerPool(self.config.workers)
+        try:
+            return self.convert_batches(file_paths)
+        finally:
+            self.pool.close()
+            self.pool = None
+
+    def convert_batches(self, file_paths: list[str]) -> list[str | None]:
+        # When writing pages to disk, convert the files in batches and write
+        # the pages as soon as they are converted, so only the pages of one
+        # batch are held in memory
+        convert = self.convert_contents if self.pages is None else self.write_pages
+        batch_size = None if self.pages is None else WRITE_BATCH_SIZE
+        read_ahead = self.config.read_ahead
+        if read_ahead <= 0:
+            return self.incremental.convert(
+                file_paths, self.read_file, convert, batch_size
+            )
+
+        # Convert batches of files while the next files are read, so the time
+        # spent waiting for a slow filesystem overlaps with the time spent
+        # converting. The batches don't depend on how many files are read
+        # ahead, so they stay large enough to convert in parallel.
+        batch_size = min(batch_size or READ_AHEAD_BATCH_SIZE, READ_AHEAD_BATCH_SIZE)
+        self.prefetcher = Prefetcher(
+            read_pipeline_file,
+            read_ahead,
+            self.config.read_ahead_memory * 1024 * 1024,
+        )
+        try:
+            return self.incremental.convert(
+                file_paths, self.read_file, convert, batch_size, self.prefetcher.start
+            )
+        finally:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    def write_pages(self, items: list[tuple[str, str]]) -> list[str | None]:
+        """
+        Convert (file_path, content) pairs and write the generated pages to
+        disk, returning the paths of the pages.
+        """
+        assert self.pages is not None
+        md_contents = self.convert_contents(items)
+        return [
+            self.pages.write(
+                f"converted/{generated_page_path(self.config.output_dir, file_path)}",
+                md_content,
             )
+            if md_content
+            else None
+            for (file_path, _), md_content in zip(items, md_contents, strict=True)
+        ]
+
+    def is_input_file(self, file_path: str) -> bool:
+        """
+        Check if a file is listed in input_files, instead of found in one of
+        the input_dirs.
+        """
+        return os.path.normcase(os.path.abspath(file_path)) in self.input_files
+
+    def convert_contents(self, items: list[tuple[str, str]]) -> list[str | None]:
+        """
+        Convert (file_path, content) pairs to Markdown. Files found in the
+        input_dirs that don't look like Azure Pipelines are skipped, without
+        parsing them, when enabled. Files listed in input_files are always
+        converted.
+        """
+        results: list[str | None] = [None] * len(items)
+        pipelines = []
+        for i, (file_path, content) in enumerate(items):
+            if (
+                self.config.skip_non_pipelines
+                and not self.is_input_file(file_path)
+                and not is_pipeline_content(content)
+            ):
+                log.debug(f"mkdocs-azure-pipelines: Not a pipeline: {file_path}")
+                self.non_pipeline_files.add(file_path)
+                if self.config.template_graph:
+                    self.update_graph(file_path, "")
+            else:
+                self.non_pipeline_files.discard(file_path)
+                pipelines.append(i)
+                if self.config.template_graph:
+                    self.update_graph(file_path, content)
+
+        converted = self.convert_pipelines([items[i] for i in pipelines])
+        for i, md_content in zip(pipelines, converted, strict=True):
+            results[i] = md_content
+        return results
+
+    def update_graph(self, file_path: str, content: str) -> None:
+        """
+        Record the templates referenced by the content of a file.
+        """
+        references = [
+            (
+                reference,
+                resolve_template_reference(
+                    reference, file_path, self.repositories, self.root
+                ),
+            )
+            for reference in find_template_references(content)
+        ]
+        self.graph.update(file_path, references)
+        self.changed_files.add(normalize_path(file_path))
+
+    def link_pages(
+        self,
+        file_paths: list[str],
+        md_contents: list[str | None],
+        previous: TemplateGraph,
+    ) -> list[str | None]:
+        """
+        Add links to the pages of included templates and including files.
+        Only the pages of changed files and the files linked to them before or
+        after the change get new links, the others reuse the previous build's.
+        """
+        pages = {}
+        for file_path, md_content in zip(file_paths, md_contents, strict=True):
             if md_content:
-                new_md_file = File.generated(
-                    config=config,
-                    src_uri=md_file_path,
-                    content=md_content,
+                if file_path in self.groups:
+                    group_page, anchor = self.groups[file_path]
+                    link = f"{Path(group_page).name}#{anchor}"
+                else:
+                    page_path = generated_page_path(self.config.output_dir, file_path)
+                    link = Path(page_path).name
+                if self.pages is None:
+                    title = md_content.partition("\n")[0].removeprefix("# ")
+                else:
+                    title = self.pages.read_title(md_content)
+                pages[normalize_path(file_path)] = (link, title)
+
+        removed = set(previous.references) - set(self.graph.references)
+        affected = self.graph.affected(self.changed_files | removed, previous)
+        linked_pages = {}
+        results: list[str | None] = []
+        for file_path, md_content in zip(file_paths, md_contents, strict=True):
+            key = normalize_path(file_path)
+            if md_content is None:
+                results.append(None)
+                continue
+            if key in affected or key not in self.linked_pages:
+                links = render_template_links(file_path, self.graph, pages)
+                if self.pages is None:
+                    linked_pages[key] = md_content + links
+                else:
+                    page_path = generated_page_path(self.config.output_dir, file_path)
+                    linked_pages[key] = self.pages.write(
+                        f"linked/{page_path}", self.pages.read(md_content) + links
+                    )
+            else:
+                linked_pages[key] = self.linked_pages[key]
+            results.append(linked_pages[key])
+        log.debug(
+            f"mkdocs-azure-pipelines: Updated template links of {len(affected)} files"
+        )
+        self.linked_pages = linked_pages
+        return results
+
+    def group_files(
+        self, file_paths: list[str], md_contents: list[str | None]
+    ) -> dict[str, tuple[str, str]]:
+        """
+        Find the small pages to show on the page of their directory, when
+        enabled. Returns the (src_uri, anchor) of the group page of each file.
+        """
+        if not self.config.group_by_directory:
+            return {}
+        line_counts = []
+        for md_content in md_contents:
+            if not md_content:
+                line_counts.append(None)
+            elif self.pages is None:
+                line_counts.append(md_content.count("\n"))
+            else:
+                line_counts.append(self.pages.read(md_content).count("\n"))
+        directories = group_pages(file_paths, line_counts, self.config.group_threshold)
+        members: dict[str, list[str]] = {}
+        for file_path, directory in directories.items():
+            members.setdefault(directory, []).append(file_path)
+        groups = {}
+        for directory, group_files in members.items():
+            page = generated_page_path(self.config.output_dir, directory)
+            for file_path, anchor in group_anchors(group_files).items():
+                groups[file_path] = (page, anchor)
+        return groups
+
+    def split_pages(self, page: str, md_content: str) -> list[tuple[str, str]]:
+        """
+        Split a page with a large code section into a page per stage or job,
+        when enabled. Returns (src_uri, Markdown or page path) pairs.
+        """
+        threshold = self.config.split_threshold
+        if threshold <= 0:
+            return [(page, md_content)]
+        if self.pages is None:
+            return split_page(md_content, page, threshold)
+
+        # A page has at least as many characters as lines, so smaller pages
+        # are not read from disk
+        if os.path.getsize(md_content) < threshold:
+            return [(page, md_content)]
+        pages = split_page(self.pages.read(md_content), page, threshold)
+        if len(pages) == 1:
+            return [(page, md_content)]
+        return [
+            (src_uri, self.pages.write(f"split/{src_uri}", markdown))
+            for src_uri, markdown in pages
+        ]
+
+    def convert_pipelines(self, items: list[tuple[str, str]]) -> list[str | None]:
+        """
+        Convert (file_path, content) pairs to Markdown, using the on-disk cache
+        when enabled. Files missing from the cache are converted in parallel.
+        The parsed documents are handed to the embedder.
+        """
+        documents: list[PipelineDocument] = []
+        if self.cache is None:
+            results = convert_pipeline_contents(
+                items,
+                self.pool or self.config.workers,
+                self.report,
+                self.metadata,
+                documents,
+            )
+            self.share_documents(documents)
+            return results
+
+        cache = self.cache
+        keys = [cache.key(file_path, content) for file_path, content in items]
+        results = [cache.get(key) for key in keys]
+        for i, md_content in enumerate(results):
+            if md_content is None:
+                continue
+            metadata = cache.get_metadata(keys[i])
+            if metadata is None:
+                results[i] = None
+                continue
+            # Files with the same name and content share a cache entry
+            file_path, _ = items[i]
+            self.metadata[file_path] = {**metadata, "path": file_path}
+        misses = [i for i, md_content in enumerate(results) if md_content is None]
+        converted = convert_pipeline_contents(
+            [items[i] for i in misses],
+            self.pool or self.config.workers,
+            self.report,
+            self.metadata,
+            documents,
+        )
+        for i, md_content in zip(misses, converted, strict=True):
+            results[i] = md_content
+            if md_content is not None:
+                file_path, _ = items[i]
+                cache.set(keys[i], md_content, self.metadata.get(file_path))
+        self.share_documents(documents)
+        return results
+
+    def share_documents(self, documents: list[PipelineDocument]) -> None:
+        """
+        Let the embedder use the documents parsed by the build, so a converted
+        file is parsed once per build however it is used. When pages are
+        written to disk, only the documents of files embedded by previous
+        builds are kept, so memory stays bounded.
+        """
+        for document in documents:
+            if self.pages is None or (
+                normalize_path(document.path) in self.embedder.files
+            ):
+                self.embedder.add_document(document)
+
+    def on_files(self, files: Files, /, *, config: MkDocsConfig) -> Files:
+        log.debug(f"mkdocs-azure-pipelines: Output dir: {self.config.output_dir}")
+
+        def add_file(file_path: str, md_content: str | None) -> File | None:
+            md_file_path = generated_page_path(self.config.output_dir, file_path)
+            if not md_content:
+                log.debug(
+                    "mkdocs-azure-pipelines: No content generated for file: "
+                    f"{file_path}"
                 )
+                return None
+            new_md_files = []
+            for src_uri, page_content in self.split_pages(md_file_path, md_content):
+                if self.pages is not None:
+                    # Read by mkdocs when the page is rendered
+                    new_md_file = File.generated(
+                        config=config, src_uri=src_uri, abs_src_path=page_content
+                    )
+                    page_paths.add(page_content)
+                else:
+                    new_md_file = File.generated(
+                        config=config, src_uri=src_uri, content=page_content
+                    )
                 files.append(new_md_file)
-                log.debug(
-                    f"mkdocs-azure-pipelines: New md file generated: {md_file_path}"
+                new_md_files.append(new_md_file)
+                self.generated_pages[src_uri] = file_path
+                log.debug(f"mkdocs-azure-pipelines: New md file generated: {src_uri}")
+            return new_md_files[0]
+
+        def add_group(src_uri: str, members: list[tuple[str, str, str]]) -> File:
+            directory = os.path.dirname(os.path.normpath(members[0][0]))
+            sections = []
+            for _, anchor, md_content in members:
+                if self.pages is not None:
+                    page_paths.add(md_content)
+                    md_content = self.pages.read(md_content)
+                sections.append((anchor, md_content))
+            content = render_group(directory, sections)
+            if self.pages is not None:
+                page_path = self.pages.write(f"grouped/{src_uri}", content)
+                page_paths.add(page_path)
+                new_md_file = File.generated(
+                    config=config, src_uri=src_uri, abs_src_path=page_path
                 )
             else:
-                log.debug(
-                    f"mkdocs-azure-pipelines: No content generated for file: "
-                    f"{file_path}"
+                new_md_file = File.generated(
+                    config=config, src_uri=src_uri, content=content
                 )
+            files.append(new_md_file)
+            self.generated_pages[src_uri] = directory
+            log.debug(
+                f"mkdocs-azure-pipelines: New group page generated: {src_uri} "
+                f"with {len(members)} files"
+            )
+            return new_md_file
 
-        # Get all files to be processed using cached result
-        all_files = get_all_files(
-            tuple(self.config.input_files or ()), tuple(self.config.input_dirs or ())
+        page_paths: set[str] = set()
+
+        self.generated_pages = {}
+        self.changed_files = set()
+        self.embedder.start_build()
+        previous_graph = self.graph.copy()
+        all_files = self.get_files()
+
+        # Convert the files that changed, then add the pages in a stable order
+        if self.config.git_changes and not self.incremental.states:
+            self.restore_unchanged_files(all_files)
+        md_contents = self.convert_files(all_files)
+        groups = self.group_files(all_files, md_contents)
+        # Links to files which moved to or from a group page are updated
+        self.changed_files.update(
+            normalize_path(file_path)
+            for file_path in groups.keys() | self.groups.keys()
+            if groups.get(file_path) != self.groups.get(file_path)
+        )
+        self.groups = groups
+        self.group_pages = {src_uri for src_uri, _ in groups.values()}
+        if self.config.template_graph:
+            self.graph.prune(all_files)
+            md_contents = self.link_pages(all_files, md_contents, previous_graph)
+            if self.config.template_graph_export:
+                export_path = self.config_path(
+                    self.config.template_graph_export, config
+                )
+                self.graph.write(export_path)
+                log.debug(f"mkdocs-azure-pipelines: Graph written to {export_path}")
+        pages: dict[str, tuple[str, str]] = {}
+        grouped: dict[str, list[tuple[str, str, str]]] = {}
+        for file_path, md_content in zip(all_files, md_contents, strict=True):
+            if md_content and file_path in groups:
+                src_uri, anchor = groups[file_path]
+                grouped.setdefault(src_uri, []).append((file_path, anchor, md_content))
+                continue
+            new_md_file = add_file(file_path, md_content)
+            if new_md_file is not None:
+                pages[file_path] = (new_md_file.src_uri, new_md_file.url)
+        for src_uri, members in grouped.items():
+            new_md_file = add_group(src_uri, members)
+            for file_path, anchor, _ in members:
+                pages[file_path] = (
+                    f"{new_md_file.src_uri}#{anchor}",
+                    f"{new_md_file.url}#{anchor}",
+                )
+        records = []
+        for file_path in all_files:
+            if file_path in pages and file_path in self.metadata:
+                page, url = pages[file_path]
+                records.append({**self.metadata[file_path], "page": page, "url": url})
+        self.metadata = {
+            record["path"]: self.metadata[record["path"]] for record in records
+        }
+        if self.config.index:
+            index_path = self.config_path(self.config.index, config)
+            write_index(index_path, records)
+            log.debug(f"mkdocs-azure-pipelines: Index written to {index_path}")
+        if self.config.catalog:
+            files.append(
+                File.generated(
+                    config=config,
+                    src_uri=self.config.catalog,
+                    content=render_catalog(records, self.config.catalog),
+                )
+            )
+        self.incremental.prune(all_files)
+        if self.pages is not None:
+            page_paths.update(
+                state.markdown
+                for state in self.incremental.states.values()
+                if state.markdown
+            )
+            self.pages.prune(page_paths)
+        log.debug(
+            f"mkdocs-azure-pipelines: Converted {self.incremental.converted} files, "
+            f"reused {self.incremental.reused} unchanged files"
         )
+        self.non_pipeline_files.intersection_update(all_files)
+        if self.non_pipeline_files:
+            log.info(
+                f"mkdocs-azure-pipelines: Skipped {len(self.non_pipeline_files)} "
+                "files that are not Azure Pipelines"
+            )
 
-        # Process each file in the list
-        for file in all_files:
-            process_and_add_file(file)
+        if self.config.git_changes:
+            self.save_manifest(all_files)
+
+        if self.cache is not None:
+            removed = self.cache.evict()
+            log.info(
+                f"mkdocs-azure-pipelines: Cache hits: {self.cache.hits}, "
+                f"misses: {self.cache.misses}, evicted: {removed}"
+            )
+
+        if self.report is not None:
+            self.report.counters["converted"] += self.incremental.converted
+            self.report.counters["reused"] += self.incremental.reused
+            self.report.counters["skipped"] += len(self.non_pipeline_files)
+            if self.cache is not None:
+                self.report.counters["cache_hits"] += self.cache.hits
+                self.report.counters["cache_misses"] += self.cache.misses
 
         return files
 
+    def start_render(self, page: Page) -> None:
+        if self.report is not None and page.file.src_uri in self.generated_pages:
+            self.render_starts[page.file.src_uri] = perf_counter()
+
+    def stop_render(self, page: Page) -> None:
+        start = self.render_starts.pop(page.file.src_uri, None)
+        if self.report is not None and start is not None:
+            file_path = self.generated_pages[page.file.src_uri]
+            self.report.add("render", perf_counter() - start, file_path)
+
+    def embed_pipelines(
+        self, markdown: str, /, *, page: Page, config: MkDocsConfig, files: Files
+    ) -> str | None:
+        """
+        Replace the embed markers in hand-written pages, watching the embedded
+        files when serving so the pages are rendered again when they change.
+        """
+        if page.file.src_uri in self.generated_pages:
+            return markdown
+        markdown = self.embedder.embed(markdown, page.file.src_uri)
+        if self.server is not None:
+            self.watch_embeds(self.server)
+        return markdown
+
+    def highlight_code(
+        self, markdown: str, /, *, page: Page, config: MkDocsConfig, files: Files
+    ) -> str | None:
+        """
+        Replace the code blocks of generated pages with cached highlighted HTML.
+        """
+        if self.highlighter is None or page.file.src_uri not in self.generated_pages:
+            return markdown
+        start = perf_counter()
+        markdown = self.highlighter.highlight(markdown)
+        if self.report is not None:
+            file_path = self.generated_pages[page.file.src_uri]
+            self.report.add("highlight", perf_counter() - start, file_path)
+        return markdown
+
+    # Pages are rendered in two steps, first the markdown of all pages and then
+    # the templates. The priorities make the timing wrap only the rendering.
+    @event_priority(-100)
+    def start_render_markdown(
+        self, markdown: str, /, *, page: Page, config: MkDocsConfig, files: Files
+    ) -> str | None:
+        self.start_render(page)
+        return markdown
+
+    on_page_markdown = CombinedEvent(
+        embed_pipelines, highlight_code, start_render_markdown
+    )
+
+    @event_priority(100)
+    def on_page_content(
+        self, html: str, /, *, page: Page, config: MkDocsConfig, files: Files
+    ) -> str | None:
+        self.stop_render(page)
+        return html
+
+    @event_priority(-100)
+    def start_render_context(
+        self,
+        context: TemplateContext,
+        /,
+        *,
+        page: Page,
+        config: MkDocsConfig,
+        nav: Navigation,
+    ) -> TemplateContext | None:
+        self.start_render(page)
+        return context
+
+    # The search plugins index the page content in their page context event,
+    # so the summary is swapped in before and the full content back after
+    @event_priority(50)
+    def summarize_for_search(
+        self,
+        context: TemplateContext,
+        /,
+        *,
+        page: Page,
+        config: MkDocsConfig,
+        nav: Navigation,
+    ) -> TemplateContext | None:
+        file_path = self.generated_pages.get(page.file.src_uri)
+        if not self.config.search_summary or file_path is None or not page.content:
+            return context
+        if page.file.src_uri in self.group_pages:
+            # Only small files are grouped, their pages are indexed in full
+            return context
+        parameters = [
+            parameter["name"]
+            for parameter in self.metadata.get(file_path, {}).get("parameters", [])
+        ]
+        self.page_contents[page.file.src_uri] = page.content
+        page.content = search_summary(page.content, parameters)
+        return context
+
+    @event_priority(-50)
+    def restore_after_search(
+        self,
+        context: TemplateContext,
+        /,
+        *,
+        page: Page,
+        config: MkDocsConfig,
+        nav: Navigation,
+    ) -> TemplateContext | None:
+        content = self.page_contents.pop(page.file.src_uri, None)
+        if content is not None:
+            page.content = content
+        return context
+
+    on_page_context = CombinedEvent(
+        summarize_for_search, restore_after_search, start_render_context
+    )
+
+    @event_priority(100)
+    def on_post_page(
+        self, output: str, /, *, page: Page, config: MkDocsConfig
+    ) -> str | None:
+        self.stop_render(page)
+        return output
+
+    def on_post_build(self, *, config: MkDocsConfig) -> None:
+        if self.highlighter is not None:
+            cache = self.highlighter.cache
+            removed = cache.evict()
+            log.info(
+                f"mkdocs-azure-pipelines: Highlight cache hits: {cache.hits}, "
+                f"misses: {cache.misses}, evicted: {removed}"
+            )
+            if self.report is not None:
+                self.report.counters["highlight_hits"] += cache.hits
+                self.report.counters["highlight_misses"] += cache.misses
+        if self.report is None:
+            return
+        for line in self.report.summary():
+            log.info(f"mkdocs-azure-pipelines: {line}")
+        if self.config.timings_report:
+            report_path = Path(self.config.timings_report)
+            if not report_path.is_absolute() and config.config_file_path:
+                report_path = Path(config.config_file_path).parent / report_path
+            self.report.write_json(report_path)
+            log.info(f"mkdocs-azure-pipelines: Timings written to {report_path}")
+
+    def on_startup(
+        self, *, command: Literal["build", "gh-deploy", "serve"], dirty: bool
+    ) -> None:
+        # Defining it makes mkdocs keep the plugin instance, and the state of
+        # the previous build, between the builds of mkdocs serve
+        pass
+
+    def on_shutdown(self) -> None:
+        if self.pages is not None:
+            self.pages.clear()
+
     def on_serve(
         self, server: LiveReloadServer, /, *, config: MkDocsConfig, builder: Callable
     ) -> LiveReloadServer:
-        # Get the list of files to watch from get_all_files
-        all_files = get_all_files(
-            tuple(self.config.input_files or ()), tuple(self.config.input_dirs or ())
+        # Watch each input directory once, so new files are picked up as well
+        input_dirs = list(
+            dict.fromkeys(os.path.abspath(d) for d in self.config.input_dirs or ())
         )
-        # Watch each file returned from get_all_files
-        for file_path in all_files:
-            server.watch(file_path)  # Watch the file directly
+        for input_dir in input_dirs:
+            if any(is_subpath(input_dir, other) for other in input_dirs):
+                continue
+            watch_directory(server, input_dir, self.config.include, self.config.exclude)
+
+        # Watch the input files outside of the input directories directly
+        for file_path in self.config.input_files or ():
+            if any(is_subpath(file_path, input_dir) for input_dir in input_dirs):
+                continue
+            server.watch(file_path)
             log.debug(f"mkdocs-azure-pipelines: Adding files to watch: {file_path}")
 
+        # Embedded files are only known once the pages are rendered, files
+        # embedded by later builds are watched as they are found
+        self.server = server
+        self.watch_embeds(server)
+
         return server
+
+    def watch_embeds(self, server: LiveReloadServer) -> None:
+        for file_path in self.embedder.files - self.watched_embeds:
+            # Missing files can't be watched, they are tried again next build
+            if not os.path.isfile(file_path):
+                continue
+            server.watch(file_path)
+            self.watched_embeds.add(file_path)
+            log.debug(f"mkdocs-azure-pipelines: Adding embed to watch: {file_path}")
@@ -0,0 +1,92 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+
+# Reads mostly wait on the filesystem, a few threads are enough to keep the
+# requests of a high latency mount in flight.
+MAX_READ_THREADS = 8
+
+
+class Prefetcher:
+    """
+    Reads files ahead of their use on a small thread pool, so that reading the
+    next files overlaps with converting the current one. At most read_ahead
+    files are read ahead, and only while their size fits in memory_budget
+    bytes. A file is always read ahead when no other one is, however large.
+
+    Files must be read in the order they were started with. Reading a file
+    which wasn't started reads it directly.
+    """
+
+    def __init__(
+        self, read: Callable[[str], str], read_ahead: int, memory_budget: int
+    ) -> None:
+        self.read_function = read
+        self.read_ahead = max(1, read_ahead)
+        self.memory_budget = memory_budget
+        self.executor = ThreadPoolExecutor(
+            max_workers=min(self.read_ahead, MAX_READ_THREADS),
+            thread_name_prefix="mkdocs-azure-pipelines-read",
+        )
+        self.file_paths: list[str] = []
+        self.next = 0
+        # File path -> (future content, reserved bytes), in reading order
+        self.pending: dict[str, tuple[Future[str], int]] = {}
+        self.reserved = 0
+
+    def __enter__(self) -> "Prefetcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def start(self, file_paths: list[str]) -> None:
+        """
+        Start reading the files which will be read next, in this order.
+        """
+        self.file_paths = file_paths
+        self.next = 0
+        self.fill()
+
+    def fill(self) -> None:
+        while self.next < len(self.file_paths) and len(self.pending) < self.read_ahead:
+            file_path = self.file_paths[self.next]
+            try:
+                size = os.stat(file_path).st_size
+            except OSError:
+                # Reported by the read instead
+                size = 0
+            if self.pending and self.reserved + size > self.memory_budget:
+                return
+            self.next += 1
+            if file_path in self.pending:
+                continue
+            future = self.executor.submit(self.read_function, file_path)
+            self.pending[file_path] = (future, size)
+            self.reserved += size
+
+    def read(self, file_path: str) -> str:
+        """
+        Return the content of a file, waiting for it if it is still being read.
+        Errors of the read are raised here.
+        """
+        if file_path not in self.pending:
+            return self.read_function(file_path)
+        future, size = self.pending.pop(file_path)
+        self.reserved -= size
+        self.fill()
+        return future.result()
+
+    def close(self) -> None:
+        """
+        Stop reading ahead, dropping the files which were not read yet.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
+        self.reserved = 0
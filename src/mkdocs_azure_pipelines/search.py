@@ -0,0 +1,41 @@
+import html
+import re
+from collections.abc import Sequence
+
+# The level 2 headings of a rendered page, which start its sections.
+HEADING_PATTERN = re.compile(r"<h2\b[^>]*>(.*?)</h2>", flags=re.DOTALL)
+# Permalinks added to headings by the toc extension.
+HEADERLINK_PATTERN = re.compile(
+    r"<a\b[^>]*\bheaderlink\b[^>]*>.*?</a>", flags=re.DOTALL
+)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+# Sections of a generated page which are indexed as they are.
+SEARCH_SECTIONS = ["about", "outputs"]
+
+
+def heading_text(heading: str) -> str:
+    return TAG_PATTERN.sub("", HEADERLINK_PATTERN.sub("", heading)).strip()
+
+
+def search_summary(content: str, parameters: Sequence[str]) -> str:
+    """
+    Reduce the HTML of a generated page to what is worth searching for: the
+    title, the About and Outputs sections and the names of the parameters.
+    The code of the pipeline is left out, so the search index grows with the
+    number of pipelines instead of with their lines of YAML.
+    """
+    headings = list(HEADING_PATTERN.finditer(content))
+    if not headings:
+        return content
+    # The title, and the navigation of split pages
+    parts = [content[: headings[0].start()]]
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(content)
+        name = heading_text(heading.group(1)).lower()
+        if name in SEARCH_SECTIONS:
+            parts.append(content[heading.start() : end])
+        elif name == "parameters" and parameters:
+            names = " ".join(html.escape(parameter) for parameter in parameters)
+            parts.append(f"{heading.group(0)}\n<p>{names}</p>\n")
+    return "".join(parts)
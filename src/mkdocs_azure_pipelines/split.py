@@ -0,0 +1,136 @@
+import posixpath
+import re
+
+CODE_START = "\n## Code\n\n```yaml\n"
+CODE_END = "\n```\n"
+
+# The key of a code section which can be split, on the first line of the code.
+SPLIT_KEY_PATTERN = re.compile(r"(stages|jobs)[ \t]*:[ \t]*(?:#.*)?")
+# Keys naming a stage or job, or the template it comes from.
+NAME_PATTERN = re.compile(
+    r"(?:-[ \t]+)?(stage|job|deployment|template)[ \t]*:[ \t]*"
+    r"['\"]?(?P<name>[^'\"#]+?)['\"]?[ \t]*(?:#.*)?"
+)
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def item_name(lines: list[str], indent: int) -> str | None:
+    """
+    Find the name of a list item from the keys at the top level of the item.
+    """
+    for i, line in enumerate(lines):
+        stripped = line.lstrip(" ")
+        if i and len(line) - len(stripped) != indent + 2:
+            continue
+        match = NAME_PATTERN.fullmatch(stripped)
+        if match:
+            return match.group("name")
+    return None
+
+
+def split_items(code: str) -> tuple[str, list[tuple[str, str]]] | None:
+    """
+    Split the YAML of a stages or jobs section into its list items, using the
+    indentation of the lines only. Returns the key and (name, YAML) pairs, or
+    None if the code isn't a list of stages or jobs.
+    """
+    lines = code.split("\n")
+    key_match = SPLIT_KEY_PATTERN.fullmatch(lines[0])
+    if not key_match:
+        return None
+
+    # Items start with a "- " at the indentation of the first item, lines in
+    # front of the first item, like comments, belong to it
+    indent = None
+    starts = []
+    for i, line in enumerate(lines[1:], start=1):
+        stripped = line.lstrip(" ")
+        if not stripped.startswith("-") or stripped[1:2] not in ("", " "):
+            continue
+        if indent is None:
+            indent = len(line) - len(stripped)
+        if len(line) - len(stripped) == indent:
+            starts.append(i)
+    if indent is None or len(starts) < 2:
+        return None
+
+    key = key_match.group(1)
+    starts[0] = 1
+    ends = [*starts[1:], len(lines)]
+    items = []
+    for number, (start, end) in enumerate(zip(starts, ends, strict=True), start=1):
+        item_lines = lines[start:end]
+        # Skip the comments in front of the first item
+        first = next(
+            i for i, line in enumerate(item_lines) if line.lstrip(" ").startswith("-")
+        )
+        name = item_name(item_lines[first:], indent) or f"{key} {number}"
+        items.append((name, "\n".join(item_lines).rstrip()))
+    return key, items
+
+
+def split_page(markdown: str, page: str, threshold: int) -> list[tuple[str, str]]:
+    """
+    Split a generated page whose code section has more than threshold lines
+    into an index page and one page per stage or job, linked to each other.
+    The code section of the index page is replaced by links to the new pages,
+    which are placed in a folder named after the page.
+    Returns (src_uri, markdown) pairs, starting with the page itself.
+    """
+    pages = [(page, markdown)]
+    if threshold <= 0 or len(markdown) < threshold:
+        return pages
+    start = markdown.find(CODE_START)
+    if start == -1:
+        return pages
+    code_start = start + len(CODE_START)
+    code_end = markdown.find(CODE_END, code_start)
+    if code_end == -1:
+        return pages
+    code = markdown[code_start:code_end]
+    if code.count("\n") + 1 <= threshold:
+        return pages
+    split = split_items(code)
+    if split is None:
+        return pages
+    key, items = split
+
+    title = markdown.partition("\n")[0].removeprefix("# ")
+    folder = posixpath.splitext(page)[0]
+    page_name = posixpath.basename(page)
+    slugs: list[str] = []
+    for name, _ in items:
+        slug = slugify(name) or key
+        while slug in slugs:
+            slug = f"{slug}-{len(slugs)}"
+        slugs.append(slug)
+
+    links = [
+        f"- [{name}]({posixpath.basename(folder)}/{slug}.md)"
+        for (name, _), slug in zip(items, slugs, strict=True)
+    ]
+    index = (
+        markdown[:start]
+        + f"\n## {key.capitalize()}\n\n"
+        + "\n".join(links)
+        + "\n"
+        + markdown[code_end + len(CODE_END) :]
+    )
+    pages = [(page, index)]
+    for i, ((name, item), slug) in enumerate(zip(items, slugs, strict=True)):
+        navigation = [f"[Back to {title}](../{page_name})"]
+        if i > 0:
+            navigation.append(f"[Previous: {items[i - 1][0]}]({slugs[i - 1]}.md)")
+        if i + 1 < len(items):
+            navigation.append(f"[Next: {items[i + 1][0]}]({slugs[i + 1]}.md)")
+        pages.append(
+            (
+                f"{folder}/{slug}.md",
+                f"# {title}: {name}\n\n{' | '.join(navigation)}\n\n"
+                f"## Code\n\n```yaml\n{key}:\n{item}\n```\n\n",
+            )
+        )
+    return pages
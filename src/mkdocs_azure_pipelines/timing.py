@@ -0,0 +1,106 @@
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+# Phases of a build in the order they happen, used to order the summary.
+PHASES = ["discovery", "read", "tags", "parse", "dump", "highlight", "render"]
+
+
+class PhaseTimer:
+    """
+    Records the time spent in each phase of converting a single file.
+    Each call to lap attributes the time since the previous lap, or since the
+    timer was created, to the given phase.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.last = perf_counter()
+
+    def lap(self, phase: str) -> None:
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+
+class NullTimer(PhaseTimer):
+    """
+    Timer used when instrumentation is disabled, which records nothing.
+    """
+
+    def __init__(self) -> None:
+        self.phases = {}
+
+    def lap(self, phase: str) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class BuildReport:
+    """
+    Collects per-file and per-phase timings and counters of a build.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = defaultdict(float)
+        self.files: dict[str, dict[str, float]] = defaultdict(dict)
+        self.counters: Counter[str] = Counter()
+
+    def add(self, phase: str, seconds: float, file_path: str | None = None) -> None:
+        """
+        Add time spent in a phase, for a single file if file_path is given.
+        """
+        self.phases[phase] += seconds
+        if file_path is not None:
+            file_phases = self.files[file_path]
+            file_phases[phase] = file_phases.get(phase, 0.0) + seconds
+
+    def add_file(self, file_path: str, phases: dict[str, float]) -> None:
+        """
+        Add the phases recorded by a PhaseTimer for a file.
+        """
+        for phase, seconds in phases.items():
+            self.add(phase, seconds, file_path)
+
+    def slowest_files(self, count: int) -> list[tuple[str, float]]:
+        totals = [(path, sum(phases.values())) for path, phases in self.files.items()]
+        return sorted(totals, key=lambda item: item[1], reverse=True)[:count]
+
+    def summary(self, slowest: int = 10) -> list[str]:
+        """
+        Return the lines of a human readable summary of the build.
+        """
+        phases = sorted(
+            self.phases.items(),
+            key=lambda item: PHASES.index(item[0]) if item[0] in PHASES else 99,
+        )
+        lines = [
+            "Time per phase: "
+            + ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in phases)
+        ]
+        if self.counters:
+            lines.append(
+                "Counters: "
+                + ", ".join(f"{name} {value}" for name, value in self.counters.items())
+            )
+        if self.files:
+            lines.append(f"Slowest {slowest} files:")
+            for path, seconds in self.slowest_files(slowest):
+                lines.append(f"  {seconds:.3f}s {path}")
+        return lines
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "phases": dict(self.phases),
+            "counters": dict(self.counters),
+            "files": {path: dict(phases) for path, phases in self.files.items()},
+        }
+
+    def write_json(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
@@ -0,0 +1,130 @@
+import logging
+import os
+from collections.abc import Callable, Sequence
+
+from mkdocs.livereload import LiveReloadServer
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+
+from .discovery import DEFAULT_EXCLUDE, DEFAULT_INCLUDE, matches
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+# Events which change a file, opening or reading a file doesn't.
+CHANGE_EVENTS = {"created", "modified", "deleted", "moved", "closed"}
+
+
+class PipelineEventHandler(FileSystemEventHandler):
+    """
+    Handles the events of a watched input directory, calling on_change only
+    for changes to files matching the include patterns and not excluded, like
+    when the directory is listed by discovery. Directories created directly in
+    the input directory, and not excluded, are passed to on_directory.
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        on_change: Callable[[], None],
+        include: Sequence[str] = DEFAULT_INCLUDE,
+        exclude: Sequence[str] = DEFAULT_EXCLUDE,
+        on_directory: Callable[[str], None] | None = None,
+    ) -> None:
+        super().__init__()
+        self.input_dir = os.path.abspath(input_dir)
+        self.on_change = on_change
+        self.include = include
+        self.exclude = exclude
+        self.on_directory = on_directory
+
+    def is_relevant(
+        self, path: str | bytes, is_directory: bool, event_type: str
+    ) -> bool:
+        path = os.fsdecode(path)
+        relative_path = os.path.relpath(os.path.abspath(path), self.input_dir)
+        if relative_path.startswith(os.pardir):
+            return False
+        parts = relative_path.split(os.sep)
+        for i, part in enumerate(parts):
+            if matches(part, "/".join(parts[: i + 1]), self.exclude):
+                return False
+        if is_directory:
+            # Files in a removed or renamed directory don't get their own events
+            return event_type in ("deleted", "moved")
+        return matches(parts[-1], "/".join(parts), self.include)
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type not in CHANGE_EVENTS:
+            return
+        if event.is_directory and event.event_type in ("created", "moved"):
+            path = os.fsdecode(getattr(event, "dest_path", "") or event.src_path)
+            if self.is_top_level_directory(path):
+                log.debug(f"mkdocs-azure-pipelines: {event}")
+                if self.on_directory is not None:
+                    self.on_directory(path)
+                # Files may have been added before the directory was watched
+                self.on_change()
+                return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(
+            self.is_relevant(path, event.is_directory, event.event_type)
+            for path in paths
+            if path
+        ):
+            log.debug(f"mkdocs-azure-pipelines: {event}")
+            self.on_change()
+
+    def is_top_level_directory(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        name = os.path.basename(path)
+        return os.path.dirname(path) == self.input_dir and not matches(
+            name, name, self.exclude
+        )
+
+
+def request_rebuild(server: LiveReloadServer) -> None:
+    """
+    Make the server rebuild the site, like for changes to a path it watches.
+    This uses the same private attributes of LiveReloadServer as its own
+    watch callback, which exist in mkdocs 1.5 and 1.6, the versions allowed
+    by the dependency on mkdocs~=1.6.1. Check them again when that changes.
+    """
+    with server._rebuild_cond:
+        server._want_rebuild = True
+        server._rebuild_cond.notify_all()
+
+
+def watch_directory(
+    server: LiveReloadServer,
+    input_dir: str,
+    include: Sequence[str] = DEFAULT_INCLUDE,
+    exclude: Sequence[str] = DEFAULT_EXCLUDE,
+) -> None:
+    """
+    Watch an input directory, including sub directories, only triggering a
+    rebuild for changes to pipeline files. The directory itself is watched
+    without its sub directories, and each sub directory which isn't excluded
+    is watched with its own sub directories, so the observer never lists or
+    registers excluded trees like node_modules at the top of the directory.
+    """
+    if not hasattr(server, "_rebuild_cond") or not hasattr(server, "_want_rebuild"):
+        # Without a way to filter the events, rebuild on any change
+        server.watch(input_dir)
+        return
+    input_dir = os.path.abspath(input_dir)
+
+    def watch_sub_directory(path: str) -> None:
+        server.observer.schedule(handler, path, recursive=True)
+        log.debug(f"mkdocs-azure-pipelines: Watching directory: {path}")
+
+    handler = PipelineEventHandler(
+        input_dir,
+        lambda: request_rebuild(server),
+        include,
+        exclude,
+        on_directory=watch_sub_directory,
+    )
+    server.observer.schedule(handler, input_dir, recursive=False)
+    log.debug(f"mkdocs-azure-pipelines: Watching directory: {input_dir}")
+    for entry in os.scandir(input_dir):
+        if entry.is_dir() and not matches(entry.name, entry.name, exclude):
+            watch_sub_directory(entry.path)
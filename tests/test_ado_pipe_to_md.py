@@ -1,12 +1,25 @@
+import hashlib
 import os
+from unittest.mock import patch
 
+from mkdocs_azure_pipelines import ado_pipe_to_md
 from mkdocs_azure_pipelines.ado_pipe_to_md import (
     END_TAG_PATTERN,
     START_TAG_PATTERN,
+    dump_yaml_code,
     extract_section_content,
     extract_yaml_section,
     find_tags,
+    get_yaml_instance,
+    is_pipeline_content,
+    line_number,
+    line_offsets,
+    load_yaml,
+    process_pipeline_content,
     process_pipeline_file,
+    scan_tags,
+    slice_yaml_code,
+    validate_tags,
 )
 
 
@@ -401,3 +414,220 @@ def test_non_standard_tag_format(tmp_path):
     file.write_text(content)
     # Since allowed tags are lowercase, this should result in a tag mismatch error.
     assert process_pipeline_file(str(file)) is None
+
+
+def test_dump_yaml_code_from_single_parse():
+    """Test that every section can be dumped from one parsed document."""
+    content = """pool:
+  vmImage: "ubuntu-latest"
+steps:
+  - script: echo "Hello" # Say hello
+"""
+    yaml = get_yaml_instance()
+    data = load_yaml(content, yaml)
+    assert dump_yaml_code(data, ["pool"], yaml) == (
+        "pool",
+        'pool:\n  vmImage: "ubuntu-latest"',
+    )
+    assert dump_yaml_code(data, ["steps", "jobs", "stages"], yaml) == (
+        "steps",
+        'steps:\n  - script: echo "Hello" # Say hello',
+    )
+    assert dump_yaml_code(data, ["trigger"], yaml) is None
+
+
+def test_slice_yaml_code():
+    """Test that sections are copied from the source with the line of the key."""
+    content = """# Build
+pool:
+  vmImage: "ubuntu-latest"  # Quoted
+
+steps:
+  - script: echo
+"""
+    data = load_yaml(content, get_yaml_instance())
+    offsets = line_offsets(content)
+    assert slice_yaml_code(content, data, ["pool"], offsets) == (
+        "pool",
+        2,
+        'pool:\n  vmImage: "ubuntu-latest"  # Quoted',
+    )
+    assert slice_yaml_code(content, data, ["jobs", "steps"], offsets) == (
+        "steps",
+        5,
+        "steps:\n  - script: echo",
+    )
+    assert slice_yaml_code(content, data, ["trigger"], offsets) is None
+
+
+def test_slice_yaml_code_skips_byte_order_mark():
+    """Test that the byte order mark of a UTF-8 file is not copied."""
+    content = "\ufeffsteps:\n  - script: echo\n"
+    data = load_yaml(content, get_yaml_instance())
+    assert slice_yaml_code(content, data, ["steps"], line_offsets(content)) == (
+        "steps",
+        1,
+        "steps:\n  - script: echo",
+    )
+
+
+def test_process_pipeline_file_parses_yaml_once(tmp_path):
+    """Test that a pipeline file is only parsed once for all YAML sections."""
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    input_file = os.path.join(
+        test_dir,
+        "resources/folder_with_pipelines/folder_in_folder_with_pipelines/full-pipeline.yml",
+    )
+    with patch.object(
+        ado_pipe_to_md, "load_yaml", wraps=ado_pipe_to_md.load_yaml
+    ) as load:
+        result = process_pipeline_file(input_file)
+    assert load.call_count == 1
+    assert result is not None and "## Code" in result
+
+
+def test_scan_tags():
+    content = "#:::title-start:::\n# Title\n#:::title-end:::\n#:::#:::about-start:::"
+    tags = scan_tags(content)
+    assert [(tag.name, tag.kind) for tag in tags] == [
+        ("title", "start"),
+        ("title", "end"),
+        ("about", "start"),
+    ]
+    assert content[tags[1].start : tags[1].end] == "#:::title-end:::"
+    assert scan_tags("No tags here") == []
+
+
+def test_validate_tags_reports_lines():
+    content = """#:::title-start:::
+#:::about-start:::
+#:::about-end:::
+#:::title-end:::
+#:::outputs-end:::
+#:::titel-start:::
+"""
+    errors = validate_tags(scan_tags(content))
+    assert [(line_number(content, offset), message) for offset, message in errors] == [
+        (2, "Start tag 'about' found inside section 'title'."),
+        (4, "End tag 'title' without a start tag."),
+        (5, "End tag 'outputs' without a start tag."),
+        (6, "Misspelled start tag 'titel'."),
+    ]
+    assert validate_tags(scan_tags("#:::title-start:::\n#:::title-end:::")) == []
+
+
+def test_process_pipeline_file_rejects_interleaved_tags(tmp_path):
+    content = """#:::title-start:::
+# Title
+#:::about-start:::
+# About
+#:::title-end:::
+#:::about-end:::
+"""
+    file = tmp_path / "pipeline.yml"
+    file.write_text(content)
+    assert process_pipeline_file(str(file)) is None
+
+
+def test_process_pipeline_file_without_tags_skips_tag_scan(tmp_path):
+    file = tmp_path / "no_tags.yml"
+    file.write_text("steps:\n  - script: echo")
+    with patch.object(ado_pipe_to_md, "scan_tags") as scan:
+        result = process_pipeline_file(str(file))
+    scan.assert_not_called()
+    assert result is not None and result.startswith("# No tags\n\n## Code")
+
+
+def test_is_pipeline_content():
+    assert is_pipeline_content("steps:\n  - script: echo")
+    assert is_pipeline_content("name: build\nextends:\n  template: base.yml")
+    assert is_pipeline_content('"jobs": []')
+    assert is_pipeline_content("\ufeffsteps:\n  - script: echo")
+    assert is_pipeline_content("#:::title-start:::\n# Title\n#:::title-end:::")
+    # docker-compose, helm values and empty files are not pipelines
+    assert not is_pipeline_content("services:\n  web:\n    image: nginx")
+    assert not is_pipeline_content("replicaCount: 1\nimage:\n  pool: x\n")
+    assert not is_pipeline_content("")
+    # Only the start of the content is sniffed for keys
+    assert not is_pipeline_content("a: 1\n" * 10 + "steps: []", sniff_size=20)
+
+
+def test_extract_yaml_section_keeps_source_formatting():
+    """Test that sections are copied from the source instead of reformatted."""
+    content = """pool:   {vmImage: ubuntu-latest}   # Inline pool
+
+# Steps are not indented
+steps:
+- script: echo "Hello"
+  displayName:    Hello
+# - script: echo "Disabled"
+
+#:::example-start:::
+# steps: []
+#:::example-end:::
+"""
+    assert extract_yaml_section(content, ["pool"]) == (
+        "```yaml\npool:   {vmImage: ubuntu-latest}   # Inline pool\n```"
+    )
+    assert extract_yaml_section(content, ["steps"]) == (
+        '```yaml\nsteps:\n- script: echo "Hello"\n  displayName:    Hello\n```'
+    )
+
+
+def test_extract_yaml_section_falls_back_to_dump():
+    """Test that sections of flow style documents are dumped instead."""
+    content = "{pool: {vmImage: ubuntu-latest}, steps: [{script: echo}]}\n"
+    yaml = get_yaml_instance()
+    data = load_yaml(content, yaml)
+    assert slice_yaml_code(content, data, ["steps"], line_offsets(content)) is None
+    _, code = dump_yaml_code(data, ["steps"], yaml)  # pyright: ignore
+    assert extract_yaml_section(content, ["steps"]) == f"```yaml\n{code}\n```"
+
+
+def test_process_pipeline_file_slices_yaml_sections(tmp_path):
+    """Test that no section is dumped when all can be copied from the source."""
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    input_file = os.path.join(
+        test_dir,
+        "resources/folder_with_pipelines/folder_in_folder_with_pipelines/full-pipeline.yml",
+    )
+    with patch.object(
+        ado_pipe_to_md, "dump_yaml_code", wraps=ado_pipe_to_md.dump_yaml_code
+    ) as dump:
+        result = process_pipeline_file(input_file)
+    assert result is not None and "## Code" in result
+    dump.assert_not_called()
+
+
+def test_process_pipeline_content_metadata():
+    """Test that the metadata is filled from the same parse as the Markdown."""
+    content = """#:::title-start:::
+# Build
+#:::title-end:::
+trigger:
+  - main
+pool:
+  vmImage: "ubuntu-latest"
+parameters:
+  - name: python_version
+    type: string
+    default: "3.12"
+  - name: run_tests
+    type: boolean
+stages:
+  - stage: Build
+"""
+    metadata = {}
+    assert process_pipeline_content(content, "build.yml", metadata=metadata)
+    assert metadata == {
+        "path": "build.yml",
+        "title": "Build",
+        "kind": "stages",
+        "parameters": [
+            {"name": "python_version", "type": "string", "default": "3.12"},
+            {"name": "run_tests", "type": "boolean", "default": None},
+        ],
+        "pool": {"vmImage": "ubuntu-latest"},
+        "trigger": ["main"],
+        "hash": hashlib.sha256(content.encode()).hexdigest(),
+    }
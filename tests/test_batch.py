@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+from mkdocs_azure_pipelines import batch
+from mkdocs_azure_pipelines.batch import (
+    MIN_PARALLEL_FILES,
+    WorkerPool,
+    convert_pipeline_contents,
+    resolve_workers,
+)
+
+
+def make_items(count):
+    return [
+        (f"pipeline-{i}.yml", f"steps:\n  - script: echo {i}\n") for i in range(count)
+    ]
+
+
+def test_resolve_workers():
+    assert resolve_workers(3) == 3
+    assert resolve_workers(0) >= 1
+
+
+def test_convert_pipeline_contents_parallel_keeps_order():
+    items = make_items(MIN_PARALLEL_FILES * 2)
+    serial = convert_pipeline_contents(items, workers=1)
+    parallel = convert_pipeline_contents(items, workers=2)
+    assert parallel == serial
+    assert all(f"echo {i}" in md for i, md in enumerate(parallel))  # pyright: ignore
+
+
+def test_convert_pipeline_contents_serial_fallback_for_few_files():
+    items = make_items(MIN_PARALLEL_FILES - 1)
+    with patch.object(batch, "ProcessPoolExecutor") as executor:
+        results = convert_pipeline_contents(items, workers=4)
+    executor.assert_not_called()
+    assert len(results) == len(items)
+
+
+def test_worker_pool_is_shared_between_calls():
+    items = make_items(MIN_PARALLEL_FILES)
+    serial = convert_pipeline_contents(items, workers=1)
+    with patch.object(
+        batch, "ProcessPoolExecutor", wraps=batch.ProcessPoolExecutor
+    ) as executor:
+        with WorkerPool(2) as pool:
+            first = convert_pipeline_contents(items, pool)
+            second = convert_pipeline_contents(items, pool)
+            convert_pipeline_contents(items[:2], pool)
+        assert pool.executor is None
+    executor.assert_called_once()
+    assert executor.call_args.kwargs["max_workers"] == 2
+    # Workers are not forked from the threads of mkdocs serve
+    assert executor.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+    assert first == second == serial
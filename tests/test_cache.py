@@ -0,0 +1,73 @@
+import os
+
+from mkdocs_azure_pipelines.cache import MarkdownCache, TextCache
+
+
+def test_cache_set_and_get(tmp_path):
+    cache = MarkdownCache(tmp_path / "cache", max_size=1024)
+    key = cache.key("pipeline.yml", "steps: []")
+    assert cache.get(key) is None
+    cache.set(key, "# Pipeline\n\n")
+    assert cache.get(key) == "# Pipeline\n\n"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_key_depends_on_content_and_name():
+    cache = MarkdownCache("cache", max_size=1024)
+    key = cache.key("dir/pipeline.yml", "steps: []")
+    assert key == cache.key("other/pipeline.yml", "steps: []")
+    assert key != cache.key("dir/pipeline.yml", "jobs: []")
+    assert key != cache.key("dir/other.yml", "steps: []")
+
+    cache.converter_version = "999.0.0"
+    assert key != cache.key("dir/pipeline.yml", "steps: []")
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = MarkdownCache(tmp_path, max_size=25)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.set(key, "x" * 10)
+        os.utime(tmp_path / f"{key}.md", (i, i))
+
+    assert cache.evict() == 1
+    assert not (tmp_path / "a.md").exists()
+    assert cache.get("b") is not None
+    assert cache.get("c") is not None
+
+
+def test_cache_stores_metadata(tmp_path):
+    cache = MarkdownCache(tmp_path, max_size=1024)
+    cache.set("a", "# A\n\n", {"title": "A"})
+    assert cache.get_metadata("a") == {"title": "A"}
+    assert cache.get_metadata("b") is None
+
+    # Evicting an entry removes its metadata as well
+    cache.max_size = 0
+    assert cache.evict() == 1
+    assert not (tmp_path / "a.json").exists()
+
+
+def test_cache_eviction_counts_metadata(tmp_path):
+    cache = MarkdownCache(tmp_path, max_size=50)
+    for i, key in enumerate(["a", "b"]):
+        cache.set(key, "x" * 10, {"text": "y" * 10})
+        os.utime(tmp_path / f"{key}.md", (i, i))
+
+    # The Markdown alone fits, but not with the metadata next to it
+    assert cache.evict() == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["b.json", "b.md"]
+
+
+def test_text_cache_with_json_suffix(tmp_path):
+    cache = TextCache(tmp_path, max_size=15, suffix=".json")
+    for i, key in enumerate(["a", "b"]):
+        cache.set(key, '["x" ]')
+        os.utime(tmp_path / f"{key}.json", (i, i))
+    (tmp_path / "c.json").write_text('["too large"]')
+    os.utime(tmp_path / "c.json", (2, 2))
+
+    # Entries are only their own file, nothing else is removed with them
+    assert cache.evict() == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["c.json"]
+    assert cache.get("c") == '["too large"]'
+    assert (cache.hits, cache.misses) == (1, 0)
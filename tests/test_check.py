@@ -0,0 +1,47 @@
+from mkdocs_azure_pipelines.check import check_content, check_file
+
+
+def test_check_content_valid():
+    content = "#:::about-start:::\n# About\n#:::about-end:::\nsteps:\n  - script: a\n"
+    assert check_content(content, check_yaml=True) == []
+
+
+def test_check_content_tag_errors():
+    content = "steps: []\n#:::about-start:::\n#:::abuot-end:::\n"
+    assert check_content(content) == [
+        (2, "Start tag 'about' without an end tag."),
+        (3, "Misspelled end tag 'abuot'."),
+    ]
+
+
+def test_check_content_yaml_errors_only_when_enabled():
+    content = "steps:\n  - script: a\n b: c\n"
+    assert check_content(content) == []
+    [(line, message)] = check_content(content, check_yaml=True)
+    assert line == 3
+    assert message.startswith("YAML error: ")
+
+
+def test_check_content_sorted_by_line():
+    content = "a: b\na: c\n#:::about-end:::\n"
+    errors = check_content(content, check_yaml=True)
+    assert [line for line, _ in errors] == [2, 3]
+
+
+def test_check_file(tmp_path):
+    path = tmp_path / "pipeline.yml"
+    path.write_text("steps: []\n#:::about-start:::\n")
+    assert check_file(str(path)) == [f"{path}:2: Start tag 'about' without an end tag."]
+
+
+def test_check_file_skips_non_pipelines(tmp_path):
+    path = tmp_path / "mkdocs.yml"
+    path.write_text("site_name: Docs\nemoji: !!python/name:emoji.twemoji\n")
+    assert check_file(str(path), check_yaml=True) == []
+    assert len(check_file(str(path), True, skip_non_pipelines=False)) == 1
+
+
+def test_check_file_unreadable(tmp_path):
+    path = tmp_path / "missing.yml"
+    [diagnostic] = check_file(str(path))
+    assert diagnostic.startswith(f"{path}: Failed to read: ")
@@ -1,7 +1,13 @@
+import json
 import os
 import tempfile
+from unittest.mock import patch
 
-from mkdocs_azure_pipelines.cli import main
+import pytest
+
+from mkdocs_azure_pipelines import batch
+from mkdocs_azure_pipelines.cli import WatchSession, main
+from mkdocs_azure_pipelines.index import read_index
 
 
 def test_example():
@@ -51,3 +57,273 @@ def test_main_valid_input_no_output():
 def test_main_invalid_input():
     argv = ["non_existent_file.yml"]
     assert main(argv) == 1  # Expecting the function to return 1 when file is not found
+
+
+def test_main_directory_mirrors_output(tmp_path, capsys):
+    input_dir = tmp_path / "templates"
+    (input_dir / "steps").mkdir(parents=True)
+    (input_dir / "root.yml").write_text("steps:\n  - script: echo root")
+    (input_dir / "steps" / "nested.yml").write_text("steps:\n  - script: echo nested")
+    output_dir = tmp_path / "out"
+
+    assert main([str(input_dir), "-d", str(output_dir), "--jobs", "2"]) == 0
+
+    assert "echo root" in (output_dir / "root.md").read_text()
+    assert "echo nested" in (output_dir / "steps" / "nested.md").read_text()
+    assert "Processed 2 files, skipped 0, failed 0" in capsys.readouterr().out
+
+
+def test_main_glob_and_skipped_files(tmp_path, capsys):
+    (tmp_path / "valid.yml").write_text("steps:\n  - script: echo valid")
+    (tmp_path / "invalid.yml").write_text("#:::invalid-start:::\n#:::invalid-end:::")
+    output_dir = tmp_path / "out"
+
+    argv = [str(tmp_path / "*.yml"), str(tmp_path / "valid.yml"), "-d", str(output_dir)]
+    assert main(argv) == 0
+
+    assert (output_dir / "valid.md").exists()
+    assert not (output_dir / "invalid.md").exists()
+    assert "Processed 1 files, skipped 1, failed 0" in capsys.readouterr().out
+
+
+def test_main_output_requires_single_input(tmp_path):
+    (tmp_path / "a.yml").write_text("steps: []")
+    (tmp_path / "b.yml").write_text("steps: []")
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "-o", str(tmp_path / "out.md")])
+
+
+def test_main_skips_non_pipelines(tmp_path, capsys):
+    (tmp_path / "values.yaml").write_text("replicaCount: 1")
+    output_dir = tmp_path / "out"
+    assert main([str(tmp_path), "-d", str(output_dir)]) == 0
+    assert "Processed 0 files, skipped 1, failed 0" in capsys.readouterr().out
+
+    assert main([str(tmp_path), "-d", str(output_dir), "--no-skip"]) == 0
+    assert (output_dir / "values.md").read_text() == "# Values\n\n"
+
+
+def test_main_converts_named_non_pipelines(tmp_path):
+    (tmp_path / "empty-template.yml").write_text("")
+    output = tmp_path / "empty.md"
+    assert main([str(tmp_path / "empty-template.yml"), "-o", str(output)]) == 0
+    assert output.read_text() == "# Empty template\n\n"
+
+
+def test_main_mirrors_named_files_below_common_directory(tmp_path, capsys):
+    for name in ("x", "y"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "t.yml").write_text(f"steps:\n  - script: echo {name}")
+    output_dir = tmp_path / "out"
+
+    argv = [str(tmp_path / "x" / "t.yml"), str(tmp_path / "y" / "t.yml")]
+    assert main([*argv, "-d", str(output_dir)]) == 0
+    assert "echo x" in (output_dir / "x" / "t.md").read_text()
+    assert "echo y" in (output_dir / "y" / "t.md").read_text()
+    assert "Processed 2 files" in capsys.readouterr().out
+
+
+def test_main_fails_on_conflicting_outputs(tmp_path, capsys):
+    for name in ("x", "y"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "t.yml").write_text("steps: []")
+    output_dir = tmp_path / "out"
+
+    argv = [str(tmp_path / "x"), str(tmp_path / "y"), "-d", str(output_dir)]
+    assert main(argv) == 1
+    assert capsys.readouterr().out == (
+        f"Output t.md of {tmp_path / 'y' / 't.yml'} is also the output of "
+        f"{tmp_path / 'x' / 't.yml'}\n"
+    )
+    assert not output_dir.exists()
+
+
+def test_main_read_ahead(tmp_path, capsys):
+    input_dir = tmp_path / "templates"
+    input_dir.mkdir()
+    for i in range(5):
+        (input_dir / f"p{i}.yml").write_text(f"steps:\n  - script: echo {i}")
+    (input_dir / "values.yml").write_text("replicaCount: 1")
+    output_dir = tmp_path / "out"
+
+    argv = [str(input_dir), "-d", str(output_dir), "--read-ahead", "2"]
+    assert main(argv) == 0
+
+    for i in range(5):
+        assert f"echo {i}" in (output_dir / f"p{i}.md").read_text()
+    assert "Processed 5 files, skipped 1, failed 0" in capsys.readouterr().out
+
+
+def test_main_read_ahead_shares_workers(tmp_path):
+    input_dir = tmp_path / "templates"
+    input_dir.mkdir()
+    for i in range(64):
+        (input_dir / f"p{i}.yml").write_text(f"steps:\n  - script: echo {i}")
+    output_dir = tmp_path / "out"
+
+    argv = [str(input_dir), "-d", str(output_dir), "-j", "2", "--read-ahead", "8"]
+    with (
+        patch("mkdocs_azure_pipelines.cli.READ_AHEAD_BATCH_SIZE", 16),
+        patch.object(
+            batch, "ProcessPoolExecutor", wraps=batch.ProcessPoolExecutor
+        ) as executor,
+    ):
+        assert main(argv) == 0
+
+    # All batches are converted in parallel, by the same worker processes
+    executor.assert_called_once()
+    assert len(list(output_dir.glob("*.md"))) == 64
+
+
+def test_main_writes_index(tmp_path):
+    input_dir = tmp_path / "templates"
+    (input_dir / "steps").mkdir(parents=True)
+    (input_dir / "root.yml").write_text("jobs:\n  - job: Root")
+    (input_dir / "steps" / "nested.yml").write_text("steps:\n  - script: echo")
+    index = tmp_path / "index.jsonl"
+
+    argv = [str(input_dir), "-d", str(tmp_path / "out"), "--index", str(index)]
+    assert main(argv) == 0
+
+    records = read_index(index)
+    assert [(r["page"], r["kind"]) for r in records] == [
+        ("root.md", "jobs"),
+        ("steps/nested.md", "steps"),
+    ]
+
+
+def test_main_json_format(tmp_path):
+    input_dir = tmp_path / "templates"
+    input_dir.mkdir()
+    (input_dir / "build.yml").write_text(
+        "#:::about-start:::\n# Builds\n#:::about-end:::\nsteps:\n  - script: echo"
+    )
+
+    argv = [str(input_dir), "-d", str(tmp_path / "out"), "--format", "json"]
+    assert main(argv) == 0
+
+    document = json.loads((tmp_path / "out" / "build.json").read_text())
+    assert document["title"] == "Build"
+    assert document["tag_sections"] == [{"name": "about", "text": "Builds"}]
+    assert document["yaml_sections"] == [
+        {
+            "header": "Code",
+            "key": "steps",
+            "code": "steps:\n  - script: echo",
+            "line": 4,
+        }
+    ]
+    assert document["metadata"]["kind"] == "steps"
+
+
+def test_watch_session_syncs_changed_files(tmp_path):
+    input_dir = tmp_path / "templates"
+    (input_dir / "steps").mkdir(parents=True)
+    root = input_dir / "root.yml"
+    root.write_text("steps:\n  - script: echo root")
+    nested = input_dir / "steps" / "nested.yml"
+    nested.write_text("steps:\n  - script: echo nested")
+    (input_dir / "values.yaml").write_text("replicaCount: 1")
+    output_dir = tmp_path / "out"
+
+    session = WatchSession([str(input_dir)], str(output_dir))
+    assert session.sync() == (3, 0)
+    assert sorted(p.name for p in output_dir.rglob("*.md")) == ["nested.md", "root.md"]
+    assert session.sync() == (0, 0)
+
+    root.write_text("steps:\n  - script: echo changed")
+    nested.unlink()
+    assert session.sync() == (1, 1)
+    assert "echo changed" in (output_dir / "root.md").read_text()
+    assert not (output_dir / "steps" / "nested.md").exists()
+
+
+def test_watch_session_skips_unreadable_files(tmp_path, capsys):
+    input_dir = tmp_path / "templates"
+    input_dir.mkdir()
+    (input_dir / "good.yml").write_text("steps:\n  - script: echo good")
+    bad = input_dir / "bad.yml"
+    bad.write_bytes(b"steps:\n  - script: echo \xff")
+    output_dir = tmp_path / "out"
+
+    session = WatchSession([str(input_dir)], str(output_dir))
+    assert session.sync() == (1, 0)
+    assert "echo good" in (output_dir / "good.md").read_text()
+    assert not (output_dir / "bad.md").exists()
+    assert capsys.readouterr().out.startswith(f"Failed to read {bad}: ")
+
+    # The error is reported once, and the file is converted once fixed
+    assert session.sync() == (0, 0)
+    assert capsys.readouterr().out == ""
+    bad.write_text("steps:\n  - script: echo fixed")
+    assert session.sync() == (1, 0)
+    assert "echo fixed" in (output_dir / "bad.md").read_text()
+
+
+def test_watch_session_skips_conflicting_outputs(tmp_path, capsys):
+    for name in ("x", "y"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "t.yml").write_text(f"steps:\n  - script: echo {name}")
+    output_dir = tmp_path / "out"
+
+    session = WatchSession([str(tmp_path / "x"), str(tmp_path / "y")], str(output_dir))
+    assert session.sync() == (1, 0)
+    assert "echo x" in (output_dir / "t.md").read_text()
+    assert capsys.readouterr().out == (
+        f"Output t.md of {tmp_path / 'y' / 't.yml'} is also the output of "
+        f"{tmp_path / 'x' / 't.yml'}, skipping it\n"
+    )
+
+    # The conflict is reported once, and the file is converted once it is gone
+    assert session.sync() == (0, 0)
+    assert capsys.readouterr().out == ""
+    (tmp_path / "x" / "t.yml").unlink()
+    assert session.sync() == (1, 1)
+    assert "echo y" in (output_dir / "t.md").read_text()
+
+
+def test_main_watch(tmp_path, capsys):
+    (tmp_path / "pipeline.yml").write_text("steps: []")
+    output_dir = tmp_path / "out"
+    with patch("time.sleep", side_effect=KeyboardInterrupt):
+        assert main(["watch", str(tmp_path), "-o", str(output_dir)]) == 0
+    assert (output_dir / "pipeline.md").exists()
+    assert "Converted 1 files, removed 0" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_main_check(tmp_path, capsys, jobs):
+    valid = tmp_path / "valid.yml"
+    valid.write_text("#:::about-start:::\n#:::about-end:::\nsteps: []\n")
+    invalid = tmp_path / "invalid.yml"
+    invalid.write_text("steps: []\n#:::about-start:::\n")
+    broken = tmp_path / "broken.yml"
+    broken.write_text("steps: [\n")
+
+    assert main(["check", "-j", jobs, str(valid), str(broken)]) == 0
+    assert capsys.readouterr().out == ""
+
+    argv = ["check", "-j", jobs, "--yaml", str(valid), str(invalid), str(broken)]
+    with patch("mkdocs_azure_pipelines.cli.MIN_PARALLEL_FILES", 1):
+        assert main(argv) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"{invalid}:2: Start tag 'about' without an end tag."
+    assert lines[1].startswith(f"{broken}:2: YAML error: ")
+    assert len(lines) == 2
+
+
+def test_main_commands_ignore_paths_named_like_them(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "check").mkdir()
+    (tmp_path / "check" / "pipeline.yml").write_text("steps: []\n#:::about-start:::\n")
+
+    # A check directory in the working directory doesn't turn check into a file
+    assert main(["check", "check"]) == 1
+    assert "Start tag 'about' without an end tag." in capsys.readouterr().out
+
+    # It is converted with an explicit convert command or after --
+    (tmp_path / "check" / "pipeline.yml").write_text("steps: []\n")
+    assert main(["convert", "check", "-d", "out"]) == 0
+    assert (tmp_path / "out" / "pipeline.md").exists()
+    assert main(["-d", "json", "-f", "json", "--", "check"]) == 0
+    assert (tmp_path / "json" / "pipeline.json").exists()
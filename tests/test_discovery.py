@@ -0,0 +1,64 @@
+import os
+
+from mkdocs_azure_pipelines.discovery import (
+    find_pipeline_files,
+    get_all_files,
+    walk_pipeline_files,
+)
+
+
+def make_tree(root, paths):
+    for path in paths:
+        file = root / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text("steps: []")
+
+
+def test_find_pipeline_files_yml_and_yaml_sorted(tmp_path):
+    make_tree(tmp_path, ["b.yml", "a.yaml", "sub/c.yml", "readme.md"])
+    assert find_pipeline_files([str(tmp_path)]) == [
+        str(tmp_path / "a.yaml"),
+        str(tmp_path / "b.yml"),
+        str(tmp_path / "sub" / "c.yml"),
+    ]
+
+
+def test_walk_pipeline_files_prunes_excluded_directories(tmp_path):
+    make_tree(
+        tmp_path,
+        ["keep.yml", "node_modules/pkg/dep.yml", "vendor/lib/x.yml", "vendor/y.yml"],
+    )
+    files, directories = walk_pipeline_files(
+        [str(tmp_path)], exclude=["node_modules", "vendor/lib"]
+    )
+    assert sorted(files) == [str(tmp_path / "keep.yml"), str(tmp_path / "vendor/y.yml")]
+    assert str(tmp_path / "node_modules") not in directories
+    assert str(tmp_path / "vendor" / "lib") not in directories
+
+
+def test_walk_pipeline_files_include_patterns(tmp_path):
+    make_tree(tmp_path, ["templates/a.yml", "other/b.yml", "values.yaml"])
+    files, _ = walk_pipeline_files(
+        [str(tmp_path)], include=["templates/*.yml"], exclude=[]
+    )
+    assert files == [str(tmp_path / "templates" / "a.yml")]
+
+
+def test_walk_pipeline_files_skips_symlinked_directories(tmp_path):
+    make_tree(tmp_path, ["a/pipeline.yml", "b/other.yml"])
+    (tmp_path / "a" / "loop").symlink_to("..", target_is_directory=True)
+    (tmp_path / "a" / "linked.yml").symlink_to(tmp_path / "b" / "other.yml")
+    (tmp_path / "a" / "broken.yml").symlink_to(tmp_path / "missing.yml")
+
+    files, _ = walk_pipeline_files([str(tmp_path / "a")])
+    assert sorted(files) == [
+        str(tmp_path / "a" / "linked.yml"),
+        str(tmp_path / "a" / "pipeline.yml"),
+    ]
+
+
+def test_get_all_files_removes_duplicates(tmp_path):
+    make_tree(tmp_path, ["a.yml", "b.yml"])
+    relative = os.path.relpath(tmp_path / "a.yml")
+    all_files = get_all_files([str(tmp_path / "a.yml"), relative], [str(tmp_path)])
+    assert all_files == [str(tmp_path / "a.yml"), str(tmp_path / "b.yml")]
@@ -0,0 +1,106 @@
+import json
+import pickle
+
+import pytest
+
+from mkdocs_azure_pipelines.ado_pipe_to_md import build_document
+from mkdocs_azure_pipelines.document import (
+    Parameter,
+    PipelineDocument,
+    TagSection,
+    YamlSection,
+    document_to_dict,
+    metadata_record,
+    render_json,
+    render_markdown,
+)
+
+CONTENT = """#:::title-start:::
+# Build
+#:::title-end:::
+#:::example-start:::
+# steps:
+#   - template: build.yml
+#:::example-end:::
+#:::about-start:::
+# Builds the project.
+#:::about-end:::
+parameters:
+  - name: configuration
+steps:
+  - script: echo build
+"""
+
+
+def test_build_document():
+    document = build_document(CONTENT, "build.yml")
+    assert document is not None
+    assert document.title == "Build"
+    assert document.tag_sections == (
+        TagSection("about", "Builds the project."),
+        TagSection("example", "steps:\n  - template: build.yml"),
+    )
+    assert document.yaml_sections == (
+        YamlSection(
+            "Parameters", "parameters", "parameters:\n  - name: configuration", 11
+        ),
+        YamlSection("Code", "steps", "steps:\n  - script: echo build", 13),
+    )
+    assert document.metadata.kind == "steps"
+    assert document.metadata.parameters == (Parameter("configuration"),)
+    assert metadata_record(document)["path"] == "build.yml"
+    assert "path" not in document_to_dict(document)["metadata"]
+    assert list(document.sections()) == ["about", "example", "parameters", "code"]
+
+    # The document is passed to and from worker processes
+    assert pickle.loads(pickle.dumps(document)) == document
+
+
+def test_build_document_metadata_is_immutable():
+    content = (
+        "parameters:\n  - name: images\n    default: [ubuntu]\n"
+        "pool:\n  vmImage: ubuntu-latest\nsteps: []\n"
+    )
+    document = build_document(content, "build.yml")
+    assert document is not None
+    assert document.metadata.pool == {"vmImage": "ubuntu-latest"}
+    assert document.metadata.parameters[0].default == ("ubuntu",)
+    with pytest.raises(TypeError):
+        document.metadata.pool["vmImage"] = "windows-latest"
+    assert hash(document) == hash(pickle.loads(pickle.dumps(document)))
+
+    # Records and JSON have plain objects and arrays again
+    record = metadata_record(document)
+    assert record["pool"] == {"vmImage": "ubuntu-latest"}
+    assert record["parameters"] == [
+        {"name": "images", "type": None, "default": ["ubuntu"]}
+    ]
+    assert json.loads(render_json(document))["metadata"]["pool"] == record["pool"]
+
+
+def test_build_document_with_tag_errors(capsys):
+    assert build_document("#:::about-start:::\nsteps: []", "build.yml") is None
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[:2] == [
+        "Tag error in build.yml.",
+        "build.yml:1: Start tag 'about' without an end tag.",
+    ]
+
+
+def test_render_markdown():
+    document = PipelineDocument(
+        "build.yml",
+        "Build",
+        (TagSection("example", "steps: []"),),
+        (YamlSection("Code", "steps", "steps: []"),),
+    )
+    assert render_markdown(document) == (
+        "# Build\n\n## Example\n\n```yaml\nsteps: []\n```\n\n"
+        "## Code\n\n```yaml\nsteps: []\n```\n\n"
+    )
+
+
+def test_render_json():
+    document = build_document(CONTENT, "build.yml")
+    assert document is not None
+    assert '"header": "Parameters"' in render_json(document)
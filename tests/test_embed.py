@@ -0,0 +1,98 @@
+import logging
+from unittest.mock import patch
+
+from mkdocs_azure_pipelines import embed
+from mkdocs_azure_pipelines.ado_pipe_to_md import build_document
+from mkdocs_azure_pipelines.embed import (
+    PipelineEmbedder,
+    demote_headings,
+)
+
+PIPELINE = """#:::title-start:::
+# Build template
+#:::title-end:::
+parameters:
+  - name: configuration
+    default: Release
+steps:
+  - script: echo ${{ parameters.configuration }}
+"""
+
+
+def test_demote_headings():
+    markdown = "# Title\n\n## Code\n\n```yaml\n# comment\n```"
+    assert (
+        demote_headings(markdown) == "## Title\n\n### Code\n\n```yaml\n# comment\n```"
+    )
+
+
+def test_embed(tmp_path):
+    (tmp_path / "build.yml").write_text(PIPELINE)
+    embedder = PipelineEmbedder(str(tmp_path))
+    markdown = (
+        "# Guide\n\n<!-- azure-pipeline: build.yml#parameters -->\n\n"
+        "<!-- azure-pipeline: build.yml -->\n\n"
+        "```\n<!-- azure-pipeline: build.yml#code -->\n```\n"
+    )
+    result = embedder.embed(markdown, "guide.md")
+    assert "```yaml\nparameters:\n  - name: configuration" in result
+    assert "## Build template\n\n### Parameters" in result
+    # Markers in code blocks are kept
+    assert "```\n<!-- azure-pipeline: build.yml#code -->\n```" in result
+    assert embedder.files == {str(tmp_path / "build.yml")}
+
+
+def test_embed_converts_once_per_build(tmp_path):
+    pipeline = tmp_path / "build.yml"
+    pipeline.write_text(PIPELINE)
+    embedder = PipelineEmbedder(str(tmp_path))
+    markdown = "<!-- azure-pipeline: build.yml#code -->"
+
+    with patch.object(embed, "build_document", wraps=embed.build_document) as process:
+        embedder.start_build()
+        for page in ("a.md", "b.md"):
+            embedder.embed(markdown, page)
+        assert process.call_count == 1
+
+        # Unchanged files are not converted again by the next build
+        embedder.start_build()
+        embedder.embed(markdown, "a.md")
+        assert process.call_count == 1
+
+        pipeline.write_text(PIPELINE.replace("echo", "echo changed"))
+        embedder.start_build()
+        assert "echo changed" in embedder.embed(markdown, "a.md")
+        assert process.call_count == 2
+        assert len(embedder.converted) == 2
+
+        # Conversions of the previous content are dropped
+        embedder.start_build()
+        assert len(embedder.converted) == 1
+
+
+def test_embed_uses_documents_of_the_build(tmp_path):
+    pipeline = tmp_path / "build.yml"
+    pipeline.write_text(PIPELINE)
+    embedder = PipelineEmbedder(str(tmp_path))
+    embedder.start_build()
+    document = build_document(PIPELINE, str(pipeline))
+    assert document is not None
+    embedder.add_document(document)
+
+    with patch.object(embed, "read_pipeline_file") as read:
+        result = embedder.embed("<!-- azure-pipeline: build.yml#title -->", "a.md")
+    read.assert_not_called()
+    assert result == "Build template"
+
+
+def test_embed_missing(tmp_path, caplog):
+    (tmp_path / "build.yml").write_text(PIPELINE)
+    embedder = PipelineEmbedder(str(tmp_path))
+    markdown = (
+        "<!-- azure-pipeline: missing.yml -->\n"
+        "<!-- azure-pipeline: build.yml#outputs -->"
+    )
+    with caplog.at_level(logging.WARNING):
+        assert embedder.embed(markdown, "guide.md") == markdown
+    assert "guide.md: Cannot embed missing.yml" in caplog.text
+    assert "guide.md: No section outputs in build.yml" in caplog.text
@@ -0,0 +1,122 @@
+import json
+
+from mkdocs_azure_pipelines.graph import (
+    TemplateGraph,
+    find_template_references,
+    normalize_path,
+    render_template_links,
+    resolve_template_reference,
+)
+
+
+def test_find_template_references():
+    content = """
+extends:
+  template: /templates/base.yml@self
+stages:
+  - template: stages/build.yml # Build stage
+  - template: "stages/deploy.yml"
+  - template: stages/build.yml
+  - template: ${{ parameters.extra }}
+#   - template: commented.yml
+"""
+    assert find_template_references(content) == [
+        "/templates/base.yml@self",
+        "stages/build.yml",
+        "stages/deploy.yml",
+    ]
+
+
+def test_resolve_template_reference(tmp_path):
+    including = str(tmp_path / "pipelines" / "main.yml")
+    repositories = {"shared": str(tmp_path / "shared")}
+    root = str(tmp_path)
+
+    def resolve(reference):
+        return resolve_template_reference(reference, including, repositories, root)
+
+    assert resolve("steps.yml") == normalize_path(tmp_path / "pipelines/steps.yml")
+    assert resolve("../t/steps.yml@self") == normalize_path(tmp_path / "t/steps.yml")
+    assert resolve("/t/steps.yml") == normalize_path(tmp_path / "t/steps.yml")
+    assert resolve("t/x.yml@shared") == normalize_path(tmp_path / "shared/t/x.yml")
+    assert resolve("t/x.yml@unknown") is None
+
+
+def test_template_graph_affected(tmp_path):
+    a, b, c, d = (str(tmp_path / f"{name}.yml") for name in "abcd")
+    graph = TemplateGraph()
+    graph.update(a, [("c.yml", normalize_path(c))])
+    graph.update(b, [("d.yml", normalize_path(d))])
+    graph.update(c, [])
+    graph.update(d, [])
+    previous = graph.copy()
+
+    # a switches from template c to d: a, the old and the new template change
+    graph.update(a, [("d.yml", normalize_path(d))])
+    assert graph.dependents(d) == sorted([normalize_path(a), normalize_path(b)])
+    assert graph.affected([a], previous) == {
+        normalize_path(a),
+        normalize_path(c),
+        normalize_path(d),
+    }
+    # A change to d only affects the files including it
+    assert graph.affected([d], graph) == {
+        normalize_path(d),
+        normalize_path(a),
+        normalize_path(b),
+    }
+
+    graph.prune([a, d])
+    assert set(graph.references) == {normalize_path(a), normalize_path(d)}
+
+
+def test_template_graph_dependents_index(tmp_path):
+    a, b, c = (str(tmp_path / name) for name in ("a.yml", "b.yml", "c.yml"))
+    graph = TemplateGraph()
+    graph.update(a, [("c.yml", normalize_path(c))])
+    graph.update(b, [("c.yml", normalize_path(c)), ("./c.yml", normalize_path(c))])
+    copy = graph.copy()
+    assert graph.dependents(c) == sorted([normalize_path(a), normalize_path(b)])
+
+    # Updated and removed files no longer include their previous templates
+    graph.update(a, [])
+    assert graph.dependents(c) == [normalize_path(b)]
+    graph.prune([a, c])
+    assert graph.dependents(c) == []
+    assert graph.including == {}
+
+    # Copies keep their own index
+    assert copy.dependents(c) == sorted([normalize_path(a), normalize_path(b)])
+
+
+def test_render_template_links(tmp_path):
+    main, steps = str(tmp_path / "main.yml"), str(tmp_path / "steps.yml")
+    graph = TemplateGraph()
+    graph.update(main, [("steps.yml", normalize_path(steps)), ("x.yml@other", None)])
+    graph.update(steps, [])
+    pages = {
+        normalize_path(main): ("main-123.md", "Main"),
+        normalize_path(steps): ("steps-456.md", "Steps"),
+    }
+
+    assert render_template_links(main, graph, pages) == (
+        "## Templates\n\n- [Steps](steps-456.md) `steps.yml`\n- `x.yml@other`\n\n"
+    )
+    assert render_template_links(steps, graph, pages) == (
+        "## Used by\n\n- [Main](main-123.md) `main.yml`\n\n"
+    )
+
+
+def test_template_graph_write(tmp_path):
+    graph = TemplateGraph()
+    graph.update(str(tmp_path / "main.yml"), [("x.yml@other", None)])
+
+    graph.write(tmp_path / "graph.json")
+    data = json.loads((tmp_path / "graph.json").read_text())
+    assert data["edges"][0]["reference"] == "x.yml@other"
+    assert data["edges"][0]["target"] is None
+
+    graph.write(tmp_path / "graph.dot")
+    dot = (tmp_path / "graph.dot").read_text()
+    assert dot.startswith("digraph templates {")
+    assert '"x.yml@other" [label="x.yml@other"]' in dot
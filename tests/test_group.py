@@ -0,0 +1,39 @@
+from mkdocs_azure_pipelines.group import group_anchors, group_pages, render_group
+
+
+def test_group_pages():
+    file_paths = [
+        "steps/a.yml",
+        "steps/b.yml",
+        "steps/large.yml",
+        "jobs/c.yml",
+        "d.yml",
+    ]
+    line_counts = [10, 20, 500, 10, None]
+    assert group_pages(file_paths, line_counts, threshold=100) == {
+        "steps/a.yml": "steps",
+        "steps/b.yml": "steps",
+    }
+
+
+def test_group_anchors():
+    assert group_anchors(["a/Build.yml", "a/build.yaml", "a/_.yml"]) == {
+        "a/Build.yml": "build",
+        "a/build.yaml": "build-1",
+        "a/_.yml": "pipeline",
+    }
+
+
+def test_render_group():
+    sections = [
+        ("build", "# Build\n\n## Code\n\n```yaml\n# comment\nsteps: []\n```\n\n"),
+        ("test", "# Test\n\n## About\n\nRuns the tests.\n\n"),
+    ]
+    assert render_group("templates/steps", sections) == (
+        "# steps\n\n"
+        "- [Build](#build)\n"
+        "- [Test](#test)\n\n"
+        '<a id="build"></a>\n\n## Build\n\n'
+        "### Code\n\n```yaml\n# comment\nsteps: []\n```\n\n"
+        '<a id="test"></a>\n\n## Test\n\n### About\n\nRuns the tests.\n\n'
+    )
@@ -0,0 +1,72 @@
+import markdown
+
+from mkdocs_azure_pipelines.cache import TextCache
+from mkdocs_azure_pipelines.highlight import CodeHighlighter
+
+PAGE = """# Build
+
+## Parameters
+
+```yaml
+parameters:
+  - name: configuration
+```
+
+## Code
+
+```yaml
+steps:
+  - script: echo build
+```
+"""
+
+EXTENSIONS = [
+    "toc",
+    "tables",
+    "fenced_code",
+    "pymdownx.highlight",
+    "pymdownx.superfences",
+]
+CONFIGS = {"pymdownx.highlight": {"linenums": True, "anchor_linenums": True}}
+
+
+def test_highlight_matches_highlighter(tmp_path):
+    cache = TextCache(tmp_path, max_size=1024 * 1024, suffix=".json")
+    highlighter = CodeHighlighter(EXTENSIONS, CONFIGS, cache)
+    highlighted = highlighter.highlight(PAGE)
+    assert "```" not in highlighted
+    assert '<div class="highlight">' in highlighted
+
+    # The page renders to the same HTML, apart from blank lines
+    def render(text):
+        html = markdown.markdown(text, extensions=EXTENSIONS, extension_configs=CONFIGS)
+        return [line for line in html.splitlines() if line]
+
+    assert render(highlighted) == render(PAGE)
+    assert "__codelineno-1-1" in highlighted
+
+
+def test_highlight_cache(tmp_path):
+    cache = TextCache(tmp_path, max_size=1024 * 1024, suffix=".json")
+    highlighter = CodeHighlighter(EXTENSIONS, CONFIGS, cache)
+    highlighted = highlighter.highlight(PAGE)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    # Unchanged code is not highlighted again, also by a new build
+    highlighter = CodeHighlighter(EXTENSIONS, CONFIGS, cache)
+    highlighter.render = None  # type: ignore
+    assert highlighter.highlight(PAGE) == highlighted
+    assert cache.hits == 1
+
+    # Other highlighter settings don't use the same entries
+    highlighter = CodeHighlighter(EXTENSIONS, {}, cache)
+    assert highlighter.highlight(PAGE) != highlighted
+    assert cache.misses == 2
+
+
+def test_highlight_without_highlighter(tmp_path):
+    cache = TextCache(tmp_path, max_size=1024 * 1024, suffix=".json")
+    highlighter = CodeHighlighter(["toc", "fenced_code"], {}, cache)
+    assert not highlighter.enabled
+    assert highlighter.highlight(PAGE) == PAGE
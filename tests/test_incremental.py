@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from mkdocs_azure_pipelines import incremental
+from mkdocs_azure_pipelines.ado_pipe_to_md import read_pipeline_file
+from mkdocs_azure_pipelines.incremental import FileListing, IncrementalConverter
+
+
+def test_file_listing_refreshes_when_directory_changes(tmp_path):
+    sub_dir = tmp_path / "sub"
+    sub_dir.mkdir()
+    (sub_dir / "a.yml").write_text("steps: []")
+    listing = FileListing()
+    with patch.object(
+        incremental, "walk_pipeline_files", wraps=incremental.walk_pipeline_files
+    ) as walk:
+        assert listing.get((str(tmp_path),)) == [str(sub_dir / "a.yml")]
+        assert listing.get((str(tmp_path),)) == [str(sub_dir / "a.yml")]
+        assert walk.call_count == 1
+
+        (sub_dir / "b.yaml").write_text("steps: []")
+        assert listing.get((str(tmp_path),)) == [
+            str(sub_dir / "a.yml"),
+            str(sub_dir / "b.yaml"),
+        ]
+        assert walk.call_count == 2
+
+        # Changing the patterns lists the directories again
+        assert listing.get((str(tmp_path),), ("*.yaml",), ()) == [
+            str(sub_dir / "b.yaml")
+        ]
+
+
+def test_incremental_converter_skips_touched_but_unchanged_files(tmp_path):
+    file = tmp_path / "pipeline.yml"
+    file.write_text("steps: []")
+    converted = []
+
+    def convert(items: list[tuple[str, str]]) -> list[str | None]:
+        converted.extend(file_path for file_path, _ in items)
+        return [f"# {content}" for _, content in items]
+
+    converter = IncrementalConverter()
+    assert converter.convert([str(file)], read_pipeline_file, convert) == [
+        "# steps: []"
+    ]
+
+    # Rewriting the same content changes the mtime but not the hash
+    file.write_text("steps: []")
+    assert converter.convert([str(file)], read_pipeline_file, convert) == [
+        "# steps: []"
+    ]
+    assert converted == [str(file)]
+
+    converter.prune([])
+    assert converter.states == {}
+
+
+def test_incremental_converter_converts_in_batches(tmp_path):
+    files = []
+    for i in range(5):
+        file = tmp_path / f"pipeline{i}.yml"
+        file.write_text(f"steps: [{i}]")
+        files.append(str(file))
+    batches = []
+
+    def convert(items: list[tuple[str, str]]) -> list[str | None]:
+        batches.append(len(items))
+        return [content for _, content in items]
+
+    converter = IncrementalConverter()
+    results = converter.convert(files, read_pipeline_file, convert, batch_size=2)
+    assert results == [f"steps: [{i}]" for i in range(5)]
+    assert batches == [2, 2, 1]
+    assert (converter.converted, converter.reused) == (5, 0)
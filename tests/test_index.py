@@ -0,0 +1,41 @@
+from mkdocs_azure_pipelines.index import read_index, render_catalog, write_index
+
+RECORDS = [
+    {
+        "path": "pipelines/build.yml",
+        "title": "Build | test",
+        "kind": "stages",
+        "parameters": [{"name": "python", "type": "string", "default": "3.12"}],
+        "pool": {"vmImage": "ubuntu-latest"},
+        "trigger": ["main"],
+        "hash": "abc",
+        "page": "pipelines/build-123.md",
+    },
+    {
+        "path": "pipelines/steps.yml",
+        "title": "Steps",
+        "kind": "steps",
+        "parameters": [],
+        "pool": None,
+        "trigger": None,
+        "hash": "def",
+        "page": "pipelines/steps-456.md",
+    },
+]
+
+
+def test_write_and_read_index(tmp_path):
+    for name in ["index.json", "index.jsonl"]:
+        write_index(tmp_path / name, RECORDS)
+        assert read_index(tmp_path / name) == RECORDS
+    assert len((tmp_path / "index.jsonl").read_text().splitlines()) == 2
+
+
+def test_render_catalog():
+    assert render_catalog(RECORDS, "pipelines/index.md") == (
+        "# Pipelines\n\n"
+        "| Pipeline | Kind | Parameters | Pool |\n"
+        "| --- | --- | --- | --- |\n"
+        "| [Build \\| test](build-123.md) | stages | `python` | ubuntu-latest |\n"
+        "| [Steps](steps-456.md) | steps |  |  |\n"
+    )
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from mkdocs_azure_pipelines.pages import PageStore
+
+
+def test_page_store_write_and_prune(tmp_path):
+    store = PageStore(tmp_path / "pages")
+    first = store.write("converted/pipelines/first.md", "# First\n\nContent\n")
+    second = store.write("split/pipelines/second.md", "# Second\n")
+    other = tmp_path / "pages" / "mkdocs-azure-pipelines" / "cache.md"
+    other.parent.mkdir(parents=True)
+    other.write_text("Not a page")
+
+    assert store.read(first) == "# First\n\nContent\n"
+    assert store.read_title(first) == "First"
+    assert store.prune({first}) == 1
+    assert not Path(second).exists()
+    # Files outside the folders of the pages are left alone
+    assert other.exists()
+    with pytest.raises(ValueError):
+        store.write("mkdocs-azure-pipelines/cache.md", "")
+
+    # A store with a given directory keeps it
+    store.clear()
+    assert Path(first).exists()
+
+
+def test_page_store_temporary_directory():
+    store = PageStore()
+    page = store.write("converted/page.md", "# Page\n")
+    assert Path(page).exists()
+
+    store.clear()
+    assert not store.directory.exists()
@@ -1,8 +1,17 @@
-from unittest.mock import Mock
+import json
+import shutil
+import subprocess
+from typing import cast
+from unittest.mock import Mock, patch
 
 import pytest
+from mkdocs.config import load_config
+from mkdocs.livereload import LiveReloadServer
 from mkdocs.structure.files import Files
+from mkdocs.utils.templates import TemplateContext
 
+from mkdocs_azure_pipelines import batch, embed
+from mkdocs_azure_pipelines.index import read_index
 from mkdocs_azure_pipelines.plugin import (
     AzurePipelinesPlugin,
     ConfigurationError,
@@ -89,3 +98,624 @@ def test_azure_pipelines_plugin_on_config_raises_exception():
         match="At least one input_files or input_dirs must be specified.",
     ):
         plugin.on_config(Mock())
+
+
+def test_azure_pipelines_plugin_cache(tmp_path):
+    content = (
+        """#:::title-start:::\n# Title\n#:::title-end:::\nsteps:\n  - script: echo"""
+    )
+    pipeline_file = tmp_path / "pipeline.yml"
+    pipeline_file.write_text(content)
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = [str(pipeline_file)]
+    plugin_config["input_dirs"] = []
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["cache"] = True
+    plugin_config["cache_dir"] = str(tmp_path / "cache")
+    plugin_config["cache_max_size"] = 1
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+
+    plugin.on_config(mkdocs_config)
+    cold = plugin.on_files(Files([]), config=mkdocs_config)
+    assert list((tmp_path / "cache").glob("*.md"))
+
+    # A warm cache must not run the converter at all, even in a new process
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    plugin.on_config(mkdocs_config)
+    with patch.object(batch, "build_document") as convert:
+        warm = plugin.on_files(Files([]), config=mkdocs_config)
+    convert.assert_not_called()
+    assert plugin.cache is not None and plugin.cache.hits == 1
+    assert [f.content_string for f in warm] == [f.content_string for f in cold]
+
+
+def test_azure_pipelines_plugin_incremental_rebuild(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    first = pipelines / "first.yml"
+    first.write_text("steps:\n  - script: echo first")
+    second = pipelines / "second.yml"
+    second.write_text("steps:\n  - script: echo second")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    plugin.on_files(Files([]), config=Mock())
+    assert plugin.incremental.converted == 2
+
+    # Nothing changed, so nothing is converted again
+    with patch.object(batch, "build_document") as convert:
+        files = plugin.on_files(Files([]), config=Mock())
+    convert.assert_not_called()
+    assert len(files) == 2
+
+    # Only the changed file is converted again
+    second.write_text("steps:\n  - script: echo changed")
+    files = plugin.on_files(Files([]), config=Mock())
+    assert (plugin.incremental.converted, plugin.incremental.reused) == (1, 1)
+    assert any("echo changed" in f.content_string for f in files)
+
+    # New files in the input dirs are picked up
+    third = pipelines / "third.yml"
+    third.write_text("steps:\n  - script: echo third")
+    files = plugin.on_files(Files([]), config=Mock())
+    assert len(files) == 3
+    assert plugin.incremental.converted == 1
+
+
+def test_azure_pipelines_plugin_is_kept_between_serve_builds(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    (pipelines / "build.yml").write_text("steps:\n  - script: echo build")
+    (tmp_path / "docs").mkdir()
+    config_file = tmp_path / "mkdocs.yml"
+    config_file.write_text(
+        "site_name: Test\n"
+        "plugins:\n"
+        "  - mkdocs-azure-pipelines:\n"
+        f"      input_dirs: [{json.dumps(str(pipelines))}]\n"
+    )
+
+    def build() -> AzurePipelinesPlugin:
+        # Like mkdocs serve, which loads the config again for every build
+        config = load_config(str(config_file))
+        config.plugins.on_startup(command="serve", dirty=False)
+        config = config.plugins.on_config(config)
+        config.plugins.on_files(Files([]), config=config)
+        plugin = config.plugins["mkdocs-azure-pipelines"]
+        assert isinstance(plugin, AzurePipelinesPlugin)
+        return plugin
+
+    plugin = build()
+    assert plugin.incremental.converted == 1
+    try:
+        # mkdocs reuses the plugin instance, and with it the previous build
+        assert build() is plugin
+        assert (plugin.incremental.converted, plugin.incremental.reused) == (0, 1)
+    finally:
+        plugin.on_shutdown()
+
+
+def test_azure_pipelines_plugin_timings_report(tmp_path):
+    pipeline_file = tmp_path / "pipeline.yml"
+    pipeline_file.write_text("steps:\n  - script: echo")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = [str(pipeline_file)]
+    plugin_config["input_dirs"] = []
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["timings"] = True
+    plugin_config["timings_report"] = str(tmp_path / "timings.json")
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    plugin.on_files(Files([]), config=mkdocs_config)
+    plugin.on_post_build(config=mkdocs_config)
+
+    report = json.loads((tmp_path / "timings.json").read_text())
+    assert {"discovery", "read", "tags", "parse", "dump"} <= set(report["phases"])
+    assert report["counters"]["converted"] == 1
+    assert set(report["files"]) == {str(pipeline_file)}
+
+
+def test_azure_pipelines_plugin_skips_non_pipelines(tmp_path, caplog):
+    (tmp_path / "pipeline.yml").write_text("steps:\n  - script: echo")
+    (tmp_path / "docker-compose.yml").write_text("services:\n  web:\n    image: x")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(tmp_path)]
+    plugin_config["output_dir"] = "pipelines"
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    with caplog.at_level("INFO"):
+        files = plugin.on_files(Files([]), config=Mock())
+
+    assert [f.src_uri.split("/")[1].split("-")[0] for f in files] == ["pipeline"]
+    assert plugin.non_pipeline_files == {str(tmp_path / "docker-compose.yml")}
+    assert "Skipped 1 files that are not Azure Pipelines" in caplog.text
+
+    # Files listed in input_files are converted anyway
+    plugin_config["input_files"] = [str(tmp_path / "docker-compose.yml")]
+    files = plugin.on_files(Files([]), config=Mock())
+    assert len(files) == 2
+    assert not plugin.non_pipeline_files
+
+
+def test_azure_pipelines_plugin_template_graph(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    main = pipelines / "main.yml"
+    main.write_text("stages:\n  - template: stage.yml\n")
+    stage = pipelines / "stage.yml"
+    stage.write_text("jobs:\n  - template: /pipelines/job.yml\n")
+    job = pipelines / "job.yml"
+    job.write_text("steps:\n  - script: echo\n")
+    other = pipelines / "other.yml"
+    other.write_text("steps:\n  - script: echo other\n")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["template_graph"] = True
+    plugin_config["template_graph_export"] = "graph.json"
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    files = plugin.on_files(Files([]), config=mkdocs_config)
+    pages = {plugin.generated_pages[f.src_uri]: f for f in files}
+
+    assert "## Templates\n\n- [Job](job-" in pages[str(stage)].content_string
+    assert "## Used by\n\n- [Stage](stage-" in pages[str(job)].content_string
+    assert "## Templates" not in pages[str(other)].content_string
+    graph = json.loads((tmp_path / "graph.json").read_text())
+    assert len(graph["edges"]) == 2
+
+    # Changing the job template only updates the links of the files around it
+    job.write_text("#:::title-start:::\n# Build job\n#:::title-end:::\nsteps: []\n")
+    with patch("mkdocs_azure_pipelines.plugin.render_template_links") as render:
+        render.return_value = ""
+        plugin.on_files(Files([]), config=mkdocs_config)
+    rendered = {call.args[0] for call in render.call_args_list}
+    assert rendered == {str(job), str(stage)}
+
+
+def test_azure_pipelines_plugin_pages_on_disk(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    first = pipelines / "first.yml"
+    first.write_text("steps:\n  - script: echo first")
+    second = pipelines / "second.yml"
+    second.write_text("steps:\n  - script: echo second")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["pages_on_disk"] = True
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    files = plugin.on_files(Files([]), config=mkdocs_config)
+
+    # The pages are read from disk, the plugin only keeps their paths
+    assert plugin.pages is not None
+    assert len(files) == 2
+    for file in files:
+        assert file.abs_src_path is not None
+        assert file.abs_src_path.startswith(str(plugin.pages.directory))
+    assert any("echo second" in f.content_string for f in files)
+
+    # Pages of removed files are removed, and the rest on shutdown
+    second.unlink()
+    plugin.on_config(mkdocs_config)
+    files = plugin.on_files(Files([]), config=mkdocs_config)
+    assert plugin.pages is not None
+    pages_dir = plugin.pages.directory
+    assert len(files) == 1
+    assert len([p for p in pages_dir.rglob("*.md")]) == 1
+    plugin.on_shutdown()
+    assert not pages_dir.exists()
+
+
+def test_azure_pipelines_plugin_pages_on_disk_shares_workers(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    for i in range(40):
+        (pipelines / f"p{i}.yml").write_text(f"steps:\n  - script: echo {i}")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["pages_on_disk"] = True
+    plugin_config["workers"] = 2
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    with (
+        patch("mkdocs_azure_pipelines.plugin.WRITE_BATCH_SIZE", 20),
+        patch.object(
+            batch, "ProcessPoolExecutor", wraps=batch.ProcessPoolExecutor
+        ) as executor,
+    ):
+        files = plugin.on_files(Files([]), config=mkdocs_config)
+
+    # Both batches are converted by the same worker processes
+    executor.assert_called_once()
+    assert plugin.pool is None
+    assert len(files) == 40
+    plugin.on_shutdown()
+
+
+def test_azure_pipelines_plugin_index_and_catalog(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    (pipelines / "build.yml").write_text(
+        "parameters:\n  - name: version\n    type: string\nstages: []\n"
+    )
+    (pipelines / "steps.yml").write_text("pool: default\nsteps: []\n")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["cache"] = True
+    plugin_config["index"] = "pipelines.json"
+    plugin_config["catalog"] = "pipelines/index.md"
+    mkdocs_config = Mock(
+        config_file_path=str(tmp_path / "mkdocs.yml"), use_directory_urls=True
+    )
+
+    plugin = None
+    for _ in range(2):
+        # The second, fresh, plugin gets the metadata from the cache
+        plugin = AzurePipelinesPlugin()
+        plugin.config = plugin_config  # pyright: ignore
+        plugin.on_config(mkdocs_config)
+        files = plugin.on_files(Files([]), config=mkdocs_config)
+
+        records = json.loads((tmp_path / "pipelines.json").read_text())
+        assert [(r["path"], r["kind"]) for r in records] == [
+            (str(pipelines / "build.yml"), "stages"),
+            (str(pipelines / "steps.yml"), "steps"),
+        ]
+        assert records[0]["parameters"][0]["name"] == "version"
+        assert records[0]["url"].startswith("pipelines/build-")
+        catalog = files.get_file_from_path("pipelines/index.md")
+        assert catalog is not None
+        assert "| default |" in catalog.content_string
+    assert plugin is not None
+    assert plugin.cache is not None and plugin.cache.hits == 2
+
+
+@pytest.mark.parametrize("pages_on_disk", [False, True])
+def test_azure_pipelines_plugin_splits_large_pages(tmp_path, pages_on_disk):
+    stages = "".join(
+        f"  - stage: Stage{i}\n    jobs:\n      - job: Job{i}\n" for i in range(3)
+    )
+    pipeline_file = tmp_path / "release.yml"
+    pipeline_file.write_text(f"stages:\n{stages}")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = [str(pipeline_file)]
+    plugin_config["input_dirs"] = []
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["split_threshold"] = 5
+    plugin_config["pages_on_disk"] = pages_on_disk
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    files = list(plugin.on_files(Files([]), config=mkdocs_config))
+
+    assert [f.src_uri.rpartition("/")[2] for f in files][1:] == [
+        "stage0.md",
+        "stage1.md",
+        "stage2.md",
+    ]
+    assert "## Stages" in files[0].content_string
+    assert "- stage: Stage1" in files[2].content_string
+    assert set(plugin.generated_pages.values()) == {str(pipeline_file)}
+    plugin.on_shutdown()
+
+
+def test_azure_pipelines_plugin_on_serve_watches_directories(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    (pipelines / "sub").mkdir(parents=True)
+    for i in range(10):
+        (pipelines / f"pipeline{i}.yml").write_text("steps: []")
+    outside_file = tmp_path / "outside.yml"
+    outside_file.write_text("steps: []")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = [str(pipelines / "pipeline0.yml"), str(outside_file)]
+    plugin_config["input_dirs"] = [str(pipelines), str(pipelines / "sub")]
+    plugin_config["output_dir"] = "pipelines"
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    server = LiveReloadServer(Mock(), "127.0.0.1", 0, str(tmp_path))
+    plugin.on_serve(server, config=Mock(), builder=Mock())
+    server.server_close()
+
+    # One watch for the directory and one for its sub directory, whatever the
+    # number of files in them, and one for the file outside of it
+    watches = {
+        (emitter.watch.path, emitter.watch.is_recursive)
+        for emitter in server.observer.emitters
+    }
+    assert watches == {
+        (str(pipelines), False),
+        (str(pipelines / "sub"), True),
+        (str(outside_file), True),
+    }
+
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_azure_pipelines_plugin_git_changes(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    first = pipelines / "first.yml"
+    first.write_text("steps:\n  - script: echo first")
+    second = pipelines / "second.yml"
+    second.write_text("steps:\n  - script: echo second")
+    (pipelines / "values.yaml").write_text("replicaCount: 1")
+    (tmp_path / ".gitignore").write_text(".cache/\n")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "Initial")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["cache"] = True
+    plugin_config["git_changes"] = True
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+
+    def build():
+        # A new plugin, like in a new CI job with a restored cache
+        plugin = AzurePipelinesPlugin()
+        plugin.config = plugin_config  # pyright: ignore
+        plugin.on_config(mkdocs_config)
+        files = plugin.on_files(Files([]), config=mkdocs_config)
+        return plugin, files
+
+    plugin, _ = build()
+    assert plugin.incremental.converted == 3
+    assert (tmp_path / ".cache/mkdocs-azure-pipelines/manifest.json").exists()
+
+    # Only the files changed in a commit or in the working tree are read
+    second.write_text("steps:\n  - script: echo changed")
+    git(tmp_path, "commit", "-q", "-am", "Change second")
+    first.write_text("steps:\n  - script: echo uncommitted")
+    plugin, files = build()
+    assert (plugin.incremental.converted, plugin.incremental.reused) == (2, 1)
+    assert plugin.non_pipeline_files == {str(pipelines / "values.yaml")}
+    assert len(files) == 2
+    assert any("echo changed" in f.content_string for f in files)
+
+    # Reverting the uncommitted change is noticed as well
+    git(tmp_path, "checkout", "--", "pipelines/first.yml")
+    plugin, files = build()
+    assert plugin.incremental.converted == 1
+    assert any("echo first" in f.content_string for f in files)
+
+
+def test_azure_pipelines_plugin_embeds_pipelines(tmp_path):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    (pipelines / "build.yml").write_text("steps:\n  - script: echo build")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    plugin.on_files(Files([]), config=mkdocs_config)
+
+    page = Mock()
+    page.file.src_uri = "guide.md"
+    # The document parsed by the build is embedded, without reading the file
+    with (
+        patch.object(embed, "read_pipeline_file") as read,
+        patch.object(embed, "build_document") as parse,
+    ):
+        markdown = plugin.embed_pipelines(
+            "# Guide\n\n<!-- azure-pipeline: pipelines/build.yml#code -->",
+            page=page,
+            config=mkdocs_config,
+            files=Files([]),
+        )
+    read.assert_not_called()
+    parse.assert_not_called()
+    assert markdown == "# Guide\n\n```yaml\nsteps:\n  - script: echo build\n```"
+
+    # The embedded files are watched when serving
+    server = Mock()
+    plugin.on_serve(server, config=mkdocs_config, builder=Mock())
+    server.watch.assert_called_once_with(str(pipelines / "build.yml"))
+
+
+def test_azure_pipelines_plugin_highlight_cache(tmp_path):
+    pipeline_file = tmp_path / "pipeline.yml"
+    pipeline_file.write_text("steps:\n  - script: echo")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = [str(pipeline_file)]
+    plugin_config["input_dirs"] = []
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["highlight_cache"] = True
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(
+        config_file_path=str(tmp_path / "mkdocs.yml"),
+        markdown_extensions=["toc", "fenced_code", "pymdownx.superfences"],
+        mdx_configs={},
+    )
+    with pytest.raises(ConfigurationError, match="highlight_cache requires cache"):
+        plugin.on_config(mkdocs_config)
+
+    plugin_config["cache"] = True
+    plugin.on_config(mkdocs_config)
+    (page_file,) = plugin.on_files(Files([]), config=mkdocs_config)
+    page = Mock(file=page_file)
+    markdown = plugin.highlight_code(
+        page_file.content_string, page=page, config=mkdocs_config, files=Files([])
+    )
+    assert markdown is not None
+    assert "```" not in markdown
+    assert '<div class="highlight">' in markdown
+    plugin.on_post_build(config=mkdocs_config)
+    assert (
+        len(list((tmp_path / ".cache/mkdocs-azure-pipelines/highlight").iterdir())) == 1
+    )
+
+
+def test_azure_pipelines_plugin_search_summary(tmp_path):
+    pipeline_file = tmp_path / "pipeline.yml"
+    pipeline_file.write_text("parameters:\n  - name: region\nsteps:\n  - script: echo")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = [str(pipeline_file)]
+    plugin_config["input_dirs"] = []
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["search_summary"] = True
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    (page_file,) = plugin.on_files(Files([]), config=Mock())
+    content = (
+        '<h1 id="pipeline">Pipeline</h1>\n<h2 id="parameters">Parameters</h2>\n'
+        '<pre><code>parameters:</code></pre>\n<h2 id="code">Code</h2>\n'
+        "<pre><code>steps:</code></pre>\n"
+    )
+    page = Mock(file=page_file, content=content)
+    context = plugin.summarize_for_search(
+        cast(TemplateContext, {}), page=page, config=Mock(), nav=Mock()
+    )
+    assert context is not None
+
+    # The search plugins index the summary, the page is rendered in full
+    assert page.content == (
+        '<h1 id="pipeline">Pipeline</h1>\n<h2 id="parameters">Parameters</h2>\n'
+        "<p>region</p>\n"
+    )
+    plugin.restore_after_search(context, page=page, config=Mock(), nav=Mock())
+    assert page.content == content
+
+
+@pytest.mark.parametrize("pages_on_disk", [False, True])
+def test_azure_pipelines_plugin_groups_small_pages(tmp_path, pages_on_disk):
+    steps = tmp_path / "steps"
+    steps.mkdir()
+    (steps / "build.yml").write_text("steps:\n  - script: echo build")
+    (steps / "test.yml").write_text("steps:\n  - template: build.yml")
+    (steps / "large.yml").write_text(
+        "steps:\n" + "".join(f"  - script: echo {i}\n" for i in range(20))
+    )
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(tmp_path)]
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["group_by_directory"] = True
+    plugin_config["group_threshold"] = 10
+    plugin_config["template_graph"] = True
+    plugin_config["pages_on_disk"] = pages_on_disk
+    plugin_config["index"] = "index.json"
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    files = plugin.on_files(Files([]), config=mkdocs_config)
+    assert len(files) == 2
+    large_page, group_page = list(files)
+    assert large_page.src_uri.startswith("pipelines/large-")
+    assert group_page.src_uri.startswith("pipelines/steps-")
+    content = group_page.content_string
+    assert content.startswith("# steps\n\n- [Build](#build)\n- [Test](#test)\n")
+    # Links to grouped templates point to their section
+    group_name = group_page.src_uri.split("/")[-1]
+    assert f"[Build]({group_name}#build) `build.yml`" in content
+
+    records = read_index(tmp_path / "index.json")
+    assert [record["page"] for record in records] == [
+        f"{group_page.src_uri}#build",
+        large_page.src_uri,
+        f"{group_page.src_uri}#test",
+    ]
+    plugin.on_shutdown()
+
+
+@pytest.mark.parametrize("pages_on_disk", [False, True])
+def test_azure_pipelines_plugin_read_ahead(tmp_path, pages_on_disk):
+    pipelines = tmp_path / "pipelines"
+    pipelines.mkdir()
+    for i in range(5):
+        (pipelines / f"p{i}.yml").write_text(f"steps:\n  - script: echo {i}")
+
+    plugin_config = PluginConfig()
+    plugin_config["input_files"] = []
+    plugin_config["input_dirs"] = [str(pipelines)]
+    plugin_config["output_dir"] = "pipelines"
+    plugin_config["pages_on_disk"] = pages_on_disk
+    plugin_config["read_ahead"] = 1
+
+    plugin = AzurePipelinesPlugin()
+    plugin.config = plugin_config  # pyright: ignore
+    mkdocs_config = Mock(config_file_path=str(tmp_path / "mkdocs.yml"))
+    plugin.on_config(mkdocs_config)
+    batch_sizes = []
+    convert_contents = plugin.convert_contents
+
+    def convert(items):
+        batch_sizes.append(len(items))
+        return convert_contents(items)
+
+    with (
+        patch.object(plugin, "convert_contents", convert),
+        patch("mkdocs_azure_pipelines.plugin.READ_AHEAD_BATCH_SIZE", 2),
+    ):
+        files = plugin.on_files(Files([]), config=mkdocs_config)
+
+    # The batches don't depend on the number of files read ahead
+    assert batch_sizes == [2, 2, 1]
+    assert plugin.prefetcher is None
+    assert sorted(f.content_string.split("echo ")[1][0] for f in files) == list("01234")
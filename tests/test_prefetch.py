@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from mkdocs_azure_pipelines.prefetch import Prefetcher
+
+
+def write_files(tmp_path, count, size=10):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"{i}.yml"
+        path.write_text(str(i) * size)
+        paths.append(str(path))
+    return paths
+
+
+def read_text(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_prefetcher_reads_files_in_order(tmp_path):
+    paths = write_files(tmp_path, 5)
+    with Prefetcher(read_text, 2, 1024) as prefetcher:
+        prefetcher.start(paths)
+        assert len(prefetcher.pending) == 2
+        assert [prefetcher.read(path) for path in paths] == [
+            str(i) * 10 for i in range(5)
+        ]
+        assert not prefetcher.pending
+        assert prefetcher.reserved == 0
+
+
+def test_prefetcher_memory_budget(tmp_path):
+    paths = write_files(tmp_path, 4, size=100)
+    with Prefetcher(read_text, 4, 250) as prefetcher:
+        prefetcher.start(paths)
+        assert list(prefetcher.pending) == paths[:2]
+        prefetcher.read(paths[0])
+        assert list(prefetcher.pending) == paths[1:3]
+
+    # A file larger than the budget is still read ahead on its own
+    with Prefetcher(read_text, 4, 50) as prefetcher:
+        prefetcher.start(paths)
+        assert list(prefetcher.pending) == paths[:1]
+
+
+def test_prefetcher_reads_in_background(tmp_path):
+    paths = write_files(tmp_path, 3)
+    threads = set()
+
+    def read(path):
+        threads.add(threading.current_thread().name)
+        return read_text(path)
+
+    with Prefetcher(read, 2, 1024) as prefetcher:
+        prefetcher.start(paths)
+        for path in paths:
+            prefetcher.read(path)
+    assert all(name.startswith("mkdocs-azure-pipelines-read") for name in threads)
+
+
+def test_prefetcher_errors_and_unstarted_files(tmp_path):
+    paths = write_files(tmp_path, 2)
+    missing = str(tmp_path / "missing.yml")
+    with Prefetcher(read_text, 2, 1024) as prefetcher:
+        prefetcher.start([missing, paths[0]])
+        with pytest.raises(FileNotFoundError):
+            prefetcher.read(missing)
+        assert prefetcher.read(paths[0]) == "0" * 10
+        assert prefetcher.read(paths[1]) == "1" * 10
@@ -0,0 +1,31 @@
+from mkdocs_azure_pipelines.search import heading_text, search_summary
+
+CONTENT = """<h1 id="build">Build</h1>
+<h2 id="about">About<a class="headerlink" href="#about">&para;</a></h2>
+<p>Builds the project.</p>
+<h2 id="outputs">Outputs</h2>
+<p><strong>version</strong>: The version built.</p>
+<h2 id="parameters">Parameters</h2>
+<div class="highlight"><pre><span></span><code>parameters:</code></pre></div>
+<h2 id="code">Code</h2>
+<div class="highlight"><pre><span></span><code>steps:</code></pre></div>
+"""
+
+
+def test_heading_text():
+    assert (
+        heading_text('About<a class="headerlink" href="#about">&para;</a>') == "About"
+    )
+
+
+def test_search_summary():
+    summary = search_summary(CONTENT, ["configuration", "<name>"])
+    assert summary == (
+        '<h1 id="build">Build</h1>\n'
+        '<h2 id="about">About<a class="headerlink" href="#about">&para;</a></h2>\n'
+        "<p>Builds the project.</p>\n"
+        '<h2 id="outputs">Outputs</h2>\n'
+        "<p><strong>version</strong>: The version built.</p>\n"
+        '<h2 id="parameters">Parameters</h2>\n<p>configuration &lt;name&gt;</p>\n'
+    )
+    assert "<pre>" not in search_summary(CONTENT, [])
@@ -0,0 +1,62 @@
+from mkdocs_azure_pipelines.split import split_items, split_page
+
+MARKDOWN = """# Release
+
+## Code
+
+```yaml
+stages:
+  # Build first
+  - stage: Build
+    jobs:
+      - job: Compile
+  - template: stages/test.yml
+  - stage: "Deploy" # Production
+    jobs:
+      - deployment: Production
+```
+
+## Templates
+
+- `stages/test.yml`
+
+"""
+
+
+def test_split_items():
+    code = MARKDOWN.split("```yaml\n")[1].split("\n```")[0]
+    split = split_items(code)
+    assert split is not None
+    key, items = split
+    assert key == "stages"
+    assert [name for name, _ in items] == ["Build", "stages/test.yml", "Deploy"]
+    assert items[0][1].startswith("  # Build first\n  - stage: Build")
+    assert split_items("steps:\n  - script: echo\n  - script: echo") is None
+
+
+def test_split_page():
+    pages = split_page(MARKDOWN, "pipelines/release-123.md", threshold=5)
+    assert [src_uri for src_uri, _ in pages] == [
+        "pipelines/release-123.md",
+        "pipelines/release-123/build.md",
+        "pipelines/release-123/stages-test-yml.md",
+        "pipelines/release-123/deploy.md",
+    ]
+    assert pages[0][1] == (
+        "# Release\n\n## Stages\n\n"
+        "- [Build](release-123/build.md)\n"
+        "- [stages/test.yml](release-123/stages-test-yml.md)\n"
+        "- [Deploy](release-123/deploy.md)\n"
+        "\n## Templates\n\n- `stages/test.yml`\n\n"
+    )
+    assert pages[2][1] == (
+        "# Release: stages/test.yml\n\n"
+        "[Back to Release](../release-123.md) | [Previous: Build](build.md) | "
+        "[Next: Deploy](deploy.md)\n\n"
+        "## Code\n\n```yaml\nstages:\n  - template: stages/test.yml\n```\n\n"
+    )
+
+    # Pages below the threshold are not split
+    assert split_page(MARKDOWN, "release.md", threshold=100) == [
+        ("release.md", MARKDOWN)
+    ]
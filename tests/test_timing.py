@@ -0,0 +1,36 @@
+import json
+
+from mkdocs_azure_pipelines.ado_pipe_to_md import process_pipeline_content
+from mkdocs_azure_pipelines.timing import NULL_TIMER, BuildReport, PhaseTimer
+
+
+def test_phase_timer_records_converter_phases():
+    timer = PhaseTimer()
+    process_pipeline_content(
+        "#:::title-start:::\n# T\n#:::title-end:::\nsteps: []", "p.yml", timer
+    )
+    assert set(timer.phases) == {"tags", "parse", "dump"}
+    assert all(seconds >= 0 for seconds in timer.phases.values())
+
+
+def test_null_timer_records_nothing():
+    process_pipeline_content("steps: []", "p.yml", NULL_TIMER)
+    assert NULL_TIMER.phases == {}
+
+
+def test_build_report_summary_and_json(tmp_path):
+    report = BuildReport()
+    report.add("discovery", 0.5)
+    report.add_file("slow.yml", {"parse": 2.0, "dump": 1.0})
+    report.add_file("fast.yml", {"parse": 0.1})
+    report.counters["cache_hits"] += 3
+
+    summary = report.summary(slowest=1)
+    assert summary[0] == "Time per phase: discovery 0.500s, parse 2.100s, dump 1.000s"
+    assert summary[1] == "Counters: cache_hits 3"
+    assert summary[2:] == ["Slowest 1 files:", "  3.000s slow.yml"]
+
+    report.write_json(tmp_path / "report" / "timings.json")
+    data = json.loads((tmp_path / "report" / "timings.json").read_text())
+    assert data["files"]["fast.yml"] == {"parse": 0.1}
+    assert data["counters"] == {"cache_hits": 3}
@@ -0,0 +1,79 @@
+import os
+from unittest.mock import Mock, patch
+
+from mkdocs.livereload import LiveReloadServer
+from watchdog.events import (
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    FileClosedNoWriteEvent,
+    FileCreatedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+from mkdocs_azure_pipelines.watch import PipelineEventHandler, watch_directory
+
+
+def test_pipeline_event_handler_filters_events(tmp_path):
+    on_change = Mock()
+    handler = PipelineEventHandler(
+        str(tmp_path), on_change, exclude=[".git", "node_modules", "helm/*"]
+    )
+
+    def path(relative):
+        return os.path.join(tmp_path, relative)
+
+    ignored = [
+        FileModifiedEvent(path("README.md")),
+        FileModifiedEvent(path(".git/index")),
+        FileCreatedEvent(path("node_modules/pkg/x.yml")),
+        FileModifiedEvent(path("helm/values.yaml")),
+        FileClosedNoWriteEvent(path("pipeline.yml")),
+        DirModifiedEvent(path("templates")),
+    ]
+    for event in ignored:
+        handler.dispatch(event)
+    on_change.assert_not_called()
+
+    relevant = [
+        FileModifiedEvent(path("pipeline.yml")),
+        FileCreatedEvent(path("templates/steps.yaml")),
+        FileMovedEvent(path("templates/steps.tmp"), path("templates/steps.yml")),
+        DirDeletedEvent(path("templates")),
+    ]
+    for event in relevant:
+        handler.dispatch(event)
+    assert on_change.call_count == len(relevant)
+
+
+def test_watch_directory_skips_excluded_directories(tmp_path):
+    for name in ("templates", "node_modules", ".git"):
+        (tmp_path / name).mkdir()
+    server = LiveReloadServer(Mock(), "127.0.0.1", 0, str(tmp_path))
+    server.server_close()
+    with patch.object(
+        server.observer, "schedule", wraps=server.observer.schedule
+    ) as schedule:
+        watch_directory(server, str(tmp_path))
+    handler = schedule.call_args.args[0]
+
+    def watches():
+        return {
+            (emitter.watch.path, emitter.watch.is_recursive)
+            for emitter in server.observer.emitters
+        }
+
+    assert watches() == {(str(tmp_path), False), (str(tmp_path / "templates"), True)}
+
+    # New directories get their own watch
+    (tmp_path / "stages").mkdir()
+    handler.dispatch(DirCreatedEvent(str(tmp_path / "stages")))
+    assert (str(tmp_path / "stages"), True) in watches()
+    assert server._want_rebuild
+
+    server._want_rebuild = False
+    handler.dispatch(DirCreatedEvent(str(tmp_path / "node_modules" / "pkg")))
+    assert not server._want_rebuild
+    handler.dispatch(FileModifiedEvent(str(tmp_path / "templates" / "steps.yml")))
+    assert server._want_rebuild